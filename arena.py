@@ -0,0 +1,575 @@
+"""
+SLU-C AST arena
+A program stored as parallel arrays instead of one object per node, for
+programs with millions of nodes. A node is an index into the arrays:
+
+  kind[n]         what sort of node n is, one of the kinds below
+  a[n], b[n], c[n]  its operands: child nodes, indices into pool or into extra
+  line[n]         source line of statements and calls, -1 for the rest
+  extra           the child lists of Stmts, PrintStmt, calls and fors, a node
+                  points at them with a start and a count
+  pool            the names, operators and literals, each stored once
+
+The parser makes children before their parents, so every child has a
+smaller index than its parent and the nodes can be visited bottom up just by
+going through the indices in order.
+
+  arena = parse("prog.sluc")
+  arena.eval()
+  program = to_tree(arena)      # back to the sluc_ast classes
+  arena = from_tree(program)
+
+Functions are few, so they stay small objects (ArenaFunction) that point at
+the Stmts of their body.
+"""
+from array import array
+from typing import Iterator, List, Optional, Sequence, Union
+
+from sluc_ast import *
+
+STMTS, IF, WHILE, RETURN, ASSIGN, PRINT, BINARY, UNARY, CALL, FOR, INT, FLOAT, BOOL, STRING, ID = range(15)
+# the sluc_ast class each kind stands for
+KIND_NAMES = ["Stmts", "IfStmt", "WhileStmt", "ReturnStmt", "AssignStmt", "PrintStmt", "BinaryExpr", "UnaryOp",
+              "FunctionCallExpr", "ForStmt", "IntLitExpr", "FloatExpr", "BoolExpr", "StringExpr", "IDExpr"]
+# kinds of statements, everything else is an expression
+STATEMENTS = {STMTS, IF, WHILE, RETURN, ASSIGN, PRINT, FOR}
+# kinds without children, from INT on
+LEAF = INT
+
+#                           a           b          c            list in extra
+# STMTS                     start       count                   statements
+# IF                        condition   then       else or -1
+# WHILE                     condition   body
+# RETURN                    expression
+# ASSIGN                    name        expression
+# PRINT                     start       count                   arguments
+# BINARY                    left        right      operator
+# UNARY                     operand                sign
+# CALL                      start       count      name         arguments
+# FOR                       start                               init, condition, update, body
+# INT, FLOAT                value                  text
+# BOOL, STRING, ID                                 text
+
+
+class ArenaFunction:
+    """
+    FunctionDef of an Arena: params and decls are lists of (type, id) and
+    stmts is the node of the body
+    """
+    __slots__ = ("t", "id", "params", "decls", "stmts", "line")
+
+    def __init__(self, t, id, params, decls, stmts, line: Optional[int] = None):
+        self.t = t
+        self.id = id
+        self.params = params
+        self.decls = decls
+        self.stmts = stmts
+        self.line = line
+
+
+class Arena:
+    """
+    The nodes of one program, see the top of this file for the layout
+    """
+
+    def __init__(self):
+        self.kind = array("b")
+        self.a = array("i")
+        self.b = array("i")
+        self.c = array("i")
+        self.line = array("i")
+        self.extra = array("i")
+        self.pool = []
+        self.pooled = {}  # (type, value) -> index in pool
+        self.functions = []
+
+    def __len__(self):
+        return len(self.kind)
+
+    def intern(self, value) -> int:
+        # index of value in pool, the type is part of the key so 1, 1.0 and True stay apart
+        key = (type(value), value)
+        index = self.pooled.get(key)
+        if index is None:
+            index = self.pooled[key] = len(self.pool)
+            self.pool.append(value)
+        return index
+
+    def add(self, kind: int, a: int = -1, b: int = -1, c: int = -1, line: Optional[int] = None) -> int:
+        self.kind.append(kind)
+        self.a.append(a)
+        self.b.append(b)
+        self.c.append(c)
+        self.line.append(-1 if line is None else line)
+        return len(self.kind) - 1
+
+    def add_list(self, nodes: Sequence[int]) -> int:
+        # puts nodes in extra and returns where they start
+        start = len(self.extra)
+        self.extra.extend(nodes)
+        return start
+
+    def children(self, n: int) -> List[int]:
+        kind = self.kind[n]
+        if kind in (STMTS, PRINT, CALL):
+            start = self.a[n]
+            return list(self.extra[start:start + self.b[n]])
+        if kind == FOR:
+            start = self.a[n]
+            return list(self.extra[start:start + 4])
+        if kind == IF:
+            return [self.a[n], self.b[n]] if self.c[n] < 0 else [self.a[n], self.b[n], self.c[n]]
+        if kind in (WHILE, BINARY):
+            return [self.a[n], self.b[n]]
+        if kind in (RETURN, UNARY):
+            return [self.a[n]]
+        if kind == ASSIGN:
+            return [self.b[n]]
+        return []
+
+    def walk(self, root: int) -> Iterator[int]:
+        """
+        The nodes under root, parents before children and children in order,
+        without recursion
+        """
+        stack = [root]
+        while stack:
+            n = stack.pop()
+            yield n
+            stack.extend(reversed(self.children(n)))
+
+    def postorder(self, root: int) -> Iterator[int]:
+        """
+        The nodes under root, children before parents. Children always have
+        smaller indices, so this is the nodes of the subtree in index order.
+        """
+        return iter(sorted(self.walk(root)))
+
+    def text(self, root: int) -> str:
+        # what str gives for the expression root as a sluc_ast node
+        done = {}
+        kind, a, b, c, pool, extra = self.kind, self.a, self.b, self.c, self.pool, self.extra
+        for n in self.postorder(root):
+            k = kind[n]
+            if k == BINARY:
+                done[n] = "({0} {1} {2})".format(done.pop(a[n]), pool[c[n]], done.pop(b[n]))
+            elif k == UNARY:
+                done[n] = "{0}({1})".format(pool[c[n]], done.pop(a[n]))
+            elif k == CALL:
+                args = [done.pop(arg) for arg in extra[a[n]:a[n] + b[n]]]
+                done[n] = pool[c[n]] + "(" + ", ".join(args) + ")"
+            elif k >= LEAF:
+                done[n] = str(pool[c[n]])
+            else:
+                raise ValueError("{0} is a statement, not an expression".format(KIND_NAMES[k]))
+        return done[root]
+
+    def eval(self, budget: Optional[Budget] = None):
+        # runs the first function, main, like Program.eval
+        self.run(self.functions[0], [], budget)
+
+    def call(self, id: str, args: Sequence[Union[int, float, bool]] = (), budget: Optional[Budget] = None):
+        """
+        Runs the function called id with args and returns what it returns
+        """
+        for func in self.functions:
+            if func.id == id:
+                if len(args) != len(func.params):
+                    raise SLUCInvalidTypeError("ERROR: {0} takes {1} arguments but got {2}".format(
+                        id, len(func.params), len(args)))
+                return self.run(func, args, budget)
+        raise SLUCInvalidTypeError("ERROR: there is no function called {0}".format(id))
+
+    def run(self, func: ArenaFunction, args, budget: Optional[Budget] = None):
+        if budget is not None:
+            budget.start()
+            budget.enter(func.line)
+        return run_steps(Evaluator(self, budget).call_steps(func, list(args)))
+
+
+class Builder:
+    """
+    Builds an Arena for a Parser, Parser(fn, build=Builder()). Has a method
+    for every node class the parser makes, returning node indices instead of
+    nodes.
+    """
+
+    def __init__(self, arena: Optional[Arena] = None):
+        self.arena = Arena() if arena is None else arena
+
+    def Program(self, functions) -> Arena:
+        self.arena.functions = list(functions)
+        return self.arena
+
+    def FunctionDef(self, t, id, params, decls, stmts, line: Optional[int] = None) -> ArenaFunction:
+        return ArenaFunction(t, id, params, decls, stmts, line)
+
+    def Param(self, params):
+        return list(params)
+
+    def Declarations(self, decls):
+        return list(decls)
+
+    def Declaration(self, typ: str, id: str):
+        return typ, id
+
+    def Stmts(self, stmts: Sequence[int]) -> int:
+        return self.arena.add(STMTS, self.arena.add_list(stmts), len(stmts))
+
+    def IfStmt(self, expr: int, stmt: int, elseStmt: Optional[int] = None, line: Optional[int] = None) -> int:
+        return self.arena.add(IF, expr, stmt, -1 if elseStmt is None else elseStmt, line)
+
+    def WhileStmt(self, expr: int, stmt: int, line: Optional[int] = None) -> int:
+        return self.arena.add(WHILE, expr, stmt, line=line)
+
+    def ForStmt(self, init: int, expr: int, update: int, stmt: int, line: Optional[int] = None) -> int:
+        return self.arena.add(FOR, self.arena.add_list([init, expr, update, stmt]), line=line)
+
+    def ReturnStmt(self, expr: int, line: Optional[int] = None) -> int:
+        return self.arena.add(RETURN, expr, line=line)
+
+    def AssignStmt(self, id: str, expr: int, line: Optional[int] = None) -> int:
+        return self.arena.add(ASSIGN, self.arena.intern(id), expr, line=line)
+
+    def PrintStmt(self, printarg: Sequence[int], line: Optional[int] = None) -> int:
+        return self.arena.add(PRINT, self.arena.add_list(printarg), len(printarg), line=line)
+
+    def BinaryExpr(self, operator: str, left: int, right: int) -> int:
+        return self.arena.add(BINARY, left, right, self.arena.intern(operator))
+
+    def UnaryOp(self, tree: int, sign: str) -> int:
+        return self.arena.add(UNARY, tree, c=self.arena.intern(sign))
+
+    def FunctionCallExpr(self, id: str, arguments: Sequence[int], line: Optional[int] = None) -> int:
+        return self.arena.add(CALL, self.arena.add_list(arguments), len(arguments), self.arena.intern(id), line)
+
+    def IDExpr(self, boo: str) -> int:
+        return self.arena.add(ID, c=self.arena.intern(boo))
+
+    def IntLitExpr(self, boo: str, value: Optional[int] = None) -> int:
+        value = int(boo) if value is None else value
+        return self.arena.add(INT, self.arena.intern(value), c=self.arena.intern(boo))
+
+    def FloatExpr(self, boo: str, value: Optional[float] = None) -> int:
+        value = float(boo) if value is None else value
+        return self.arena.add(FLOAT, self.arena.intern(value), c=self.arena.intern(boo))
+
+    def BoolExpr(self, boo: str) -> int:
+        return self.arena.add(BOOL, c=self.arena.intern(boo))
+
+    def StringExpr(self, boo: str) -> int:
+        return self.arena.add(STRING, c=self.arena.intern(boo))
+
+    def text(self, node: int) -> str:
+        return self.arena.text(node)
+
+
+class Evaluator:
+    """
+    Runs an Arena the way the sluc_ast classes run the same program. The
+    methods are *_steps generators for run_steps, so deep programs don't
+    recurse, and leaves are worked out in place instead of through a
+    generator of their own.
+    """
+
+    def __init__(self, arena: Arena, budget: Optional[Budget] = None):
+        self.arena = arena
+        self.budget = budget
+        self.funcs = {}  # id -> ArenaFunction, the first one wins just like FunctionCallExpr.eval
+        for func in arena.functions:
+            self.funcs.setdefault(func.id, func)
+
+    def leaf(self, n: int, env):
+        # value of a node without children
+        kind = self.arena.kind[n]
+        pool = self.arena.pool
+        if kind == ID:
+            return env[pool[self.arena.c[n]]]
+        if kind == INT or kind == FLOAT:
+            return pool[self.arena.a[n]]
+        if kind == BOOL:
+            return pool[self.arena.c[n]] == "true"
+        return str(pool[self.arena.c[n]])
+
+    def leaf_type(self, n: int, env) -> type:
+        # type of a node without children, env holds values or type names
+        kind = self.arena.kind[n]
+        if kind == ID:
+            value = env[self.arena.pool[self.arena.c[n]]]
+            return TYPES[value] if value in TYPES else type(value)
+        return (int, float, bool, str)[kind - INT]
+
+    def typeof_steps(self, n: int, env):
+        kind = self.arena.kind[n]
+        if kind >= LEAF:
+            return self.leaf_type(n, env)
+        if kind == BINARY:
+            a = self.arena.a[n]
+            b = self.arena.b[n]
+            left = self.leaf_type(a, env) if self.arena.kind[a] >= LEAF else (yield self.typeof_steps(a, env))
+            right = self.leaf_type(b, env) if self.arena.kind[b] >= LEAF else (yield self.typeof_steps(b, env))
+            return checktypes(self.arena.pool[self.arena.c[n]], left, right)
+        if kind == UNARY:
+            # UnaryOp.typeof looks at its operand but has no type to give
+            a = self.arena.a[n]
+            if self.arena.kind[a] < LEAF:
+                yield self.typeof_steps(a, env)
+            else:
+                self.leaf_type(a, env)
+        if kind == CALL:
+            # only builtins say what they return, like FunctionCallExpr.typeof
+            builtin = BUILTINS.get(self.arena.pool[self.arena.c[n]])
+            if builtin is not None:
+                types = []
+                start = self.arena.a[n]
+                for arg in self.arena.extra[start:start + self.arena.b[n]]:
+                    types.append(self.leaf_type(arg, env) if self.arena.kind[arg] >= LEAF
+                                 else (yield self.typeof_steps(arg, env)))
+                return builtin.typeof(types)
+        return None
+
+    def expr_steps(self, n: int, env, checked: bool = False):
+        arena = self.arena
+        kind = arena.kind[n]
+        if kind >= LEAF:
+            return self.leaf(n, env)
+        if kind == BINARY:
+            # typeof already checks the whole subtree, so the operands don't check again
+            if not checked:
+                yield self.typeof_steps(n, env)
+            a = arena.a[n]
+            b = arena.b[n]
+            op = arena.pool[arena.c[n]]
+            left = self.leaf(a, env) if arena.kind[a] >= LEAF else (yield self.expr_steps(a, env, True))
+            if op == "&&" and not left or op == "||" and left:
+                return left
+            right = self.leaf(b, env) if arena.kind[b] >= LEAF else (yield self.expr_steps(b, env, True))
+            if op == "&&" or op == "||":
+                return right
+            return BINARY_OPS[op](left, right)
+        if kind == UNARY:
+            a = arena.a[n]
+            value = self.leaf(a, env) if arena.kind[a] >= LEAF else (yield self.expr_steps(a, env, checked))
+            if arena.pool[arena.c[n]] == "!":
+                return not value
+            return - value
+        if kind == CALL:
+            values = []
+            start = arena.a[n]
+            for arg in arena.extra[start:start + arena.b[n]]:
+                values.append(self.leaf(arg, env) if arena.kind[arg] >= LEAF else (yield self.expr_steps(arg, env)))
+            builtin = BUILTINS.get(arena.pool[arena.c[n]])
+            if builtin is not None:
+                return builtin.call(values)
+            func = self.funcs.get(arena.pool[arena.c[n]])
+            if func is None:
+                return None
+            if self.budget is None:
+                return (yield self.call_steps(func, values))
+            self.budget.enter(arena.line[n])
+            try:
+                return (yield self.call_steps(func, values))
+            finally:
+                self.budget.leave()
+        return (yield self.stmt_steps(n, env))
+
+    def stmts_steps(self, n: int, env):
+        arena = self.arena
+        start = arena.a[n]
+        for stmt in arena.extra[start:start + arena.b[n]]:
+            # a return directly in these statements ends them
+            if arena.kind[stmt] == RETURN:
+                return (yield self.expr_steps(arena.a[stmt], env))
+            yield self.stmt_steps(stmt, env)
+
+    def stmt_steps(self, n: int, env):
+        arena = self.arena
+        kind = arena.kind[n]
+        if kind == STMTS:
+            return (yield self.stmts_steps(n, env))
+        if kind == ASSIGN:
+            env[arena.pool[arena.a[n]]] = yield self.expr_steps(arena.b[n], env)
+        elif kind == IF:
+            if (yield self.expr_steps(arena.a[n], env)):
+                return (yield self.stmt_steps(arena.b[n], env))
+            elif arena.c[n] >= 0:
+                return (yield self.stmt_steps(arena.c[n], env))
+        elif kind == WHILE:
+            while (yield self.expr_steps(arena.a[n], env)):
+                yield self.stmt_steps(arena.b[n], env)
+                if self.budget is not None:
+                    self.budget.tick(arena.line[n])
+        elif kind == FOR:
+            # always the general way, ForStmt's range is for the tree
+            init, cond, update, body = arena.extra[arena.a[n]:arena.a[n] + 4]
+            yield self.stmt_steps(init, env)
+            while (yield self.expr_steps(cond, env)):
+                yield self.stmt_steps(body, env)
+                yield self.stmt_steps(update, env)
+                if self.budget is not None:
+                    self.budget.tick(arena.line[n])
+        elif kind == PRINT:
+            start = arena.a[n]
+            for arg in arena.extra[start:start + arena.b[n]]:
+                # evaluated a second time for printing just like PrintStmt.eval
+                if type((yield self.expr_steps(arg, env))) == str:
+                    print((yield self.expr_steps(arg, env))[1:-1], end="\n")
+                else:
+                    print((yield self.expr_steps(arg, env)), end="\n")
+        elif kind == RETURN:
+            return (yield self.expr_steps(arena.a[n], env))
+        else:
+            return (yield self.expr_steps(n, env))
+
+    def typecheck_steps(self, n: int, env, envtype):
+        """
+        What FunctionDef.typecheck does after the body ran: assignments are
+        evaluated again and checked against the declared type of their
+        variable, the other statements only have their expressions typed
+        """
+        arena = self.arena
+        kind = arena.kind[n]
+        if kind == STMTS:
+            start = arena.a[n]
+            for stmt in arena.extra[start:start + arena.b[n]]:
+                yield self.typecheck_steps(stmt, env, envtype)
+        elif kind == ASSIGN:
+            right = type((yield self.expr_steps(arena.b[n], env)))
+            right = TYPENAMES.get(right, right)
+            left = envtype[arena.pool[arena.a[n]]]
+            if left != right and (left == "bool" or right == "bool"):
+                raise SLUCInvalidTypeError("Error: Invalid Type")
+        elif kind in (IF, WHILE, RETURN):
+            yield self.typeof_steps(arena.a[n], envtype)
+        elif kind == FOR:
+            yield self.typeof_steps(arena.extra[arena.a[n] + 1], envtype)
+        elif kind == PRINT:
+            start = arena.a[n]
+            for arg in arena.extra[start:start + arena.b[n]]:
+                yield self.typeof_steps(arg, envtype)
+        else:
+            # an expression used as a statement has no typecheck in sluc_ast either
+            raise AttributeError("'{0}' object has no attribute 'typecheck'".format(KIND_NAMES[kind]))
+
+    def call_steps(self, func: ArenaFunction, values):
+        # FunctionDef.eval
+        env = {func.params[i][1]: values[i] for i in range(len(func.params))}
+        for t, id in func.decls:
+            env[id] = None
+        envtype = {**{id: t for t, id in func.params}, **{id: t for t, id in func.decls}}
+        retVal = yield self.stmts_steps(func.stmts, env)
+        yield self.typecheck_steps(func.stmts, env, envtype)
+        return retVal
+
+
+def parse(fn: Optional[str], tokens=None) -> Arena:
+    """
+    Parses straight into an Arena, fn and tokens are as for Parser
+    """
+    from parser import Parser
+    return Parser(fn, tokens=tokens, build=Builder()).program()
+
+
+def to_tree(arena: Arena) -> Program:
+    """
+    The same program made of sluc_ast nodes
+    """
+    kind, a, b, c, line, pool, extra = arena.kind, arena.a, arena.b, arena.c, arena.line, arena.pool, arena.extra
+    nodes = []  # children come before their parents, so one pass in index order builds everything
+    for n in range(len(kind)):
+        k = kind[n]
+        if k == STMTS:
+            node = Stmts([nodes[i] for i in extra[a[n]:a[n] + b[n]]])
+        elif k == IF:
+            node = IfStmt(nodes[a[n]], nodes[b[n]], None if c[n] < 0 else nodes[c[n]], None if line[n] < 0 else line[n])
+        elif k == WHILE:
+            node = WhileStmt(nodes[a[n]], nodes[b[n]], None if line[n] < 0 else line[n])
+        elif k == FOR:
+            init, cond, update, body = (nodes[i] for i in extra[a[n]:a[n] + 4])
+            node = ForStmt(init, cond, update, body, None if line[n] < 0 else line[n])
+        elif k == RETURN:
+            node = ReturnStmt(nodes[a[n]], None if line[n] < 0 else line[n])
+        elif k == ASSIGN:
+            node = AssignStmt(pool[a[n]], nodes[b[n]], None if line[n] < 0 else line[n])
+        elif k == PRINT:
+            node = PrintStmt([nodes[i] for i in extra[a[n]:a[n] + b[n]]], None if line[n] < 0 else line[n])
+        elif k == BINARY:
+            node = BinaryExpr(pool[c[n]], nodes[a[n]], nodes[b[n]])
+        elif k == UNARY:
+            node = UnaryOp(nodes[a[n]], pool[c[n]])
+        elif k == CALL:
+            node = FunctionCallExpr(pool[c[n]], [nodes[i] for i in extra[a[n]:a[n] + b[n]]],
+                                    None if line[n] < 0 else line[n])
+        elif k == INT:
+            node = IntLitExpr(pool[c[n]], pool[a[n]])
+        elif k == FLOAT:
+            node = FloatExpr(pool[c[n]], pool[a[n]])
+        elif k == BOOL:
+            node = BoolExpr(pool[c[n]])
+        elif k == STRING:
+            node = StringExpr(pool[c[n]])
+        else:
+            node = IDExpr(pool[c[n]])
+        nodes.append(node)
+    return Program([FunctionDef(f.t, f.id, Param(list(f.params)),
+                                Declarations([Declaration(t, id) for t, id in f.decls]),
+                                nodes[f.stmts], f.line)
+                    for f in arena.functions])
+
+
+def from_tree(program: Program) -> Arena:
+    """
+    An Arena of a program made of sluc_ast nodes. Quickened and inlined nodes
+    go in as the generic nodes they stand for, SaveExprs can't go in.
+    """
+    build = Builder()
+    functions = []
+    for func in program.funcs:
+        done = {}  # id of node -> index in the arena
+        stack = [(func.stmts, False)]
+        while stack:
+            node, visited = stack.pop()
+            if not visited:
+                stack.append((node, True))
+                kids = node.args if isinstance(node, FunctionCallExpr) else node.children()
+                stack.extend((child, False) for child in reversed(kids))
+                continue
+            if isinstance(node, Stmts):
+                n = build.Stmts([done[id(s)] for s in node.stmts])
+            elif isinstance(node, IfStmt):
+                n = build.IfStmt(done[id(node.expr)], done[id(node.stmt)],
+                                 None if node.elseStmt is None else done[id(node.elseStmt)], node.line)
+            elif isinstance(node, ForStmt):
+                n = build.ForStmt(done[id(node.init)], done[id(node.expr)], done[id(node.update)],
+                                  done[id(node.stmt)], node.line)
+            elif isinstance(node, WhileStmt):
+                n = build.WhileStmt(done[id(node.expr)], done[id(node.stmt)], node.line)
+            elif isinstance(node, ReturnStmt):
+                n = build.ReturnStmt(done[id(node.expr)], node.line)
+            elif isinstance(node, AssignStmt):
+                n = build.AssignStmt(node.id, done[id(node.expr)], node.line)
+            elif isinstance(node, PrintStmt):
+                n = build.PrintStmt([done[id(arg)] for arg in node.printarg], node.line)
+            elif isinstance(node, BinaryExpr):
+                n = build.BinaryExpr(node.operator, done[id(node.left)], done[id(node.right)])
+            elif isinstance(node, UnaryOp):
+                n = build.UnaryOp(done[id(node.tree)], node.sign)
+            elif isinstance(node, FunctionCallExpr):
+                n = build.FunctionCallExpr(node.id, [done[id(arg)] for arg in node.args], node.line)
+            elif isinstance(node, IDExpr):
+                n = build.IDExpr(node.boo)
+            elif isinstance(node, IntLitExpr):
+                n = build.IntLitExpr(node.boo, node.value)
+            elif isinstance(node, FloatExpr):
+                n = build.FloatExpr(node.boo, node.value)
+            elif isinstance(node, BoolExpr):
+                n = build.BoolExpr(node.boo)
+            elif isinstance(node, StringExpr):
+                n = build.StringExpr(node.boo)
+            else:
+                raise ValueError("{0} can't be stored in an Arena".format(type(node).__name__))
+            done[id(node)] = n
+        functions.append(build.FunctionDef(func.t, func.id, list(func.params.params),
+                                           [(d.typ, d.id) for d in func.decls.decls], done[id(func.stmts)],
+                                           func.line))
+    return build.Program(functions)
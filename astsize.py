@@ -0,0 +1,71 @@
+"""
+SLU-C AST size
+Generates a program with about N AST nodes, parses it and reports how many
+bytes the parsed tree takes per node, measured with tracemalloc.
+
+  astsize.py [N]            N defaults to 1000000
+  astsize.py --arena [N]    the same program parsed into an arena.Arena
+
+Lexing and parsing are both measured but the tokens are dropped before the
+size is read, so what is counted is what the tree keeps alive, including
+the identifier and literal strings it shares with the tokens.
+"""
+import sys
+import tracemalloc
+
+from lexer import Lexer
+from arena import Arena, Builder
+from parser import Parser, Tree
+
+# one statement of the generated program and how many AST nodes it parses into
+STATEMENT = "    {0} = ({1} + {2}) * {3} - {4} / 7 + {5};\n"
+STATEMENT_NODES = 12
+NAMES = ["alpha", "beta", "gamma", "delta", "epsilon", "zeta", "eta", "theta"]
+
+
+def generate(nodes: int) -> str:
+    # a main that declares NAMES and assigns them over and over
+    out = ["int main() {\n"]
+    out.extend("    int {0};\n".format(name) for name in NAMES)
+    for i in range(max(1, nodes // STATEMENT_NODES)):
+        names = [NAMES[(i + k) % len(NAMES)] for k in range(5)]
+        out.append(STATEMENT.format(names[0], names[1], names[2], names[3], names[4], i))
+    out.append("}\n")
+    return "".join(out)
+
+
+def count(program) -> int:
+    # nodes reachable through children(), walked without recursion
+    if isinstance(program, Arena):
+        return len(program)
+    n = 0
+    stack = list(program.children())
+    while stack:
+        node = stack.pop()
+        n += 1
+        stack.extend(node.children())
+    return n
+
+
+def measure(source: str, arena: bool = False):
+    """
+    Returns the number of nodes and the bytes the tree, or the arena, takes
+    """
+    tracemalloc.start()
+    lexer = Lexer.from_source(source)
+    tokens = list(lexer.token_generator())
+    program = Parser(None, tokens=tokens, build=Builder() if arena else Tree).program()
+    del tokens, lexer
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return count(program), size
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]
+    arena = "--arena" in args
+    if arena:
+        args.remove("--arena")
+    want = int(args[0]) if args else 1000000
+    nodes, size = measure(generate(want), arena)
+    print("{0} nodes, {1:.1f} MB, {2:.1f} bytes per node".format(nodes, size / 2 ** 20, size / nodes))
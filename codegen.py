@@ -0,0 +1,672 @@
+"""
+SLU-C to C code generator
+Turns a type checked Program into a C translation unit, builds it with the
+system C compiler and caches the executable by the hash of the C source.
+
+Only programs where every value keeps its declared type can be compiled, for
+example an int variable must only ever be assigned int expressions, because
+the C variables are typed while the interpreter's are not. For the same
+reason a local must be assigned before anything can read it: the
+interpreter reads it as None, which no C variable holds.
+"""
+import contextlib
+import hashlib
+import io
+import os
+import subprocess
+import sys
+import tempfile
+from typing import List, Optional, Tuple
+
+from sluc_ast import *
+
+
+# C type for each SLU-C type
+CTYPES = {"int": "long long", "float": "double", "bool": "int"}
+
+# helpers every translation unit starts with. They give the C code Python's
+# semantics for %, / and printing, and stop the program on errors the
+# interpreter would raise on (division by zero, int overflow)
+PRELUDE = r"""#include <limits.h>
+#include <math.h>
+#include <stdio.h>
+#include <stdlib.h>
+#include <string.h>
+
+static void slu_fail(const char *msg) {
+    fflush(stdout);
+    fprintf(stderr, "%s\n", msg);
+    exit(1);
+}
+
+static long long slu_add(long long a, long long b) {
+    long long r;
+    if (__builtin_add_overflow(a, b, &r)) slu_fail("OverflowError: int too large for the C backend");
+    return r;
+}
+
+static long long slu_sub(long long a, long long b) {
+    long long r;
+    if (__builtin_sub_overflow(a, b, &r)) slu_fail("OverflowError: int too large for the C backend");
+    return r;
+}
+
+static long long slu_mul(long long a, long long b) {
+    long long r;
+    if (__builtin_mul_overflow(a, b, &r)) slu_fail("OverflowError: int too large for the C backend");
+    return r;
+}
+
+static long long slu_mod(long long a, long long b) {
+    long long r;
+    if (b == 0) slu_fail("ZeroDivisionError: integer modulo by zero");
+    r = a % b;
+    if (r != 0 && ((r < 0) != (b < 0))) r += b;
+    return r;
+}
+
+static double slu_div(double a, double b) {
+    if (b == 0.0) slu_fail("ZeroDivisionError: division by zero");
+    return a / b;
+}
+
+/* Python words float division by zero differently from int division */
+static double slu_fdiv(double a, double b) {
+    if (b == 0.0) slu_fail("ZeroDivisionError: float division by zero");
+    return a / b;
+}
+
+static double slu_fmod(double a, double b) {
+    double r;
+    if (b == 0.0) slu_fail("ZeroDivisionError: float modulo");
+    r = fmod(a, b);
+    if (r != 0.0) {
+        if ((r < 0) != (b < 0)) r += b;
+    } else {
+        r = copysign(0.0, b);
+    }
+    return r;
+}
+
+static long long slu_abs(long long a) {
+    if (a == LLONG_MIN) slu_fail("OverflowError: int too large for the C backend");
+    return a < 0 ? -a : a;
+}
+
+/* min and max return the first argument when the two are equal, like Python's */
+static long long slu_min(long long a, long long b) {
+    return b < a ? b : a;
+}
+
+static double slu_fmin(double a, double b) {
+    return b < a ? b : a;
+}
+
+static long long slu_max(long long a, long long b) {
+    return b > a ? b : a;
+}
+
+static double slu_fmax(double a, double b) {
+    return b > a ? b : a;
+}
+
+static double slu_pow(double a, double b) {
+    double r;
+    if (a == 0.0 && b < 0.0) slu_fail("ValueError: math domain error");
+    if (a < 0.0 && isfinite(a) && isfinite(b) && b != floor(b)) slu_fail("ValueError: math domain error");
+    r = pow(a, b);
+    if (isinf(r) && isfinite(a) && isfinite(b)) slu_fail("OverflowError: math range error");
+    return r;
+}
+
+static double slu_sqrt(double a) {
+    if (a < 0.0) slu_fail("ValueError: math domain error");
+    return sqrt(a);
+}
+
+static long long slu_floor(double a) {
+    if (isnan(a)) slu_fail("ValueError: cannot convert float NaN to integer");
+    if (isinf(a)) slu_fail("OverflowError: cannot convert float infinity to integer");
+    a = floor(a);
+    if (a < -9223372036854775808.0 || a >= 9223372036854775808.0)
+        slu_fail("OverflowError: int too large for the C backend");
+    return (long long)a;
+}
+
+static long long slu_floordiv(long long a, long long b) {
+    long long q;
+    if (b == 0) slu_fail("ZeroDivisionError: integer division or modulo by zero");
+    if (a == LLONG_MIN && b == -1) slu_fail("OverflowError: int too large for the C backend");
+    q = a / b;
+    if (a % b != 0 && ((a < 0) != (b < 0))) q--;
+    return q;
+}
+
+static void slu_print_int(long long x) {
+    printf("%lld\n", x);
+}
+
+static void slu_print_bool(int x) {
+    puts(x ? "True" : "False");
+}
+
+/* prints a double the way Python's repr does: the shortest digits that
+   read back as the same double, in exponent form below 1e-4 or from 1e16 */
+static void slu_print_float(double x) {
+    char buf[64], digits[32];
+    char *e, *c;
+    int p, n = 0, exp, i;
+    if (isnan(x)) { puts("nan"); return; }
+    if (isinf(x)) { puts(x < 0 ? "-inf" : "inf"); return; }
+    for (p = 1; p <= 17; p++) {
+        snprintf(buf, sizeof buf, "%.*e", p - 1, x);
+        if (strtod(buf, NULL) == x) break;
+    }
+    e = strchr(buf, 'e');
+    exp = atoi(e + 1);
+    *e = '\0';
+    for (c = buf; *c; c++) {
+        if (*c >= '0' && *c <= '9') digits[n++] = *c;
+    }
+    while (n > 1 && digits[n - 1] == '0') n--;
+    digits[n] = '\0';
+    if (buf[0] == '-') putchar('-');
+    if (exp >= 16 || exp < -4) {
+        putchar(digits[0]);
+        if (n > 1) printf(".%s", digits + 1);
+        printf("e%c%02d\n", exp < 0 ? '-' : '+', exp < 0 ? -exp : exp);
+    } else if (exp < 0) {
+        fputs("0.", stdout);
+        for (i = 0; i < -exp - 1; i++) putchar('0');
+        printf("%s\n", digits);
+    } else {
+        for (i = 0; i <= exp; i++) putchar(i < n ? digits[i] : '0');
+        putchar('.');
+        if (n > exp + 1) printf("%s\n", digits + exp + 1);
+        else puts("0");
+    }
+}
+"""
+
+# how the C code for each operator is built from the C code of its operands
+INT_OPS = {"+": "slu_add({0}, {1})", "-": "slu_sub({0}, {1})", "*": "slu_mul({0}, {1})",
+           "%": "slu_mod({0}, {1})", "/": "slu_div((double)({0}), (double)({1}))"}
+FLOAT_OPS = {"+": "({0} + {1})", "-": "({0} - {1})", "*": "({0} * {1})",
+             "%": "slu_fmod({0}, {1})", "/": "slu_fdiv({0}, {1})"}
+COMPARE_OPS = {"<", "<=", ">", ">=", "==", "!="}
+
+# C helper for each of the standard builtins when its arguments are ints and
+# when they are floats, None where the builtin doesn't take that
+C_BUILTINS = {"abs": ("slu_abs", "fabs"), "min": ("slu_min", "slu_fmin"), "max": ("slu_max", "slu_fmax"),
+              "pow": (None, "slu_pow"), "sqrt": (None, "slu_sqrt"), "floor": (None, "slu_floor"),
+              "div": ("slu_floordiv", None)}
+
+
+class CGenerator:
+    """
+    Builds the C source for a Program. Every SLU-C function becomes a C function
+    and every print argument becomes a call to one of the slu_print_ helpers.
+    """
+
+    def __init__(self, program: Program):
+        self.program = program
+        self.funcs = {}  # id -> FunctionDef, the first one wins just like FunctionCallExpr.eval
+        for func in program.funcs:
+            if func.id not in self.funcs:
+                self.funcs[func.id] = func
+        self.lines = []
+        self.labels = 0
+        self.locals = set()  # locals of the function being generated, see flow
+
+    def generate(self) -> str:
+        self.lines = [PRELUDE]
+        for func in self.program.funcs:
+            self.lines.append(self.signature(func) + ";")
+        self.lines.append("")
+        for func in self.program.funcs:
+            self.function(func)
+        self.lines.append("int main(void) {")
+        self.lines.append("    {0}();".format(self.cfunc(self.program.funcs[0].id)))
+        self.lines.append("    return 0;")
+        self.lines.append("}")
+        return "\n".join(self.lines) + "\n"
+
+    @staticmethod
+    def cname(id: str) -> str:
+        # prefixed so SLU-C names can't clash with C keywords or our helpers
+        return "v_" + id
+
+    @staticmethod
+    def cfunc(id: str) -> str:
+        return "f_" + id
+
+    def signature(self, func: FunctionDef) -> str:
+        params = ", ".join("{0} {1}".format(self.ctype(t), self.cname(id)) for t, id in func.params.params)
+        return "static {0} {1}({2})".format(self.ctype(func.t), self.cfunc(func.id), params or "void")
+
+    @staticmethod
+    def ctype(t: str) -> str:
+        if t not in CTYPES:
+            raise SLUCCodegenError("ERROR: type {0} is not supported by the C backend".format(t))
+        return CTYPES[t]
+
+    def emit(self, depth: int, line: str):
+        self.lines.append("    " * depth + line)
+
+    def function(self, func: FunctionDef):
+        types = {**func.params.buildDict(), **func.decls.buildDict()}
+        self.locals = {decl.id for decl in func.decls.decls} - set(func.params.buildDict())
+        # what is assigned where the body ends is what the type check after it reads with
+        assigned = self.flow(func.stmts, set(), func)
+        for expr in self.typechecked(func.stmts):
+            assigned = self.reads(expr, assigned, func)
+        self.lines.append(self.signature(func) + " {")
+        for decl in func.decls.decls:
+            self.emit(1, "{0} {1} = 0;".format(self.ctype(decl.typ), self.cname(decl.id)))
+        self.emit(1, "{0} ret = 0;".format(self.ctype(func.t)))
+        self.stmts(func.stmts, types, func, 1, top=True)
+        self.emit(0, "done: ;")
+        # FunctionDef.eval type checks after running the body and that evaluates the
+        # assignments again, which can print or fail, so do the same here
+        for expr in self.typechecked(func.stmts):
+            self.emit(1, "(void)({0});".format(self.expr(expr, types)[0]))
+        self.emit(1, "return ret;")
+        self.lines.append("}")
+        self.lines.append("")
+
+    def flow(self, stmt, assigned: set, func: FunctionDef) -> set:
+        """
+        The locals assigned once stmt has run, given the ones assigned before
+        it. Raises SLUCCodegenError if stmt may read a local before that.
+        """
+        if isinstance(stmt, Stmts):
+            for s in stmt.stmts:
+                assigned = self.flow(s, assigned, func)
+                if type(s) == ReturnStmt:
+                    # the rest of the Stmts doesn't run
+                    break
+            return assigned
+        if isinstance(stmt, AssignStmt):
+            return self.reads(stmt.expr, assigned, func) | {stmt.id}
+        if isinstance(stmt, IfStmt):
+            assigned = self.reads(stmt.expr, assigned, func)
+            then = self.flow(stmt.stmt, assigned, func)
+            other = assigned if stmt.elseStmt is None else self.flow(stmt.elseStmt, assigned, func)
+            return then & other
+        if isinstance(stmt, ForStmt):
+            assigned = self.reads(stmt.expr, self.flow(stmt.init, assigned, func), func)
+            self.flow(stmt.update, self.flow(stmt.stmt, assigned, func), func)
+            return assigned
+        if isinstance(stmt, WhileStmt):
+            # the body may not run at all
+            assigned = self.reads(stmt.expr, assigned, func)
+            self.flow(stmt.stmt, assigned, func)
+            return assigned
+        if isinstance(stmt, PrintStmt):
+            for arg in stmt.printarg:
+                assigned = self.reads(arg, assigned, func)
+            return assigned
+        if isinstance(stmt, ReturnStmt):
+            return self.reads(stmt.expr, assigned, func)
+        if isinstance(stmt, Expr):
+            return self.reads(stmt, assigned, func)
+        return assigned
+
+    def reads(self, expr: Expr, assigned: set, func: FunctionDef) -> set:
+        # flow for an expression, which only assigns the temporaries of SaveExprs
+        if isinstance(expr, IDExpr):
+            if expr.boo in self.locals and expr.boo not in assigned:
+                raise SLUCCodegenError("ERROR: {0} may be read before it is assigned in {1}, the C backend "
+                                       "can't hold the None the interpreter reads".format(expr.boo, func.id))
+            return assigned
+        if isinstance(expr, SaveExpr):
+            return self.reads(expr.expr, assigned, func) | {expr.temp}
+        if isinstance(expr, BinaryExpr) and expr.operator in {"&&", "||"}:
+            # the right side may not be evaluated
+            assigned = self.reads(expr.left, assigned, func)
+            self.reads(expr.right, assigned, func)
+            return assigned
+        # an inlined call has the body it was given among its children, the call is compiled as it was
+        for child in (expr.args if isinstance(expr, FunctionCallExpr) else expr.children()):
+            assigned = self.reads(child, assigned, func)
+        return assigned
+
+    @staticmethod
+    def typechecked(stmts: Stmts) -> List[Expr]:
+        # right hand sides Stmts.typecheck evaluates in order, it only goes into nested Stmts
+        exprs = []
+        todo = [iter(stmts.stmts)]
+        while todo:
+            stmt = next(todo[-1], None)
+            if stmt is None:
+                todo.pop()
+            elif isinstance(stmt, AssignStmt):
+                exprs.append(stmt.expr)
+            elif isinstance(stmt, Stmts):
+                todo.append(iter(stmt.stmts))
+        return exprs
+
+    @staticmethod
+    def returns(func: FunctionDef) -> bool:
+        # only a return directly in the function body ends the function
+        return any(type(stmt) == ReturnStmt for stmt in func.stmts.stmts)
+
+    def stmts(self, stmts: Stmts, types, func, depth, top=False):
+        """
+        Statements  →  { Statement }
+        A return directly in a Stmts stops that Stmts, which only ends the function
+        for the function's own body.
+        """
+        label = None
+        self.emit(depth, "{")
+        for stmt in stmts.stmts:
+            if type(stmt) == ReturnStmt:
+                code, t = self.expr(stmt.expr, types)
+                if top:
+                    self.expect(t, func.t, "return value of {0}".format(func.id))
+                    self.emit(depth + 1, "ret = {0};".format(code))
+                    self.emit(depth + 1, "goto done;")
+                else:
+                    if label is None:
+                        self.labels += 1
+                        label = "end{0}".format(self.labels)
+                    self.emit(depth + 1, "(void)({0});".format(code))
+                    self.emit(depth + 1, "goto {0};".format(label))
+            else:
+                self.stmt(stmt, types, func, depth + 1)
+        if label is not None:
+            self.emit(depth + 1, "{0}: ;".format(label))
+        self.emit(depth, "}")
+
+    def stmt(self, stmt, types, func, depth):
+        if isinstance(stmt, Stmts):
+            self.stmts(stmt, types, func, depth)
+        elif isinstance(stmt, AssignStmt):
+            if stmt.id not in types:
+                raise SLUCCodegenError("ERROR: {0} is not declared in {1}".format(stmt.id, func.id))
+            code, t = self.expr(stmt.expr, types)
+            self.expect(t, types[stmt.id], "assignment to {0}".format(stmt.id))
+            self.emit(depth, "{0} = {1};".format(self.cname(stmt.id), code))
+        elif isinstance(stmt, IfStmt):
+            # always braced so an else can't end up on a nested if
+            self.emit(depth, "if ({0}) {{".format(self.condition(stmt.expr, types)))
+            self.stmt(stmt.stmt, types, func, depth + 1)
+            if stmt.elseStmt is not None:
+                self.emit(depth, "} else {")
+                self.stmt(stmt.elseStmt, types, func, depth + 1)
+            self.emit(depth, "}")
+        elif isinstance(stmt, ForStmt):
+            self.stmt(stmt.init, types, func, depth)
+            self.emit(depth, "while ({0}) {{".format(self.condition(stmt.expr, types)))
+            self.stmt(stmt.stmt, types, func, depth + 1)
+            self.stmt(stmt.update, types, func, depth + 1)
+            self.emit(depth, "}")
+        elif isinstance(stmt, WhileStmt):
+            self.emit(depth, "while ({0}) {{".format(self.condition(stmt.expr, types)))
+            self.stmt(stmt.stmt, types, func, depth + 1)
+            self.emit(depth, "}")
+        elif isinstance(stmt, PrintStmt):
+            self.emit(depth, "{")
+            for arg in stmt.printarg:
+                self.printarg(arg, types, depth + 1)
+            self.emit(depth, "}")
+        elif isinstance(stmt, ReturnStmt):
+            # not directly in a Stmts, so the interpreter evaluates it and moves on
+            self.emit(depth, "(void)({0});".format(self.expr(stmt.expr, types)[0]))
+        elif isinstance(stmt, StringExpr):
+            self.emit(depth, ";")
+        elif isinstance(stmt, Expr):
+            self.emit(depth, "(void)({0});".format(self.expr(stmt, types)[0]))
+        else:
+            raise SLUCCodegenError("ERROR: {0} is not supported by the C backend".format(type(stmt).__name__))
+
+    def condition(self, expr: Expr, types) -> str:
+        code, t = self.expr(expr, types)
+        if t == "str":
+            raise SLUCCodegenError("ERROR: a string can't be used as a condition in the C backend")
+        return code
+
+    def printarg(self, arg: Expr, types, depth):
+        if isinstance(arg, StringExpr):
+            self.emit(depth, "puts({0});".format(cstring(arg.boo[1:-1])))
+            return
+        code, t = self.expr(arg, types)
+        if self.calls(arg):
+            # PrintStmt.eval evaluates each argument twice
+            self.emit(depth, "(void)({0});".format(code))
+        self.emit(depth, "slu_print_{0}({1});".format(t, code))
+
+    @staticmethod
+    def calls(expr: Expr) -> bool:
+        todo = [expr]
+        while todo:
+            node = todo.pop()
+            if isinstance(node, FunctionCallExpr):
+                return True
+            todo.extend(node.children())
+        return False
+
+    def builtin(self, expr: FunctionCallExpr, types) -> Tuple[str, str]:
+        # a call to one of the standard builtins, the typed C variables only allow
+        # the arguments all being ints or all being floats
+        builtin = BUILTINS[expr.id]
+        if expr.id not in C_BUILTINS or builtin is not STANDARD_BUILTINS[expr.id]:
+            raise SLUCCodegenError("ERROR: builtin {0} is not supported by the C backend".format(expr.id))
+        if len(expr.args) != len(builtin.params):
+            raise SLUCCodegenError("ERROR: {0} takes {1} arguments".format(expr.id, len(builtin.params)))
+        args = [self.expr(arg, types) for arg in expr.args]
+        arg_types = {t for code, t in args}
+        if len(arg_types) != 1 or arg_types - {"int", "float"}:
+            raise SLUCCodegenError("ERROR: the arguments of {0} must all be int or all be float for the C backend"
+                                   .format(expr.id))
+        t = arg_types.pop()
+        if expr.id == "floor" and t == "int":
+            # math.floor gives an int back as it is
+            return args[0][0], "int"
+        helper = C_BUILTINS[expr.id][t == "float"]
+        if helper is None:
+            # an int is a float to pow and sqrt, div takes ints only
+            if expr.id == "div":
+                raise SLUCCodegenError("ERROR: the arguments of div must be int for the C backend")
+            helper = C_BUILTINS[expr.id][1]
+            args = [("(double)({0})".format(code), "float") for code, at in args]
+        returns = builtin.returns if builtin.returns != "num" else t
+        return "{0}({1})".format(helper, ", ".join(code for code, at in args)), returns
+
+    @staticmethod
+    def expect(got: str, want: str, what: str):
+        if got != want:
+            raise SLUCCodegenError("ERROR: {0} is {1} but must be {2} for the C backend".format(what, got, want))
+
+    def expr(self, expr: Expr, types) -> Tuple[str, str]:
+        """
+        C code for an expression together with its SLU-C type
+        """
+        if isinstance(expr, BinaryExpr):
+            left, lt = self.expr(expr.left, types)
+            right, rt = self.expr(expr.right, types)
+            op = expr.operator
+            if op in {"&&", "||"}:
+                if lt != "bool" or rt != "bool":
+                    raise SLUCInvalidTypeError("ERROR: Type Error")
+                return "({0} {1} {2})".format(left, op, right), "bool"
+            if "bool" in {lt, rt} and lt != rt:
+                raise SLUCInvalidTypeError("ERROR: Type Error")
+            if "str" in {lt, rt}:
+                raise SLUCCodegenError("ERROR: strings can only be printed in the C backend")
+            if op in COMPARE_OPS:
+                return "({0} {1} {2})".format(left, op, right), "bool"
+            if lt == "bool":
+                raise SLUCInvalidTypeError("ERROR: Type Error")
+            if lt == "int" and rt == "int":
+                return INT_OPS[op].format(left, right), ("float" if op == "/" else "int")
+            return FLOAT_OPS[op].format(left, right), "float"
+        if isinstance(expr, UnaryOp):
+            code, t = self.expr(expr.tree, types)
+            if expr.sign == "!":
+                return "(!{0})".format(code), "bool"
+            if t == "int":
+                return "slu_sub(0, {0})".format(code), "int"
+            if t == "float":
+                return "(-{0})".format(code), "float"
+            raise SLUCInvalidTypeError("ERROR: Type Error")
+        if isinstance(expr, FunctionCallExpr) and expr.id in BUILTINS:
+            return self.builtin(expr, types)
+        if isinstance(expr, FunctionCallExpr):
+            func = self.funcs.get(expr.id)
+            if func is None:
+                raise SLUCCodegenError("ERROR: function {0} is not defined".format(expr.id))
+            if len(expr.args) != len(func.params.params):
+                raise SLUCCodegenError("ERROR: {0} takes {1} arguments".format(expr.id, len(func.params.params)))
+            if not self.returns(func):
+                raise SLUCCodegenError("ERROR: {0} has no return in its body so its value can't be used".format(
+                    expr.id))
+            args = []
+            for arg, (t, id) in zip(expr.args, func.params.params):
+                code, at = self.expr(arg, types)
+                self.expect(at, t, "argument {0} of {1}".format(id, expr.id))
+                args.append(code)
+            return "{0}({1})".format(self.cfunc(expr.id), ", ".join(args)), func.t
+        if isinstance(expr, SaveExpr):
+            code, t = self.expr(expr.expr, types)
+            return "({0} = {1})".format(self.cname(expr.temp), code), t
+        if isinstance(expr, IDExpr):
+            if expr.boo not in types:
+                raise SLUCCodegenError("ERROR: {0} is not a variable".format(expr.boo))
+            return self.cname(expr.boo), types[expr.boo]
+        if isinstance(expr, IntLitExpr):
+            if expr.value >= 2 ** 63:
+                raise SLUCCodegenError("ERROR: {0} is too large for the C backend".format(expr.boo))
+            return "{0}LL".format(expr.value), "int"
+        if isinstance(expr, FloatExpr):
+            if expr.value == float("inf"):
+                return "INFINITY", "float"
+            return repr(expr.value), "float"
+        if isinstance(expr, BoolExpr):
+            return ("1" if expr.boo == "true" else "0"), "bool"
+        if isinstance(expr, StringExpr):
+            return cstring(expr.boo[1:-1]), "str"
+        raise SLUCCodegenError("ERROR: {0} is not supported by the C backend".format(type(expr).__name__))
+
+
+def cstring(text: str) -> str:
+    # C string literal printing exactly the characters of text
+    out = []
+    for ch in text.encode("utf-8"):
+        if ch in (ord("\\"), ord('"')):
+            out.append("\\" + chr(ch))
+        elif 32 <= ch < 127 and ch != ord("?"):
+            out.append(chr(ch))
+        else:
+            out.append("\\{0:03o}".format(ch))
+    return '"' + "".join(out) + '"'
+
+
+def cache_dir() -> str:
+    return os.environ.get("SLUC_CACHE", os.path.join(os.path.expanduser("~"), ".cache", "sluc"))
+
+
+def compile_program(program: Program, cc: str = "cc", flags: Tuple[str, ...] = ("-O2",),
+                    cache: Optional[str] = None) -> str:
+    """
+    Builds a native executable for program and returns its path. Executables are
+    cached by the hash of the C source and compiler command, so an unchanged
+    program is only compiled once.
+    """
+    source = CGenerator(program).generate()
+    command = [cc, *flags]
+    key = hashlib.sha256((" ".join(command) + "\n" + source).encode("utf-8")).hexdigest()
+    cache = cache or cache_dir()
+    exe = os.path.join(cache, key)
+    if os.path.exists(exe):
+        return exe
+    os.makedirs(cache, exist_ok=True)
+    with tempfile.TemporaryDirectory(dir=cache) as tmp:
+        csrc = os.path.join(tmp, "program.c")
+        with open(csrc, "w") as f:
+            f.write(source)
+        out = os.path.join(tmp, "program")
+        try:
+            result = subprocess.run(command + ["-o", out, csrc, "-lm"], capture_output=True, text=True)
+        except OSError as err:
+            raise SLUCCodegenError("ERROR: could not run the C compiler {0}: {1}".format(cc, err))
+        if result.returncode != 0:
+            raise SLUCCodegenError("ERROR: the C compiler failed:\n{0}".format(result.stderr))
+        os.replace(out, exe)  # atomic, so another process never sees half an executable
+    return exe
+
+
+def run_native(program: Program, **options) -> Tuple[str, str, int]:
+    """
+    Compiles (or reuses) program and runs it, returning its output, what it
+    wrote to stderr (the error it stopped with, if any) and exit code
+    """
+    exe = compile_program(program, **options)
+    result = subprocess.run([exe], capture_output=True, text=True)
+    return result.stdout, result.stderr, result.returncode
+
+
+def run_interpreted(program: Program) -> Tuple[str, str]:
+    """
+    Output of Program.eval and the error it raised as "Type: message", the
+    way slu_fail writes it, or "" if it didn't raise
+    """
+    out = io.StringIO()
+    error = ""
+    with contextlib.redirect_stdout(out):
+        try:
+            program.eval()
+        except Exception as err:
+            error = "{0}: {1}\n".format(type(err).__name__, err)
+    return out.getvalue(), error
+
+
+def differential(program: Program, **options) -> Tuple[bool, str, str]:
+    """
+    Runs program natively and with Program.eval. Returns whether both printed the
+    same thing and failed (or not) with the same error, with the two outputs
+    followed by their errors.
+    """
+    native, native_error, code = run_native(program, **options)
+    interpreted, error = run_interpreted(program)
+    same = native == interpreted and native_error == error and (code != 0) == bool(error)
+    return same, native + native_error, interpreted + error
+
+
+class SLUCCodegenError(Exception):
+    def __init__(self, message: str):
+        Exception.__init__(self)
+        self.message = message
+
+    def __str__(self):
+        return self.message
+
+
+if __name__ == '__main__':
+    from parser import Parser, SLUCSyntaxError, SLUCReferenceBeforeAssignment, SLUCDuplicateReferenceError
+
+    args = sys.argv[1:]  # codegen.py file.sluc [--emit | --diff]
+    if len(args) not in {1, 2}:
+        print("usage: codegen.py file.sluc [--emit | --diff]")
+        exit()
+    try:
+        prog = Parser(args[0]).program()
+        if args[1:] == ["--emit"]:
+            print(CGenerator(prog).generate(), end="")
+        elif args[1:] == ["--diff"]:
+            same, native, interpreted = differential(prog)
+            if same:
+                print("native and interpreted output match")
+            else:
+                print("MISMATCH")
+                print("--- native\n" + native + "--- interpreted\n" + interpreted, end="")
+                sys.exit(1)
+        else:
+            native, error, code = run_native(prog)
+            print(native, end="")
+            sys.stdout.flush()
+            print(error, end="", file=sys.stderr)
+            sys.exit(code)
+    except (SLUCDuplicateReferenceError, SLUCReferenceBeforeAssignment, SLUCInvalidTypeError, SLUCSyntaxError,
+            SLUCCodegenError) as err:
+        print(err)
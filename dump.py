@@ -0,0 +1,410 @@
+#!/usr/bin/env python3
+"""
+SLU-C token and AST dumps
+Formats for other programs to read tokens and parsed programs in, written a
+large chunk at a time so that writing millions of tokens costs little next to
+lexing them. Both come as jsonl and as binary:
+
+  jsonl   a header line {"format": "tokens" or "ast", "version": 2}, then
+          one JSON array per line. A token is the tuple the lexer yields,
+          [text, kind, line, value]. An AST is its nodes children first,
+          each the arguments of the Builder method that makes it, then its
+          functions:
+
+            ["IntLitExpr","2",2]                    node 0
+            ["IDExpr","x"]                          node 1
+            ["BinaryExpr","*",0,1]                  node 2, 0 and 1 are nodes
+            ["ReturnStmt",2,3]                      3 is the line
+            ["Stmts",[3]]
+            ["FunctionDef", "int", "f", [["int", "x"]], [], 4, 1]
+
+  binary  a magic number and the version, then for tokens chunks of the
+          strings not seen before and three int32 per token, the indices of
+          its text and kind among those strings and its line. An AST is an
+          arena.Arena: its pool and functions as JSON and then its arrays.
+
+Numbers in binary are little endian. write_tokens and write_ast take a
+binary stream, read_tokens and read_ast find out which format they are
+reading:
+
+  with open("prog.tokens", "wb") as out:
+      write_tokens(Lexer("prog.sluc").token_generator(), out, "binary")
+  with open("prog.tokens", "rb") as f:
+      for tok in read_tokens(f):
+          ...
+
+Running this module prints a dump as sluc.py lex or parse would, or turns
+it into the other format.
+"""
+import argparse
+import json
+import struct
+import sys
+from array import array
+from typing import Iterable, Iterator, Union
+
+from arena import Arena, ArenaFunction, Builder, from_tree, to_tree, KIND_NAMES, STMTS, IF, WHILE, RETURN, \
+    ASSIGN, PRINT, BINARY, UNARY, CALL, FOR, INT, FLOAT
+from lexer import Lexer
+from sluc_ast import Program, unparse
+
+FORMATS = ("jsonl", "binary")
+# bumped whenever any of the formats change
+DUMP_VERSION = 2
+TOKENS_MAGIC = b"SLUCTOK"
+AST_MAGIC = b"SLUCAST"
+# tokens written at a time
+CHUNK = 1 << 14
+# bytes of jsonl read at a time
+READ_CHUNK = 1 << 20
+# JSON of at most this many different strings is kept for reuse while writing jsonl
+ENCODED_MAX = 1 << 16
+BIG_ENDIAN = sys.byteorder == "big"
+
+
+class SLUCDumpError(Exception):
+    def __init__(self, message: str):
+        Exception.__init__(self)
+        self.message = message
+
+    def __str__(self):
+        return self.message
+
+
+def little(values: array) -> array:
+    # values the way they are written, little endian
+    if BIG_ENDIAN:
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values
+
+
+def read_array(stream, typecode: str, count: int) -> array:
+    values = array(typecode)
+    data = stream.read(count * values.itemsize)
+    if len(data) != count * values.itemsize:
+        raise SLUCDumpError("ERROR: the dump ends in the middle")
+    values.frombytes(data)
+    if BIG_ENDIAN:
+        values.byteswap()
+    return values
+
+
+def header(kind: str) -> bytes:
+    return json.dumps({"format": kind, "version": DUMP_VERSION}).encode() + b"\n"
+
+
+def write_tokens(tokens: Iterable[tuple], out, format: str = "jsonl"):
+    """
+    Writes tokens as they come from Lexer.token_generator to the binary
+    stream out, in format, one of FORMATS
+    """
+    if format == "jsonl":
+        write_tokens_jsonl(tokens, out)
+    elif format == "binary":
+        write_tokens_binary(tokens, out)
+    else:
+        raise ValueError("no dump format {0}, only {1}".format(format, ", ".join(FORMATS)))
+
+
+def write_tokens_jsonl(tokens: Iterable[tuple], out):
+    out.write(header("tokens"))
+    # the same few kinds and names come over and over, so their JSON is made once
+    encoded = {}
+    lines = []
+    for text, kind, line, value in tokens:
+        a = encoded.get(text)
+        if a is None:
+            if len(encoded) >= ENCODED_MAX:
+                encoded.clear()
+            a = encoded[text] = json.dumps(text)
+        b = encoded.get(kind)
+        if b is None:
+            b = encoded[kind] = json.dumps(kind)
+        lines.append("[{0},{1},{2},{3}]\n".format(a, b, line, "null" if value is None else json.dumps(value)))
+        if len(lines) == CHUNK:
+            out.write("".join(lines).encode())
+            lines.clear()
+    out.write("".join(lines).encode())
+
+
+def write_tokens_binary(tokens: Iterable[tuple], out):
+    out.write(TOKENS_MAGIC + bytes([DUMP_VERSION]))
+    index = {}  # string -> its number, in the order they were first written
+    new = []
+    records = array("i")
+    for tok in tokens:
+        text = index.get(tok[0])
+        if text is None:
+            text = index[tok[0]] = len(index)
+            new.append(tok[0])
+        kind = index.get(tok[1])
+        if kind is None:
+            kind = index[tok[1]] = len(index)
+            new.append(tok[1])
+        records.append(text)
+        records.append(kind)
+        records.append(tok[2])
+        if len(records) == 3 * CHUNK:
+            write_chunk(out, new, records)
+            new = []
+            records = array("i")
+    if records:
+        write_chunk(out, new, records)
+
+
+def write_chunk(out, new, records: array):
+    # the strings first seen in this chunk, then the tokens
+    blobs = [s.encode() for s in new]
+    lengths = array("I", [len(blob) for blob in blobs])
+    out.write(struct.pack("<III", len(blobs), len(records) // 3, sum(lengths)))
+    out.write(little(lengths))
+    out.write(b"".join(blobs))
+    out.write(little(records))
+
+
+def read_tokens(stream) -> Iterator[tuple]:
+    """
+    The tokens in a dump write_tokens wrote to what the binary stream is
+    reading, the way Lexer.token_generator gave them
+    """
+    start = stream.read(len(TOKENS_MAGIC) + 1)
+    if start[:len(TOKENS_MAGIC)] == TOKENS_MAGIC:
+        version(start[-1])
+        return read_tokens_binary(stream)
+    check_header(start + stream.readline(), "tokens")
+    return read_tokens_jsonl(stream)
+
+
+def records(stream) -> Iterator[list]:
+    # the JSON arrays on the lines of stream, a whole chunk of lines parsed at once
+    while True:
+        lines = stream.readlines(READ_CHUNK)
+        if not lines:
+            return
+        yield from json.loads(b"[" + b",".join(lines) + b"]")
+
+
+def read_tokens_jsonl(stream) -> Iterator[tuple]:
+    intern = sys.intern
+    for text, kind, line, value in records(stream):
+        yield intern(text), intern(kind), line, value
+
+
+def read_tokens_binary(stream) -> Iterator[tuple]:
+    intern = sys.intern
+    strings = []
+    literal = {"INTLIT", "FLOAT"}
+    while True:
+        head = stream.read(12)
+        if not head:
+            return
+        if len(head) != 12:
+            raise SLUCDumpError("ERROR: the dump ends in the middle")
+        count, n, size = struct.unpack("<III", head)
+        lengths = read_array(stream, "I", count)
+        blob = stream.read(size)
+        if len(blob) != size:
+            raise SLUCDumpError("ERROR: the dump ends in the middle")
+        at = 0
+        for length in lengths:
+            strings.append(intern(blob[at:at + length].decode()))
+            at += length
+        records = read_array(stream, "i", 3 * n)
+        for i in range(0, 3 * n, 3):
+            text = strings[records[i]]
+            kind = strings[records[i + 1]]
+            # the lexer's value of a literal is worked out from its text, so it isn't written
+            yield text, kind, records[i + 2], Lexer.literal_value(text, kind) if kind in literal else None
+
+
+def write_ast(program: Union[Program, Arena], out, format: str = "jsonl"):
+    """
+    Writes program, a tree or an Arena, to the binary stream out in format,
+    one of FORMATS
+    """
+    arena = from_tree(program) if isinstance(program, Program) else program
+    if format == "jsonl":
+        write_ast_jsonl(arena, out)
+    elif format == "binary":
+        write_ast_binary(arena, out)
+    else:
+        raise ValueError("no dump format {0}, only {1}".format(format, ", ".join(FORMATS)))
+
+
+def write_ast_jsonl(arena: Arena, out):
+    out.write(header("ast"))
+    kinds, a, b, c, lines, extra = arena.kind, arena.a, arena.b, arena.c, arena.line, arena.extra
+    # names, operators and literals are each in the pool once, so each is made JSON once
+    pool = [json.dumps(value) for value in arena.pool]
+    chunk = []
+    for n in range(len(arena)):
+        k = kinds[n]
+        line = "null" if lines[n] < 0 else lines[n]
+        if k == STMTS:
+            record = '["Stmts",[{0}]]'.format(",".join(map(str, extra[a[n]:a[n] + b[n]])))
+        elif k == IF:
+            record = '["IfStmt",{0},{1},{2},{3}]'.format(a[n], b[n], "null" if c[n] < 0 else c[n], line)
+        elif k == WHILE:
+            record = '["WhileStmt",{0},{1},{2}]'.format(a[n], b[n], line)
+        elif k == FOR:
+            record = '["ForStmt",{0},{1},{2},{3},{4}]'.format(*extra[a[n]:a[n] + 4], line)
+        elif k == RETURN:
+            record = '["ReturnStmt",{0},{1}]'.format(a[n], line)
+        elif k == ASSIGN:
+            record = '["AssignStmt",{0},{1},{2}]'.format(pool[a[n]], b[n], line)
+        elif k == PRINT:
+            record = '["PrintStmt",[{0}],{1}]'.format(",".join(map(str, extra[a[n]:a[n] + b[n]])), line)
+        elif k == BINARY:
+            record = '["BinaryExpr",{0},{1},{2}]'.format(pool[c[n]], a[n], b[n])
+        elif k == UNARY:
+            record = '["UnaryOp",{0},{1}]'.format(a[n], pool[c[n]])
+        elif k == CALL:
+            record = '["FunctionCallExpr",{0},[{1}],{2}]'.format(
+                pool[c[n]], ",".join(map(str, extra[a[n]:a[n] + b[n]])), line)
+        elif k == INT or k == FLOAT:
+            record = '["{0}",{1},{2}]'.format(KIND_NAMES[k], pool[c[n]], pool[a[n]])
+        else:
+            record = '["{0}",{1}]'.format(KIND_NAMES[k], pool[c[n]])
+        chunk.append(record)
+        if len(chunk) == CHUNK:
+            chunk.append("")
+            out.write("\n".join(chunk).encode())
+            chunk = []
+    for f in arena.functions:
+        chunk.append(json.dumps(["FunctionDef", f.t, f.id, f.params, f.decls, f.stmts, f.line]))
+    chunk.append("")
+    out.write("\n".join(chunk).encode())
+
+
+def write_ast_binary(arena: Arena, out):
+    out.write(AST_MAGIC + bytes([DUMP_VERSION]))
+    info = json.dumps({"nodes": len(arena), "extra": len(arena.extra), "pool": arena.pool,
+                       "functions": [[f.t, f.id, f.params, f.decls, f.stmts, f.line] for f in arena.functions]})
+    info = info.encode()
+    out.write(struct.pack("<I", len(info)))
+    out.write(info)
+    for values in (arena.kind, arena.a, arena.b, arena.c, arena.line, arena.extra):
+        out.write(little(values))
+
+
+def read_ast(stream) -> Arena:
+    """
+    The program in a dump write_ast wrote to what the binary stream is
+    reading, arena.to_tree makes it a tree
+    """
+    start = stream.read(len(AST_MAGIC) + 1)
+    if start[:len(AST_MAGIC)] == AST_MAGIC:
+        version(start[-1])
+        return read_ast_binary(stream)
+    check_header(start + stream.readline(), "ast")
+    return read_ast_jsonl(stream)
+
+
+def read_ast_jsonl(stream) -> Arena:
+    build = Builder()
+    # the node made for each record, they are numbered in the order they come
+    nodes = []
+    functions = []
+    for record in records(stream):
+        name = record[0]
+        if name == "FunctionDef":
+            t, id, params, decls, stmts, line = record[1:]
+            functions.append(build.FunctionDef(t, id, build.Param([tuple(p) for p in params]),
+                                               build.Declarations([build.Declaration(*d) for d in decls]),
+                                               nodes[stmts], line))
+        elif name == "Stmts":
+            nodes.append(build.Stmts([nodes[i] for i in record[1]]))
+        elif name == "IfStmt":
+            nodes.append(build.IfStmt(nodes[record[1]], nodes[record[2]],
+                                      None if record[3] is None else nodes[record[3]], record[4]))
+        elif name == "WhileStmt":
+            nodes.append(build.WhileStmt(nodes[record[1]], nodes[record[2]], record[3]))
+        elif name == "ForStmt":
+            nodes.append(build.ForStmt(*[nodes[i] for i in record[1:5]], record[5]))
+        elif name == "ReturnStmt":
+            nodes.append(build.ReturnStmt(nodes[record[1]], record[2]))
+        elif name == "AssignStmt":
+            nodes.append(build.AssignStmt(record[1], nodes[record[2]], record[3]))
+        elif name == "PrintStmt":
+            nodes.append(build.PrintStmt([nodes[i] for i in record[1]], record[2]))
+        elif name == "BinaryExpr":
+            nodes.append(build.BinaryExpr(record[1], nodes[record[2]], nodes[record[3]]))
+        elif name == "UnaryOp":
+            nodes.append(build.UnaryOp(nodes[record[1]], record[2]))
+        elif name == "FunctionCallExpr":
+            nodes.append(build.FunctionCallExpr(record[1], [nodes[i] for i in record[2]], record[3]))
+        elif name in ("IntLitExpr", "FloatExpr", "BoolExpr", "StringExpr", "IDExpr"):
+            nodes.append(getattr(build, name)(*record[1:]))
+        else:
+            raise SLUCDumpError("ERROR: {0} is not a node".format(name))
+    return build.Program(functions)
+
+
+def read_ast_binary(stream) -> Arena:
+    head = stream.read(4)
+    if len(head) != 4:
+        raise SLUCDumpError("ERROR: the dump ends in the middle")
+    info = json.loads(stream.read(struct.unpack("<I", head)[0]))
+    arena = Arena()
+    n = info["nodes"]
+    arena.kind = read_array(stream, "b", n)
+    arena.a = read_array(stream, "i", n)
+    arena.b = read_array(stream, "i", n)
+    arena.c = read_array(stream, "i", n)
+    arena.line = read_array(stream, "i", n)
+    arena.extra = read_array(stream, "i", info["extra"])
+    arena.pool = info["pool"]
+    arena.pooled = {(type(value), value): i for i, value in enumerate(arena.pool)}
+    arena.functions = [ArenaFunction(t, id, [tuple(p) for p in params], [tuple(d) for d in decls], stmts, line)
+                       for t, id, params, decls, stmts, line in info["functions"]]
+    return arena
+
+
+def version(number: int):
+    if number != DUMP_VERSION:
+        raise SLUCDumpError("ERROR: dump version {0}, only {1} can be read".format(number, DUMP_VERSION))
+
+
+def check_header(line: bytes, kind: str):
+    try:
+        info = json.loads(line)
+    except ValueError:
+        info = None
+    if not isinstance(info, dict) or info.get("format") != kind:
+        raise SLUCDumpError("ERROR: not a dump of {0}".format("tokens" if kind == "tokens" else "a program"))
+    version(info.get("version"))
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="dump", description="print a SLU-C token or AST dump, or convert it")
+    ap.add_argument("--format", choices=("text",) + FORMATS, default="text",
+                    help="text prints it like sluc.py lex or parse, the others write that dump format")
+    ap.add_argument("file", help="a dump written by sluc.py lex or parse --format")
+    args = ap.parse_args(argv)
+    with open(args.file, "rb") as f:
+        # the magic number or the header line says which it is
+        start = f.read(len(TOKENS_MAGIC))
+        if start not in (TOKENS_MAGIC, AST_MAGIC):
+            start += f.readline()
+        tokens = start == TOKENS_MAGIC or b'"tokens"' in start
+        f.seek(0)
+        try:
+            if tokens:
+                if args.format == "text":
+                    for tok in read_tokens(f):
+                        Lexer.my_print(tok)
+                else:
+                    write_tokens(read_tokens(f), sys.stdout.buffer, args.format)
+            elif args.format == "text":
+                unparse(to_tree(read_ast(f)), sys.stdout)
+            else:
+                write_ast(read_ast(f), sys.stdout.buffer, args.format)
+        except SLUCDumpError as err:
+            print(err)
+            return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
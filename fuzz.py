@@ -0,0 +1,748 @@
+#!/usr/bin/env python3
+"""
+SLU-C differential fuzzing
+Generates random programs from the grammar in parser.py, runs each on every
+engine at every optimization level it takes and compares what they print
+and the error they stop with, if any, against Program.eval of the program
+as parsed. A program that doesn't come out the same everywhere is shrunk,
+statement by statement and expression by expression, to the smallest one
+that still doesn't, and reported:
+
+  python fuzz.py --seconds 600 --out failures
+
+Engines are the ways a program can be run: eval, generic (not quickened),
+steps (run_steps as for deep programs), paused (Program.coroutine), budget
+(with a Budget), tier and tier-osr (compiled before the first call and in
+the middle of the first loops), trace (with hooks attached), coverage, and
+native with a C compiler. The optimization levels are none, inline, cse and
+inline+cse. arena, dump (through both dump formats), reparse (unparsed
+and parsed again), lazy (bodies parsed when first called) and server
+(registered and run through SLUCServer.handle) only run programs as
+parsed. native skips programs the C backend won't compile or ints it can't
+hold.
+
+The generated programs stop by themselves, every loop counts a variable of
+its own towards a literal or a variable the loop leaves alone and functions
+only call the ones before them, but a program is first run with a Budget
+and skipped if it runs past STEP_LIMIT steps. Program n of a seed is always
+the same program, --show prints it. At the end the runs, seconds and runs
+per second of each engine and level are printed, and with --out saved as
+throughput.json next to the programs that failed.
+"""
+import argparse
+import asyncio
+import contextlib
+import io
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import time
+from typing import Callable, List, Optional, Tuple
+
+from arena import Builder, to_tree
+from dump import FORMATS, read_ast, write_ast
+from optimize import cse, inline
+from parser import Parser
+from server import CapturedStdout, SLUCServer
+from sluc_ast import *
+from sluc_coverage import instrument
+from sluc_trace import EVENTS, Hooks
+from tiering import Tiers
+
+LEVELS = ("none", "inline", "cse", "inline+cse")
+# what the others are compared against, and what is run first to see that a program stops
+REFERENCE = ("eval", "none")
+GATE = ("budget", "none")
+# loop trips and calls a generated program may take
+STEP_LIMIT = 100000
+# seconds a native executable may run
+NATIVE_TIMEOUT = 10
+
+# size of the generated programs
+MAX_FUNCTIONS = 4
+MAX_PARAMS = 3
+MAX_STMTS = 5
+MAX_DEPTH = 3
+MAX_LOOPS = 2
+MAX_EXPR_DEPTH = 3
+# chance of an expression having the wrong type, so type errors get compared too
+WRONG_TYPE = 0.005
+
+SLUC_TYPES = ("int", "float", "bool")
+# the locals of each type are these letters numbered
+LOCAL_NAMES = {"int": "n", "float": "x", "bool": "b"}
+INT_LITERALS = (0, 1, 2, 3, 5, 7, 10, 42)
+FLOAT_LITERALS = ("0.5", "1.0", "2.25", "3.5", "0.1", "10.0")
+COMPARISONS = ("<", "<=", ">", ">=", "==", "!=")
+
+
+class Unsupported(Exception):
+    """
+    An engine can't run the program at all, which isn't a difference
+    """
+
+
+class NativeError(Exception):
+    """
+    The native executable stopped with an error, it only says so on stderr,
+    as "Type: message" like outcome writes the errors of the others
+    """
+
+
+class ServerError(Exception):
+    """
+    The server answered a request with "ok": false, the message is its "error"
+    """
+
+
+class Generator:
+    """
+    One random program. Almost all of them are well typed and all of them
+    stop. Calls go where the parser takes them: as the whole right side of
+    an assignment or printed with primaries for arguments.
+    """
+
+    def __init__(self, rng: random.Random):
+        self.rng = rng
+        self.functions = []  # (name, type, param types) of the functions made so far
+
+    def program(self) -> str:
+        rng = self.rng
+        out = []
+        for i in range(rng.randint(0, MAX_FUNCTIONS)):
+            name = "f{0}".format(i)
+            t = rng.choice(SLUC_TYPES)
+            params = [rng.choice(SLUC_TYPES) for _ in range(rng.randint(0, MAX_PARAMS))]
+            out.append(self.function(name, t, params))
+            self.functions.append((name, t, params))
+        out.append(self.function("main", "int", []))
+        return "\n".join(out)
+
+    def function(self, name: str, t: str, params: List[str]) -> str:
+        rng = self.rng
+        self.types = {}  # variable -> type
+        self.readable = {typ: [] for typ in SLUC_TYPES}
+        self.frozen = set()  # what the loops being made count with or up to
+        self.counters = []  # (type, name) of the loop counters
+        self.loops = 0
+        self.returns = t
+        for i, typ in enumerate(params):
+            self.declare("p{0}".format(i), typ)
+        locals = []
+        for typ in SLUC_TYPES:
+            for i in range(rng.randint(1, 2)):
+                locals.append((typ, LOCAL_NAMES[typ] + str(i)))
+                self.declare(locals[-1][1], typ)
+        body = ["{0} = {1};".format(id, self.literal(typ)) for typ, id in locals]
+        for _ in range(rng.randint(1, MAX_STMTS)):
+            body.extend(self.stmt(0))
+        body.append("return {0};".format(self.expr(t)))
+        lines = ["{0} {1}({2}) {{".format(t, name, ", ".join("{0} p{1}".format(typ, i)
+                                                            for i, typ in enumerate(params)))]
+        lines.extend("    {0} {1};".format(typ, id) for typ, id in locals + self.counters)
+        lines.extend("    " + line for line in body)
+        lines.append("}")
+        return "\n".join(lines) + "\n"
+
+    def declare(self, id: str, t: str):
+        self.types[id] = t
+        self.readable[t].append(id)
+
+    def counter(self, t: str) -> str:
+        # a new loop counter, only readable inside its loop
+        id = "{0}{1}".format("i" if t == "int" else "u", len(self.counters))
+        self.counters.append((t, id))
+        self.types[id] = t
+        return id
+
+    def literal(self, t: str) -> str:
+        if t == "int":
+            return str(self.rng.choice(INT_LITERALS))
+        if t == "float":
+            return self.rng.choice(FLOAT_LITERALS)
+        return self.rng.choice(("true", "false"))
+
+    def leaf(self, t: str) -> str:
+        if self.readable[t] and self.rng.random() < 0.6:
+            return self.rng.choice(self.readable[t])
+        return self.literal(t)
+
+    def primary(self, t: str) -> str:
+        # what a printed call takes as an argument
+        if self.rng.random() < 0.7:
+            return self.leaf(t)
+        return "({0})".format(self.expr(t))
+
+    def expr(self, t: str, depth: int = 0, negated: bool = True) -> str:
+        # negated is whether it may be a !, && and || don't take those, see UnaryOp.typeof
+        rng = self.rng
+        if rng.random() < WRONG_TYPE:
+            t = rng.choice(SLUC_TYPES)
+        if depth >= MAX_EXPR_DEPTH or rng.random() < 0.35:
+            return self.leaf(t)
+        depth += 1
+        if t == "bool":
+            k = rng.randrange(5 if negated else 4)
+            if k < 2:
+                num = rng.choice(("int", "float"))
+                return "({0} {1} {2})".format(self.expr(num, depth), rng.choice(COMPARISONS), self.expr(num, depth))
+            if k < 4:
+                return "({0} {1} {2})".format(self.expr(t, depth, False), rng.choice(("&&", "||")),
+                                              self.expr(t, depth, False))
+            return "!({0})".format(self.expr(t, depth))
+        k = rng.randrange(6)
+        if k == 0:
+            return "-({0})".format(self.expr(t, depth))
+        if k == 1:
+            # by a small literal only, so values stay small
+            return "({0} * {1})".format(self.expr(t, depth), rng.randint(0, 3) if t == "int" else "1.5")
+        if k == 2:
+            # a literal divisor but now and then one that may be zero
+            divisor = self.expr(t, depth) if rng.random() < 0.2 else str(rng.randint(1, 7))
+            return "({0} {1} {2})".format(self.expr(t, depth), "%" if t == "int" else "/", divisor)
+        right = self.expr(rng.choice((t, "int")), depth)
+        return "({0} {1} {2})".format(self.expr(t, depth), rng.choice("+-"), right)
+
+    def callables(self, t: str) -> List[Tuple[str, List[str]]]:
+        # functions and builtins returning t, with the types to call them with
+        out = [(name, params) for name, returns, params in self.functions if returns == t]
+        for name, builtin in BUILTINS.items():
+            if builtin.returns == t or builtin.returns == "num" and t != "bool":
+                num = t if builtin.returns == "num" else self.rng.choice(("int", "float"))
+                out.append((name, [num if p == "num" else p for p in builtin.params]))
+        return out
+
+    def call(self, t: str, printed: bool = False) -> Optional[str]:
+        functions = self.callables(t)
+        if not functions:
+            return None
+        name, params = self.rng.choice(functions)
+        if name == "div" and not printed:
+            # divided by a literal, mostly
+            args = [self.expr("int"), str(self.rng.randint(1, 5))]
+        else:
+            args = [self.primary(p) if printed else self.expr(p) for p in params]
+        return "{0}({1})".format(name, ", ".join(args))
+
+    def body(self, depth: int) -> List[str]:
+        # the body of an if or a loop, a block or now and then one statement
+        if self.rng.random() < 0.2:
+            return ["    " + line for line in self.simple()]
+        return self.block(depth)
+
+    def block(self, depth: int) -> List[str]:
+        lines = ["{"]
+        for _ in range(self.rng.randint(1, MAX_STMTS - 1)):
+            lines.extend("    " + line for line in self.stmt(depth + 1))
+        lines.append("}")
+        return lines
+
+    def assignable(self) -> List[str]:
+        # loop counters are only readable inside their loops, where they are frozen
+        return [id for typ in SLUC_TYPES for id in self.readable[typ] if id not in self.frozen]
+
+    def simple(self) -> List[str]:
+        # an assignment, an assignment of a call or a print
+        rng = self.rng
+        kind = rng.choice(("assign", "assign", "call", "print"))
+        targets = self.assignable()
+        if kind == "print" or not targets:
+            args = []
+            for _ in range(rng.randint(1, 3)):
+                k = rng.random()
+                arg = None
+                if k < 0.1:
+                    arg = '"s{0}"'.format(rng.randint(0, 9))
+                elif k < 0.25:
+                    arg = self.call(rng.choice(SLUC_TYPES), True)
+                args.append(arg or self.expr(rng.choice(SLUC_TYPES)))
+            return ["print({0});".format(", ".join(args))]
+        id = rng.choice(targets)
+        value = self.call(self.types[id]) if kind == "call" else None
+        return ["{0} = {1};".format(id, value or self.expr(self.types[id]))]
+
+    def stmt(self, depth: int) -> List[str]:
+        rng = self.rng
+        kinds = ["simple"] * 6
+        if depth < MAX_DEPTH:
+            kinds += ["if", "if", "block"]
+            if self.loops < MAX_LOOPS:
+                kinds += ["while", "for", "for"]
+        if depth > 0:
+            kinds.append("return")
+        kind = rng.choice(kinds)
+        if kind == "simple":
+            return self.simple()
+        if kind == "return":
+            # only ends the block it is in
+            return ["return {0};".format(self.expr(self.returns))]
+        if kind == "block":
+            return self.block(depth)
+        if kind == "if":
+            cond = self.expr("bool")
+            if rng.random() < 0.4:
+                # with an else the then is a block, so the else can't go to an if inside it
+                then = self.block(depth)
+                other = self.body(depth)
+                return ["if ({0}) {1}".format(cond, then[0])] + then[1:-1] + ["} else " + other[0].strip()] + \
+                    other[1:]
+            then = self.body(depth)
+            return ["if ({0}) {1}".format(cond, then[0].strip())] + then[1:]
+        return self.loop(kind, depth)
+
+    def loop(self, kind: str, depth: int) -> List[str]:
+        rng = self.rng
+        self.loops += 1
+        t = "float" if kind == "for" and rng.random() < 0.1 else "int"
+        c = self.counter(t)
+        self.frozen.add(c)
+        self.readable[t].append(c)
+        if kind == "while":
+            cond = "({0} < {1})".format(c, rng.randint(0, 5))
+            if rng.random() < 0.3:
+                cond = "({0} && {1})".format(cond, self.expr("bool", 0, False))
+            body = self.block(depth)
+            self.frozen.discard(c)
+            head = ["{0} = 0;".format(c), "while ({0}) {{".format(cond)]
+            lines = head + body[1:-1] + ["    {0} = ({0} + 1);".format(c), "}"]
+        else:
+            up = rng.random() < 0.6
+            bound = None
+            if t == "int":
+                start, step = (rng.randint(0, 3), rng.randint(1, 3)) if up else (rng.randint(3, 8), rng.randint(1, 3))
+                ints = [id for id in self.assignable() if self.types[id] == "int"]
+                if ints and rng.random() < 0.2:
+                    # counts up to a variable the loop leaves alone
+                    bound = rng.choice(ints)
+                    self.frozen.add(bound)
+                else:
+                    bound = str(rng.randint(0, 6) if up else rng.randint(0, 3))
+            else:
+                start, step = ("0.5", "1.0") if up else ("3.5", "1.0")
+                bound = "3.0" if up else "0.5"
+            op = rng.choice(("<", "<=") if up else (">", ">="))
+            sign = "+" if up else "-"
+            body = self.body(depth)
+            if rng.random() < 0.1 and t == "int":
+                # the body moves the counter too, in the same direction
+                body = body[:-1] + ["    {0} = ({0} {1} 1);".format(c, sign), body[-1]] if body[0] == "{" else \
+                    ["{"] + body + ["    {0} = ({0} {1} 1);".format(c, sign), "}"]
+            self.frozen.discard(c)
+            if bound in self.types:
+                self.frozen.discard(bound)
+            lines = ["for ({0} = {1}; {0} {2} {3}; {0} = {0} {4} {5}) {6}".format(
+                c, start, op, bound, sign, step, body[0].strip())] + body[1:]
+        self.readable[t].remove(c)
+        self.loops -= 1
+        return lines
+
+
+def tree(source: str, level: str) -> Program:
+    # source parsed and optimized to level
+    program = Parser.from_source(source).program()
+    if "inline" in level:
+        inline(program)
+    if "cse" in level:
+        cse(program)
+    return program
+
+
+def run_eval(source: str, level: str):
+    tree(source, level).eval()
+
+
+def run_generic(source: str, level: str):
+    tree(source, level).eval(quicken=False)
+
+
+def run_steps(source: str, level: str):
+    program = tree(source, level)
+    program.quicken()
+    # as if it were too deep for eval
+    program.deep = True
+    program.eval()
+
+
+def run_paused(source: str, level: str):
+    for _ in tree(source, level).coroutine():
+        pass
+
+
+def run_budget(source: str, level: str):
+    tree(source, level).eval(budget=Budget(STEP_LIMIT))
+
+
+def run_tier(source: str, level: str):
+    program = tree(source, level)
+    program.eval(tiers=Tiers(program, 1))
+
+
+def run_tier_osr(source: str, level: str):
+    # main gets compiled a few trips into its first loop
+    program = tree(source, level)
+    program.eval(tiers=Tiers(program, 4))
+
+
+def ignore(*args):
+    pass
+
+
+def run_trace(source: str, level: str):
+    program = tree(source, level)
+    hooks = Hooks()
+    for event in EVENTS:
+        hooks.add(event, ignore)
+    hooks.attach(program)
+    program.eval()
+
+
+def run_coverage(source: str, level: str):
+    program = tree(source, level)
+    instrument(program, "<fuzz>")
+    program.eval()
+
+
+def run_arena(source: str, level: str):
+    Parser.from_source(source, build=Builder()).program().eval()
+
+
+def run_dump(source: str, level: str):
+    arena = Parser.from_source(source, build=Builder()).program()
+    for format in FORMATS:
+        out = io.BytesIO()
+        write_ast(arena, out, format)
+        arena = read_ast(io.BytesIO(out.getvalue()))
+    to_tree(arena).eval()
+
+
+def run_reparse(source: str, level: str):
+    Parser.from_source(text(Parser.from_source(source).program())).program().eval()
+
+
+def run_lazy(source: str, level: str):
+    Parser.from_source(source, lazy=True).program().eval()
+
+
+def run_native(source: str, level: str):
+    from codegen import compile_program, SLUCCodegenError
+    try:
+        exe = compile_program(tree(source, level))
+    except (SLUCCodegenError, SLUCInvalidTypeError) as err:
+        # it types the whole program before running any of it
+        raise Unsupported(err.message)
+    result = subprocess.run([exe], capture_output=True, text=True, timeout=NATIVE_TIMEOUT)
+    sys.stdout.write(result.stdout)
+    if "C backend" in result.stderr:
+        # ints past 64 bits, which Python doesn't mind
+        raise Unsupported(result.stderr.strip())
+    if result.returncode != 0:
+        raise NativeError(result.stderr.strip())
+
+
+# the server run_server sends its requests to, made on first use
+SERVER = None
+
+
+def run_server(source: str, level: str):
+    global SERVER
+    if SERVER is None:
+        SERVER = SLUCServer(None, 1)
+    # what the worker prints goes to the buffer execute reads it back from
+    with contextlib.redirect_stdout(CapturedStdout(sys.stdout)) as captured:
+        SERVER.stdout = captured
+        for request in ({"op": "register", "name": "fuzz", "source": source}, {"op": "run", "name": "fuzz"}):
+            response = asyncio.run(SERVER.handle(json.dumps(request).encode("utf-8")))
+            if not response["ok"]:
+                break
+    sys.stdout.write(response.get("output", ""))
+    if not response["ok"]:
+        raise ServerError(response["error"])
+
+
+# engine -> what runs a program on it and the optimization levels it takes
+ENGINES = {"eval": (run_eval, LEVELS), "generic": (run_generic, LEVELS), "steps": (run_steps, LEVELS),
+           "paused": (run_paused, LEVELS), "budget": (run_budget, LEVELS), "tier": (run_tier, LEVELS),
+           "tier-osr": (run_tier_osr, LEVELS), "trace": (run_trace, LEVELS), "coverage": (run_coverage, LEVELS),
+           "arena": (run_arena, ("none",)), "dump": (run_dump, ("none",)), "reparse": (run_reparse, ("none",)),
+           "lazy": (run_lazy, ("none",)), "server": (run_server, ("none",)), "native": (run_native, LEVELS)}
+
+
+def available(engines: Optional[List[str]] = None, levels: Optional[List[str]] = None) -> List[Tuple[str, str]]:
+    # (engine, level) for everything that can run here, native needs a C compiler
+    configs = []
+    for engine, (run, takes) in ENGINES.items():
+        if engines is not None and engine not in engines or engine == "native" and shutil.which("cc") is None:
+            continue
+        configs.extend((engine, level) for level in takes if levels is None or level in levels)
+    return configs
+
+
+def agrees(reference: Tuple[str, Optional[str]], got: Tuple[str, Optional[str]]) -> bool:
+    if got == reference:
+        return True
+    # the server answers with the message of an SLU-C error but not its type
+    return got[0] == reference[0] and got[1] is not None and reference[1] is not None and \
+        reference[1].startswith("SLUC") and reference[1].split(": ", 1)[1] == got[1]
+
+
+def kind(error: Optional[str]) -> Optional[str]:
+    # the type of an error as outcome has it
+    return None if error is None else error.split(":")[0]
+
+
+class Fuzzer:
+    """
+    Runs programs on configs, (engine, level) pairs, and keeps the runs and
+    seconds of each
+    """
+
+    def __init__(self, configs: List[Tuple[str, str]], shrink_seconds: float = 60, out: Optional[str] = None,
+                 log=sys.stdout):
+        self.configs = configs
+        self.shrink_seconds = shrink_seconds
+        self.out = out
+        self.log = log
+        self.stats = {config: [0, 0, 0.0] for config in [GATE, REFERENCE] + configs}  # runs, skipped, seconds
+        self.recording = True
+        self.programs = 0
+        self.too_long = 0
+        self.failures = []  # (program number, configs that differ, shrunk source)
+
+    def outcome(self, config: Tuple[str, str], source: str) -> Optional[Tuple[str, Optional[str]]]:
+        """
+        What config prints for source and the error it stops with as
+        "Type: message", None if it can't run it
+        """
+        engine, level = config
+        out = io.StringIO()
+        error = None
+        start = time.perf_counter()
+        try:
+            with contextlib.redirect_stdout(out):
+                ENGINES[engine][0](source, level)
+        except Unsupported:
+            if self.recording:
+                self.stats[config][1] += 1
+            return None
+        except (NativeError, ServerError) as err:
+            error = str(err)
+        except Exception as err:
+            error = "{0}: {1}".format(type(err).__name__, err)
+        if self.recording:
+            self.stats[config][0] += 1
+            self.stats[config][2] += time.perf_counter() - start
+        return out.getvalue(), error
+
+    def compare(self, source: str, configs: List[Tuple[str, str]]):
+        """
+        The reference outcome of source and the configs whose outcome differs
+        from it, with the outcome of each config, None if source runs too long
+        """
+        gate = self.outcome(GATE, source)
+        if gate[1] is not None and gate[1].startswith(SLUCLimitError.__name__):
+            return None
+        reference = self.outcome(REFERENCE, source)
+        outcomes = {GATE: gate}
+        for config in configs:
+            if config not in outcomes and config != REFERENCE:
+                outcomes[config] = self.outcome(config, source)
+        differ = [config for config, got in outcomes.items() if got is not None and not agrees(reference, got)]
+        return reference, outcomes, differ
+
+    def still_fails(self, source: str, configs: List[Tuple[str, str]], error: Optional[str]) -> bool:
+        # whether source parses and just the configs still differ from the reference on it, with
+        # the reference stopping with the same error as before, anything else is likely another bug
+        try:
+            Parser.from_source(source).program()
+        except Exception:
+            return False
+        result = self.compare(source, configs)
+        return result is not None and set(result[2]) == set(configs) and kind(result[0][1]) == error
+
+    def shrink(self, source: str, configs: List[Tuple[str, str]], error: Optional[str]) -> str:
+        """
+        The shortest source edits can make of source that configs still
+        differ on. Each edit takes out a function, a statement, a
+        print argument or a declaration, or puts a branch, a loop body or a
+        smaller expression in place of what holds it.
+        """
+        deadline = time.perf_counter() + self.shrink_seconds
+        self.recording = False
+        try:
+            changed = True
+            while changed and time.perf_counter() < deadline:
+                changed = False
+                i = 0
+                while time.perf_counter() < deadline:
+                    smaller = candidate(source, i)
+                    if smaller is None:
+                        break
+                    if len(smaller) < len(source) and self.still_fails(smaller, configs, error):
+                        source = smaller
+                        changed = True
+                    else:
+                        i += 1
+        finally:
+            self.recording = True
+        return source
+
+    def check(self, number: int, source: str):
+        result = self.compare(source, self.configs)
+        self.programs += 1
+        if result is None:
+            self.too_long += 1
+            return
+        reference, outcomes, differ = result
+        if not differ:
+            return
+        print("program {0}: {1} differ from {2}".format(number, ", ".join("/".join(c) for c in differ),
+                                                        "/".join(REFERENCE)), file=self.log)
+        shrunk = self.shrink(source, differ, kind(reference[1]))
+        self.failures.append((number, differ, shrunk))
+        print(shrunk, file=self.log)
+        if self.out is not None:
+            self.save(number, source, shrunk, differ)
+
+    def save(self, number: int, source: str, shrunk: str, differ: List[Tuple[str, str]]):
+        # the program as generated and shrunk, with what each engine made of the shrunk one
+        os.makedirs(self.out, exist_ok=True)
+        name = os.path.join(self.out, "program-{0}".format(number))
+        with open(name + ".sluc", "w") as f:
+            f.write(shrunk)
+        with open(name + ".generated.sluc", "w") as f:
+            f.write(source)
+        result = self.compare(shrunk, differ)
+        with open(name + ".txt", "w") as f:
+            if result is not None:
+                reference, outcomes, now = result
+                for config, got in [(REFERENCE, reference)] + sorted(outcomes.items()):
+                    if got is not None:
+                        f.write("{0}: {1}\n{2}".format("/".join(config), got[1] or "ok", got[0]))
+
+    def report(self, out):
+        print("{0} programs, {1} ran too long, {2} differed".format(self.programs, self.too_long, len(self.failures)),
+              file=out)
+        print("{0:<10}{1:<12}{2:>8}{3:>9}{4:>10}{5:>10}".format("engine", "level", "runs", "skipped", "seconds",
+                                                                 "runs/s"), file=out)
+        for (engine, level), (runs, skipped, seconds) in self.stats.items():
+            print("{0:<10}{1:<12}{2:>8}{3:>9}{4:>10.2f}{5:>10.1f}".format(
+                engine, level, runs, skipped, seconds, runs / seconds if seconds else 0), file=out)
+
+    def save_stats(self):
+        with open(os.path.join(self.out, "throughput.json"), "w") as f:
+            json.dump([{"engine": engine, "level": level, "runs": runs, "skipped": skipped, "seconds": seconds}
+                       for (engine, level), (runs, skipped, seconds) in self.stats.items()], f, indent=1)
+
+
+def children(node):
+    # (attribute, index in it or None, child) for every node node holds
+    for cls in type(node).__mro__:
+        for name in getattr(cls, "__slots__", ()):
+            value = getattr(node, name, None)
+            if isinstance(value, (Expr, Stmt)):
+                yield name, None, value
+            elif isinstance(value, list):
+                for i, item in enumerate(value):
+                    if isinstance(item, (Expr, Stmt)):
+                        yield name, i, item
+
+
+def put(holder, name: str, index: Optional[int], node):
+    if index is None:
+        setattr(holder, name, node)
+    else:
+        getattr(holder, name)[index] = node
+
+
+def edits(program: Program) -> List[Callable[[], None]]:
+    # every edit shrink tries on program, the ones taking out the most first
+    out = []
+    funcs = program.funcs
+    for i, func in enumerate(funcs):
+        if func.id != "main":
+            out.append(lambda i=i: funcs.pop(i))
+    slots = []
+    for func in funcs:
+        stack = [func.stmts]
+        while stack:
+            node = stack.pop()
+            for name, index, child in children(node):
+                slots.append((node, name, index, child))
+                stack.append(child)
+    for holder, name, index, child in slots:
+        if index is not None and (isinstance(holder, Stmts) or isinstance(holder, PrintStmt) and
+                                  len(holder.printarg) > 1):
+            out.append(lambda holder=holder, name=name, index=index: getattr(holder, name).pop(index))
+    for holder, name, index, child in slots:
+        if isinstance(child, IfStmt):
+            smaller = [child.stmt] + ([] if child.elseStmt is None else [child.elseStmt])
+        elif isinstance(child, ForStmt):
+            smaller = [Stmts([child.init, child.stmt])]
+        elif isinstance(child, WhileStmt):
+            smaller = [child.stmt]
+        elif isinstance(child, Expr):
+            smaller = [node for _, _, node in children(child) if isinstance(node, Expr)]
+            if str(child) not in ("0", "1", "true"):
+                smaller += [IntLitExpr("0"), IntLitExpr("1"), BoolExpr("true")]
+        else:
+            continue
+        out.extend(lambda holder=holder, name=name, index=index, node=node: put(holder, name, index, node)
+                   for node in smaller)
+    for func in funcs:
+        decls = func.decls.decls
+        out.extend(lambda decls=decls, j=j: decls.pop(j) for j in range(len(decls)))
+    return out
+
+
+def candidate(source: str, i: int) -> Optional[str]:
+    # source after its i-th edit, None if it doesn't have that many
+    program = Parser.from_source(source).program()
+    todo = edits(program)
+    if i >= len(todo):
+        return None
+    todo[i]()
+    return text(program)
+
+
+def generate(seed: str, number: int) -> str:
+    # program number of seed, the same every time
+    return Generator(random.Random("{0}-{1}".format(seed, number))).program()
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="fuzz", description="run random SLU-C programs on every engine and compare")
+    ap.add_argument("--seconds", type=float, default=60, help="how long to go on generating programs")
+    ap.add_argument("--seed", default="0", help="which programs to generate")
+    ap.add_argument("--engines", help="comma separated engines to run, all of them if not given")
+    ap.add_argument("--levels", help="comma separated optimization levels to run, all of them if not given")
+    ap.add_argument("--shrink-seconds", type=float, default=60, help="how long to shrink each program that differs")
+    ap.add_argument("--out", metavar="DIR", help="save the programs that differ and the throughput here")
+    ap.add_argument("--show", type=int, metavar="N", help="print program N of the seed instead")
+    args = ap.parse_args(argv)
+    if args.show is not None:
+        print(generate(args.seed, args.show), end="")
+        return 0
+    engines = None if args.engines is None else args.engines.split(",")
+    levels = None if args.levels is None else args.levels.split(",")
+    for name, known in ((engines, ENGINES), (levels, LEVELS)):
+        for item in name or ():
+            if item not in known:
+                ap.error("no {0}, only {1}".format(item, ", ".join(known)))
+    fuzzer = Fuzzer(available(engines, levels), args.shrink_seconds, args.out)
+    deadline = time.perf_counter() + args.seconds
+    number = 0
+    while time.perf_counter() < deadline:
+        fuzzer.check(number, generate(args.seed, number))
+        number += 1
+    fuzzer.report(sys.stdout)
+    if args.out is not None:
+        os.makedirs(args.out, exist_ok=True)
+        fuzzer.save_stats()
+    return 1 if fuzzer.failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
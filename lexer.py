@@ -1,7 +1,60 @@
+import codecs
+import io
 import sys
-from typing import Generator, Tuple
+from typing import Generator, Iterator, Optional, Tuple
 import re
 
+# how many bytes of a bytes source are decoded at a time
+DECODE_CHUNK = 1 << 16
+
+
+class SLUCSourceError(Exception):
+    def __init__(self, message: str):
+        Exception.__init__(self)
+        self.message = message
+
+    def __str__(self):
+        return self.message
+
+
+def text_lines(text: str, start: int = 0, stop: Optional[int] = None) -> Iterator[str]:
+    # the lines of text[start:stop] with their newlines, without copying more than one line at a time
+    stop = len(text) if stop is None else stop
+    while start < stop:
+        end = text.find("\n", start, stop) + 1 or stop
+        yield text[start:end]
+        start = end
+
+
+def byte_lines(view: memoryview, encoding: str) -> Iterator[str]:
+    # the lines of view, decoded a chunk at a time so a big source isn't copied whole
+    decoder = codecs.getincrementaldecoder(encoding)()
+    rest = ""
+    for start in range(0, len(view), DECODE_CHUNK):
+        text = rest + decoder.decode(view[start:start + DECODE_CHUNK])
+        end = text.rfind("\n") + 1
+        yield from text_lines(text, 0, end)
+        rest = text[end:]
+    rest += decoder.decode(b"", True)
+    if rest:
+        yield rest
+
+
+def source_lines(source, encoding: str = "utf-8") -> Iterator[str]:
+    """
+    The lines of source the way iterating over an open file gives them.
+    source can be a str, bytes, bytearray, memoryview or a stream.
+    """
+    if isinstance(source, str):
+        return text_lines(source)
+    if isinstance(source, (bytes, bytearray, memoryview)):
+        return byte_lines(memoryview(source).cast("B"), encoding)
+    if isinstance(source, (io.RawIOBase, io.BufferedIOBase)):
+        return iter(io.TextIOWrapper(source, encoding))
+    if hasattr(source, "read"):
+        return iter(source)
+    raise TypeError("can't lex a {0}, only str, bytes, memoryview or a stream".format(type(source).__name__))
+
 
 class Lexer:
     # class variables
@@ -16,19 +69,28 @@ class Lexer:
                    "<=": "LESS_THAN_EQUAL", ">=": "GREATER_THAN_EQUAL", "!=": "NOT_EQUAL", "=": "ASSIGNMENT", "<": "LESS_THAN",
                   ">": "GREATER_THAN", ";": "SEMICOLON",",": "COMMA",
                   "if": "KEYWORD", "print": "KEYWORD", "bool": "KEYWORD", "else": "KEYWORD", "false": "KEYWORD",
-                  "true": "KEYWORD", "float": "KEYWORD", "int": "KEYWORD", "while": "KEYWORD",
+                  "true": "KEYWORD", "float": "KEYWORD", "int": "KEYWORD", "while": "KEYWORD", "for": "KEYWORD",
                   "char": "KEYWORD", "return": "KEYWORD", "!": "NOT"}
 
-    # fn - file name we are lexing
-    def __init__(self, fn: str):
-
+    # fn - file name we are lexing, see from_source for lexing a program already in memory
+    def __init__(self, fn: Optional[str], lines: Optional[Iterator[str]] = None):
+        if lines is not None:
+            self.f = None
+            self.lines = lines
+            return
         try:
             self.f = open(fn)
-        except IOError:
-            print("File {} not found".format(fn))
-            print("Exiting")
-            sys.exit(1)  # can't go on
+        except OSError as err:
+            raise SLUCSourceError("ERROR: can't open {0}: {1}".format(fn, err.strerror))
+        self.lines = self.f
 
+    @classmethod
+    def from_source(cls, source, encoding: str = "utf-8") -> "Lexer":
+        """
+        A Lexer for a program held in a str, bytes, memoryview or stream
+        instead of a file, see source_lines
+        """
+        return cls(None, source_lines(source, encoding))
 
     @staticmethod
     def is_string(token):
@@ -106,10 +168,19 @@ class Lexer:
             else:
                 return Lexer.valid_ID(token)
 
+    @staticmethod
+    def literal_value(token, kind):
+        # value of an INTLIT or FLOAT token, None for everything else
+        if kind == "INTLIT":
+            return int(token.replace("_", ""))
+        if kind == "FLOAT":
+            return float(token.replace("_", ""))
+        return None
+
     @staticmethod
     def create_split_patt():
         escape_chars = {"+", "(", ")", "[", "*", "||", "%"}
-        keywords = {"if", "print", "bool", "else", "false", "true", "float", "int", "while", "main", "char"}
+        keywords = {"if", "print", "bool", "else", "false", "true", "float", "int", "while", "for", "main", "char"}
 
         splits = ['(' + token + ') | ' for token in Lexer.tokensDict.keys() if
                   token not in escape_chars and token not in keywords]
@@ -131,25 +202,35 @@ class Lexer:
         pattern = Lexer.create_split_patt()
         split_patt = re.compile(pattern, re.VERBOSE)
 
-        for line in self.f:
-            Lexer.line_num += 1
+        # every file starts at line 1, even if another one was lexed before. Another
+        # file can also be lexed in between two tokens of this one (an import
+        # being compiled), so the count is kept here and only lent to Lexer.line_num
+        line_num = 0
+        for line in self.lines:
+            line_num += 1
             tokens = (t for t in split_patt.split(line) if t)
             for t in tokens:
                 # if it is not a known token, start cascade of method
-                if not Lexer.tokensDict.get(t):
-                    if Lexer.is_numeric(t) is None:
+                kind = Lexer.tokensDict.get(t)
+                if not kind:
+                    Lexer.line_num = line_num
+                    tok = Lexer.is_numeric(t)
+                    if tok is None:
                         pass
                     else:
-                        yield Lexer.is_numeric(t)
+                        # literals carry their value so the parser never has to look at the text again.
+                        # the text is interned so every node naming the same variable or literal shares one string
+                        yield (sys.intern(tok[0]),) + tok[1:] + (Lexer.literal_value(tok[0], tok[1]),)
                 # otherwise yield token with the line number
                 else:
-                    yield (Lexer.tokensDict.get(t), t, Lexer.line_num)
-        yield ("EOF", "EOF", Lexer.line_num)
+                    yield (kind, sys.intern(t), line_num, None)
+        Lexer.line_num = line_num
+        yield ("EOF", "EOF", line_num, None)
 
 
     @staticmethod
     def my_print(tokens): #function to print the output nice and clean.
-        token, name, linenum = tokens
+        token, name, linenum = tokens[:3]
         # check if they are empty string then we know they are comments, so we avoid displaying them.
         if token and name and linenum:
             # making equal spaces for displaying output to make the output look clean.
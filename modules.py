@@ -0,0 +1,241 @@
+"""
+SLU-C modules
+A program can start by importing other .sluc files, which are then its
+modules. The path is relative to the file the import is in:
+
+  import "lib/numbers.sluc";
+
+  int main() {
+      ...
+  }
+
+A Linker compiles each module on its own into a Module: the module parsed
+into an arena.Arena plus the table of the functions it exports. Modules are
+kept in a __slucache__ directory next to their source, like Python's
+__pycache__. Parsing a file only needs the export tables of what it
+imports, so a module is parsed again only when its source changes, or when
+something it imports now exports different functions. Everything else comes
+out of the cache, and link puts the Program together from the modules:
+
+  linker = Linker()
+  program = linker.program("prog.sluc")
+  program.eval()
+  for event in linker.log:
+      print(event)
+
+Every function name has to be unique over the whole program. A module may
+have a main of its own, for trying it out, which is only run when that
+module is the program. Imports that go round in a circle are an error.
+"""
+import hashlib
+import os
+import pickle
+from typing import Dict, List, Optional, Tuple
+
+from arena import Arena, Builder, to_tree
+from parser import Parser, SLUCSyntaxError, SLUCReferenceBeforeAssignment, SLUCDuplicateReferenceError
+from sluc_ast import Program, SLUCInvalidTypeError
+
+# bumped whenever what is in a Module or in an Arena changes, older cache files are compiled again
+MODULE_VERSION = 2
+CACHE_DIR = "__slucache__"
+
+
+class SLUCImportError(Exception):
+    def __init__(self, message: str):
+        Exception.__init__(self)
+        self.message = message
+
+    def __str__(self):
+        return self.message
+
+
+class Module:
+    """
+    One compiled .sluc file. digest is the sha256 of its source, imports are
+    the paths of the modules it imports with the exports digest each had
+    when this was compiled, and exports maps the name of each function but
+    main to its type and parameter types.
+    """
+    __slots__ = ("version", "path", "digest", "imports", "exports", "arena")
+
+    def __init__(self, path: str, digest: str, imports: List[Tuple[str, str]], arena: Arena):
+        self.version = MODULE_VERSION
+        self.path = path
+        self.digest = digest
+        self.imports = imports
+        self.arena = arena
+        self.exports = {f.id: (f.t, [t for t, id in f.params]) for f in arena.functions if f.id != "main"}
+
+    def exports_digest(self) -> str:
+        # changes when the functions other modules can call from this one change
+        return hashlib.sha256(repr(sorted(self.exports.items())).encode()).hexdigest()
+
+    def types(self) -> Dict[str, str]:
+        # what Parser needs to know about the exports
+        return {id: t for id, (t, params) in self.exports.items()}
+
+
+class Imports:
+    """
+    What a Parser is given as imports for the file at path. It compiles or
+    finds each module imported and remembers it.
+    """
+
+    def __init__(self, linker: "Linker", path: str, importing: Tuple[str, ...] = ()):
+        self.linker = linker
+        self.dir = os.path.dirname(path)
+        self.importing = importing + (path,)
+        self.modules = []
+
+    def __call__(self, name: str, line: int) -> Dict[str, str]:
+        module = self.linker.module(os.path.normpath(os.path.join(self.dir, name)), self.importing, line)
+        self.modules.append(module)
+        return module.types()
+
+
+class Linker:
+    """
+    Compiles modules, caching them, and puts programs together from them.
+    cache is a directory to keep every module in instead of a __slucache__
+    next to each. A Linker also remembers the modules it has seen, so a
+    long running one doesn't read the cache again for modules that haven't
+    changed. log says for each module of the last program whether it was
+    compiled or came from the cache.
+    """
+
+    def __init__(self, cache: Optional[str] = None):
+        self.cache = cache
+        self.known = {}  # path -> Module, from any program so far
+        self.current = {}  # path -> Module, already checked for the program being built
+        self.log = []
+
+    def start(self):
+        # a new program, every module has to be checked again
+        self.current = {}
+        self.log = []
+
+    def imports(self, path: str) -> Imports:
+        """
+        For parsing the program at path yourself:
+
+          imports = linker.imports(path)
+          program = linker.link(Parser(path, imports=imports).program(), imports)
+        """
+        self.start()
+        return Imports(self, os.path.abspath(path))
+
+    def program(self, path: str) -> Program:
+        # the program at path with everything it imports, its own Module is cached too
+        self.start()
+        module = self.module(os.path.abspath(path))
+        return self.link(to_tree(module.arena), [self.current[dep] for dep, digest in module.imports])
+
+    def link(self, program: Program, imported) -> Program:
+        """
+        program with the functions of the modules it imported, imported is
+        the Imports it was parsed with or a list of Modules, and of the
+        modules those imported and so on
+        """
+        # modules before the ones importing them, so printed out the program still parses
+        modules = []
+        seen = set()
+        stack = [(module, False) for module in reversed(list(getattr(imported, "modules", imported)))]
+        while stack:
+            module, done = stack.pop()
+            if done:
+                modules.append(module)
+            elif module.path not in seen:
+                seen.add(module.path)
+                stack.append((module, True))
+                stack.extend((self.current[dep], False) for dep, digest in reversed(module.imports))
+        where = {func.id: "the program" for func in program.funcs}
+        funcs = []
+        for module in modules:
+            for func in to_tree(module.arena).funcs:
+                if func.id == "main":
+                    continue
+                if func.id in where:
+                    raise SLUCImportError("ERROR: {0} is defined in both {1} and {2}".format(
+                        func.id, where[func.id], module.path))
+                where[func.id] = module.path
+                funcs.append(func)
+        # main stays first, that is where Program.eval starts
+        main = [func for func in program.funcs if func.id == "main"]
+        return Program(main + funcs + [func for func in program.funcs if func.id != "main"])
+
+    def module(self, path: str, importing: Tuple[str, ...] = (), line: Optional[int] = None) -> Module:
+        """
+        The Module of the file at path, from the cache if it is up to date
+        and compiled otherwise. importing are the files importing it, for
+        finding circles.
+        """
+        if path in importing:
+            raise SLUCImportError("ERROR: {0} imports itself through {1}".format(
+                path, " -> ".join(importing[importing.index(path):] + (path,))))
+        module = self.current.get(path)
+        if module is not None:
+            return module
+        try:
+            with open(path, "rb") as f:
+                source = f.read()
+        except OSError as err:
+            raise SLUCImportError("ERROR: can't import {0} on line {1}: {2}".format(path, line, err.strerror))
+        digest = hashlib.sha256(source).hexdigest()
+        module = self.known.get(path)
+        if module is None or module.digest != digest:
+            module = self.load(path)
+        if module is not None and module.digest == digest and self.uptodate(module, importing + (path,)):
+            self.log.append("{0}: cached".format(path))
+        else:
+            module = self.compile(path, source, digest, importing)
+            self.save(module)
+            self.log.append("{0}: compiled".format(path))
+        self.known[path] = self.current[path] = module
+        return module
+
+    def uptodate(self, module: Module, importing: Tuple[str, ...]) -> bool:
+        # whether everything module imports still exports what it did when module was compiled
+        return all(self.module(dep, importing).exports_digest() == digest for dep, digest in module.imports)
+
+    def compile(self, path: str, source: bytes, digest: str, importing: Tuple[str, ...]) -> Module:
+        imports = Imports(self, path, importing)
+        try:
+            arena = Parser.from_source(source, build=Builder(), imports=imports).program()
+        except (SLUCSyntaxError, SLUCReferenceBeforeAssignment, SLUCDuplicateReferenceError,
+                SLUCInvalidTypeError) as err:
+            # the line in the message is in this module, not in the program
+            err.message = "{0}: {1}".format(path, err.message)
+            raise
+        return Module(path, digest, [(m.path, m.exports_digest()) for m in imports.modules], arena)
+
+    def cached(self, path: str) -> str:
+        # where the Module of the file at path is kept
+        name = os.path.basename(path) + "c"
+        if self.cache is None:
+            return os.path.join(os.path.dirname(path), CACHE_DIR, name)
+        return os.path.join(self.cache, hashlib.sha256(path.encode()).hexdigest()[:16] + "-" + name)
+
+    def load(self, path: str) -> Optional[Module]:
+        # the cached Module of the file at path, None if there isn't a usable one
+        try:
+            with open(self.cached(path), "rb") as f:
+                module = pickle.load(f)
+        except Exception:
+            return None
+        if not isinstance(module, Module) or module.version != MODULE_VERSION or module.path != path:
+            return None
+        return module
+
+    def save(self, module: Module):
+        # written next to where it goes and moved there, so nobody reads half of it
+        name = self.cached(module.path)
+        try:
+            os.makedirs(os.path.dirname(name), exist_ok=True)
+            temp = "{0}.{1}.tmp".format(name, os.getpid())
+            with open(temp, "wb") as f:
+                pickle.dump(module, f, pickle.HIGHEST_PROTOCOL)
+            os.replace(temp, name)
+        except OSError:
+            # a read-only directory only means compiling again next time
+            pass
@@ -0,0 +1,464 @@
+"""
+SLU-C optimizer
+Passes that rewrite a parsed Program into one that prints the same and
+returns the same but runs faster. They change the program in place and
+have to run before it is quickened, that is before its first eval or call.
+
+  decisions = inline(program)
+  for decision in decisions:
+      print(decision)
+
+inline copies the bodies of small functions that don't call anything into
+the places they are called from, see InlinedCallExpr for how a copy runs.
+cse evaluates repeated expressions once and reads the copies from a
+temporary, see SaveExpr and TempExpr.
+"""
+import copy
+from typing import List, Optional
+
+from sluc_ast import *
+
+# biggest body, in AST nodes, inline copies by default. square(x) is 4 nodes and
+# max(a, b) written with an if and a local is about 15
+INLINE_MAX_SIZE = 40
+
+
+class Decision:
+    """
+    What inline did with one call: reason is None if the call was inlined,
+    otherwise why it was kept
+    """
+
+    def __init__(self, caller: str, callee: str, line: Optional[int], reason: Optional[str] = None):
+        self.caller = caller
+        self.callee = callee
+        self.line = line
+        self.reason = reason
+
+    @property
+    def inlined(self) -> bool:
+        return self.reason is None
+
+    def __str__(self):
+        if self.inlined:
+            return "line {0}: inlined {1} into {2}".format(self.line, self.callee, self.caller)
+        return "line {0}: kept call to {1} in {2} ({3})".format(self.line, self.callee, self.caller, self.reason)
+
+
+def walk(node, into_inlined: bool = True):
+    """
+    Every node under node, parents before children, without recursion.
+    Without into_inlined the bodies of InlinedCallExprs are left out, those use
+    the renamed variables of their own copy and not the function's.
+    """
+    stack = [node]
+    while stack:
+        n = stack.pop()
+        yield n
+        if isinstance(n, InlinedCallExpr) and not into_inlined:
+            stack.extend(reversed(n.args))
+        else:
+            stack.extend(reversed(n.children()))
+
+
+def calls(node) -> List[FunctionCallExpr]:
+    # the calls under node to functions of the program that are still real calls
+    return [n for n in walk(node) if type(n) is FunctionCallExpr and n.id not in BUILTINS]
+
+
+def names(node) -> set:
+    # identifiers read or assigned under node, inlined copies included
+    found = set()
+    for n in walk(node):
+        if isinstance(n, IDExpr):
+            found.add(n.boo)
+        elif isinstance(n, AssignStmt):
+            found.add(n.id)
+        elif isinstance(n, SaveExpr):
+            found.add(n.temp)
+        elif isinstance(n, InlinedCallExpr):
+            found.update(n.params)
+            found.update(n.decls)
+    return found
+
+
+def variables(program: Program) -> set:
+    # every variable name in the program
+    taken = set()
+    for func in program.funcs:
+        taken |= names(func.stmts) | set(func.params.buildList()) | set(func.decls.buildDict())
+    return taken
+
+
+def replace(parent, old, new):
+    # put new where parent holds old, whether in an attribute or in a list of them
+    for key in (key for cls in type(parent).__mro__ for key in getattr(cls, "__slots__", ())):
+        value = getattr(parent, key, None)
+        if value is old:
+            setattr(parent, key, new)
+            return
+        if isinstance(value, list):
+            for i, item in enumerate(value):
+                if item is old:
+                    value[i] = new
+                    return
+
+
+class Inliner:
+    """
+    Inlines calls one function at a time, callees before their callers, so a
+    function whose calls were all inlined can be inlined itself
+    """
+
+    def __init__(self, program: Program, max_size: int):
+        self.program = program
+        self.max_size = max_size
+        self.funcs = {}  # id -> FunctionDef, the first one wins just like FunctionCallExpr.eval
+        for func in program.funcs:
+            self.funcs.setdefault(func.id, func)
+        self.taken = variables(program)
+        self.copies = 0
+        self.decisions = []
+
+    def order(self) -> List[FunctionDef]:
+        """
+        The functions with every callee before its callers, for a cycle of
+        recursive functions the order inside the cycle doesn't matter
+        """
+        done = set()
+        ordered = []
+        for root in self.program.funcs:
+            stack = [(root, False)]
+            while stack:
+                func, visited = stack.pop()
+                if visited:
+                    ordered.append(func)
+                    continue
+                if id(func) in done:
+                    continue
+                done.add(id(func))
+                stack.append((func, True))
+                for call in calls(func.stmts):
+                    callee = self.funcs.get(call.id)
+                    if callee is not None and id(callee) not in done:
+                        stack.append((callee, False))
+        return ordered
+
+    def why_not(self, caller: FunctionDef, call: FunctionCallExpr, callee: Optional[FunctionDef]) -> Optional[str]:
+        # the reason call can't be inlined, None if it can
+        if callee is None:
+            return "there is no function called {0}".format(call.id)
+        if len(call.args) != len(callee.params.params):
+            return "{0} takes {1} arguments".format(callee.id, len(callee.params.params))
+        left = {c.id for c in calls(callee.stmts)}
+        if callee is caller or callee.id in left:
+            return "recursive"
+        if left:
+            return "calls {0}".format(", ".join(sorted(left)))
+        # anything else the body names would end up meaning the caller's variable
+        used = set()
+        for n in walk(callee.stmts, False):
+            if isinstance(n, IDExpr):
+                used.add(n.boo)
+            elif isinstance(n, AssignStmt):
+                used.add(n.id)
+        used -= set(callee.params.buildList()) | set(callee.decls.buildDict())
+        if used:
+            return "uses {0} which it does not declare".format(", ".join(sorted(used)))
+        size = sum(1 for n in walk(callee.stmts))
+        if size > self.max_size:
+            return "{0} nodes is too big".format(size)
+        return None
+
+    def fresh(self, func: str, id: str) -> str:
+        # a name for id in a copy of func that no variable of the program uses
+        name = "_{0}{1}_{2}".format(func, self.copies, id)
+        while name in self.taken:
+            name = "_" + name
+        self.taken.add(name)
+        return name
+
+    def copy(self, call: FunctionCallExpr, callee: FunctionDef) -> InlinedCallExpr:
+        self.copies += 1
+        rename = {id: self.fresh(callee.id, id)
+                  for id in callee.params.buildList() + list(callee.decls.buildDict())}
+        stmts = copy.deepcopy(callee.stmts)
+        for n in walk(stmts, False):
+            if isinstance(n, IDExpr):
+                n.boo = rename[n.boo]
+            elif isinstance(n, AssignStmt):
+                n.id = rename[n.id]
+            elif isinstance(n, SaveExpr):
+                n.temp = rename[n.temp]
+            elif isinstance(n, ForStmt):
+                # it may have worked out its counter with the old names
+                n.counter = None
+        envtype = {**callee.params.buildDict(), **callee.decls.buildDict()}
+        return InlinedCallExpr(call, [rename[id] for id in callee.params.buildList()],
+                               [rename[id] for id in callee.decls.buildDict()], stmts,
+                               {rename[id]: t for id, t in envtype.items()})
+
+    def function(self, caller: FunctionDef):
+        # inline what can be inlined in the body of caller, in source order
+        stack = [(caller.stmts, None)]
+        sites = []
+        while stack:
+            node, parent = stack.pop()
+            if type(node) is FunctionCallExpr and node.id not in BUILTINS:
+                sites.append((node, parent))
+            if not isinstance(node, InlinedCallExpr):
+                stack.extend((child, node) for child in reversed(node.children()))
+        for call, parent in sites:
+            callee = self.funcs.get(call.id)
+            reason = self.why_not(caller, call, callee)
+            self.decisions.append(Decision(caller.id, call.id, call.line, reason))
+            if reason is None:
+                replace(parent, call, self.copy(call, callee))
+
+    def run(self) -> List[Decision]:
+        for func in self.order():
+            self.function(func)
+        self.program.deep = None  # the copies make the tree deeper
+        return self.decisions
+
+
+def inline(program: Program, max_size: int = INLINE_MAX_SIZE) -> List[Decision]:
+    """
+    Replaces calls to functions that call nothing and whose body has at most
+    max_size nodes with a copy of that body, and returns what was decided for
+    every call in the program
+    """
+    return Inliner(program, max_size).run()
+
+
+# operators cse leaves alone because they can raise, / and % by dividing by zero
+UNSAFE = {"/", "%"}
+
+
+class Value:
+    """
+    One computed expression cse can reuse: its key, the variables it reads,
+    its type and how often it was wanted while it was still good
+    """
+
+    def __init__(self, n: int, expr: Expr, reads: frozenset, t: type):
+        self.n = n
+        self.expr = expr
+        self.reads = reads
+        self.t = t
+        self.count = 1
+        self.temp = None
+
+
+class Temporary:
+    """
+    What cse reports for one temporary it made
+    """
+
+    def __init__(self, func: str, temp: str, expr: str, uses: int):
+        self.func = func
+        self.temp = temp
+        self.expr = expr
+        self.uses = uses
+
+    def __str__(self):
+        return "{0}: {1} = {2} is reused {3} times".format(self.func, self.temp, self.expr, self.uses)
+
+
+class CSE:
+    """
+    Common subexpression elimination for one function. Structurally equal
+    expressions get the same key, built bottom up like hash consing. An
+    expression is available from the point it is evaluated until one of the
+    variables it reads is assigned, and only along the paths where it is sure
+    to have been evaluated: the right side of && and ||, if branches and
+    while bodies see what was available before them but what they compute
+    is forgotten after them.
+
+    The walk is made twice in the same order. The first one only counts how
+    often each available value is wanted, the second saves the values wanted
+    more than once in a temporary and replaces the later copies with reads
+    of it. Only BinaryExprs without calls, strings, / or % are candidates,
+    those can't print, fail or change a variable, so evaluating them fewer
+    times can't be told apart except by the clock.
+    """
+
+    def __init__(self, func: FunctionDef, taken: set):
+        self.func = func
+        self.taken = taken
+        self.types = {**func.params.buildDict(), **func.decls.buildDict()}
+        self.info = {}  # id of node -> (key, variables read, type) for the candidates
+        self.temporaries = []
+
+    def describe(self, expr: Expr):
+        """
+        Works out key, variables read and type for every node under expr,
+        bottom up without recursion. Nodes that can't be reused get no key.
+        """
+        stack = [(expr, False)]
+        while stack:
+            node, visited = stack.pop()
+            if not visited:
+                stack.append((node, True))
+                if not isinstance(node, InlinedCallExpr):
+                    stack.extend((child, False) for child in node.children() if isinstance(child, Expr))
+                continue
+            info = None
+            if type(node) is IDExpr and node.boo in self.types:
+                info = (("id", node.boo), frozenset([node.boo]), TYPES[self.types[node.boo]])
+            elif type(node) in (IntLitExpr, FloatExpr, BoolExpr):
+                info = ((type(node).__name__, node.boo), frozenset(), node.typeof(None))
+            elif type(node) is UnaryOp:
+                tree = self.info.get(id(node.tree))
+                if tree is not None:
+                    # a - has the type of what it negates, like UnaryOp.quicken says. UnaryOp.typeof
+                    # has no type to give for a !, so what it is part of can't be a candidate
+                    t = tree[2] if node.sign == "-" and tree[2] in (int, float) else None
+                    info = ((node.sign, tree[0]), tree[1], t)
+            elif type(node) is BinaryExpr and node.operator not in UNSAFE:
+                left = self.info.get(id(node.left))
+                right = self.info.get(id(node.right))
+                # checktypes takes an unknown type for an int, which the temporary would be declared as
+                if left is not None and right is not None and left[2] is not None and right[2] is not None:
+                    try:
+                        t = node.checktypes(left[2], right[2])
+                    except SLUCInvalidTypeError:
+                        t = None
+                    if t is not None:
+                        info = ((node.operator, left[0], right[0]), left[1] | right[1], t)
+            if info is not None:
+                self.info[id(node)] = info
+
+    def expr_steps(self, node: Expr):
+        # node with the values available in self.avail reused, for run_steps
+        info = self.info.get(id(node))
+        if info is not None and info[0] in self.avail:
+            value = self.avail[info[0]]
+            if self.counting:
+                value.count += 1
+                return node
+            return TempExpr(value.temp, value.t)
+        if isinstance(node, BinaryExpr):
+            node.left = yield self.expr_steps(node.left)
+            if node.operator in {"&&", "||"}:
+                # the right side doesn't always run
+                before = dict(self.avail)
+                node.right = yield self.expr_steps(node.right)
+                self.avail = before
+            else:
+                node.right = yield self.expr_steps(node.right)
+        elif isinstance(node, UnaryOp):
+            node.tree = yield self.expr_steps(node.tree)
+        elif isinstance(node, FunctionCallExpr):
+            args = []
+            for arg in node.args:
+                args.append((yield self.expr_steps(arg)))
+            node.args = args
+        if type(node) is not BinaryExpr or info is None:
+            return node
+        self.values += 1
+        if self.counting:
+            value = Value(self.values, node, info[1], info[2])
+            self.counts.append(value)
+        else:
+            value = self.counts[self.values - 1]
+        self.avail[info[0]] = value
+        if self.counting or value.count < 2:
+            return node
+        value.temp = self.temp(value)
+        return SaveExpr(value.temp, node)
+
+    def temp(self, value: Value) -> str:
+        # a new temporary declared in the function
+        n = len(self.temporaries) + 1
+        name = "_cse{0}".format(n)
+        while name in self.taken:
+            name = "_" + name
+        self.taken.add(name)
+        self.func.decls.decls.append(Declaration(TYPENAMES[value.t], name))
+        self.temporaries.append(Temporary(self.func.id, name, str(value.expr), value.count - 1))
+        return name
+
+    def kill(self, assigned):
+        # forget the values that read any of the assigned variables
+        self.avail = {key: value for key, value in self.avail.items() if not (value.reads & assigned)}
+
+    @staticmethod
+    def assigned(stmt) -> set:
+        # variables assigned anywhere under stmt
+        return {n.id for n in walk(stmt, False) if isinstance(n, AssignStmt)}
+
+    def stmts_steps(self, stmts: Stmts):
+        for stmt in stmts.stmts:
+            if isinstance(stmt, AssignStmt):
+                stmt.expr = yield self.expr_steps(stmt.expr)
+                self.kill({stmt.id})
+            elif isinstance(stmt, PrintStmt):
+                args = []
+                for arg in stmt.printarg:
+                    args.append((yield self.expr_steps(arg)))
+                stmt.printarg = args
+            elif isinstance(stmt, ReturnStmt):
+                stmt.expr = yield self.expr_steps(stmt.expr)
+                # the rest of these statements never run
+                return
+            elif isinstance(stmt, IfStmt):
+                stmt.expr = yield self.expr_steps(stmt.expr)
+                before = self.avail
+                for branch in (stmt.stmt, stmt.elseStmt):
+                    if branch is not None:
+                        self.avail = dict(before)
+                        yield self.branch_steps(branch)
+                self.avail = before
+                self.kill(self.assigned(stmt))
+            elif isinstance(stmt, WhileStmt):
+                if isinstance(stmt, ForStmt):
+                    # init runs once before the loop, update at the end of every trip through it
+                    stmt.init.expr = yield self.expr_steps(stmt.init.expr)
+                    self.kill({stmt.init.id})
+                # the condition runs again after every trip through the body
+                self.kill(self.assigned(stmt))
+                stmt.expr = yield self.expr_steps(stmt.expr)
+                before = self.avail
+                self.avail = dict(before)
+                yield self.branch_steps(stmt.stmt)
+                if isinstance(stmt, ForStmt):
+                    yield self.branch_steps(stmt.update)
+                self.avail = before
+            elif isinstance(stmt, Stmts):
+                yield self.stmts_steps(stmt)
+
+    def branch_steps(self, stmt):
+        # the body of an if or while, which is one statement
+        yield self.stmts_steps(stmt if isinstance(stmt, Stmts) else Stmts([stmt]))
+
+    def run(self) -> List[Temporary]:
+        self.describe_stmts()
+        self.counts = []
+        for counting in (True, False):
+            self.counting = counting
+            self.avail = {}
+            self.values = 0
+            run_steps(self.stmts_steps(self.func.stmts))
+        return self.temporaries
+
+    def describe_stmts(self):
+        for n in walk(self.func.stmts, False):
+            if isinstance(n, (AssignStmt, ReturnStmt, IfStmt, WhileStmt)):
+                self.describe(n.expr)
+            elif isinstance(n, PrintStmt):
+                for arg in n.printarg:
+                    self.describe(arg)
+
+
+def cse(program: Program) -> List[Temporary]:
+    """
+    Common subexpression elimination in every function of program, returns
+    the temporaries it made
+    """
+    taken = variables(program)
+    temporaries = []
+    for func in program.funcs:
+        temporaries.extend(CSE(func, taken).run())
+    program.deep = None
+    return temporaries
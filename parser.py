@@ -1,12 +1,16 @@
 import sys
+from array import array
+from collections import deque
+from typing import Callable, Dict, Iterable, Optional
 
-from lexer import Lexer
-from ast import *
-from ast import SLUCInvalidTypeError as InvalidTypeError
+from lexer import Lexer, SLUCSourceError
+from sluc_ast import *
+from sluc_ast import SLUCInvalidTypeError as InvalidTypeError
 
 """
   The SLU-C Grammar:
-  Program         →  { FunctionDef }
+  Program         →  { Import } { FunctionDef }
+  Import          →  import stringlit ;
   FunctionDef     →  Type id ( Params ) { Declarations Statements }
   Params          →  Type id { , Type id } | ε
   Declarations    →  { Declaration }
@@ -14,12 +18,13 @@ from ast import SLUCInvalidTypeError as InvalidTypeError
   Type            →  int | bool | float
   Statements      →  { Statement }
   Statement       →  ; | Block | Assignment | IfStatement |     
-                     WhileStatement |  PrintStmt | ReturnStmt
+                     WhileStatement | ForStatement | PrintStmt | ReturnStmt
   ReturnStmt      →  return Expression ;
   Block           →  '{' Statements '}'
   Assignment      →  id = Expression ;
   IfStatement     →  if ( Expression ) Statement [ else Statement ]
   WhileStatement  →  while ( Expression ) Statement  
+  ForStatement    →  for ( id = Expression ; Expression ; id = Expression ) Statement
   PrintStmt       →  print(PrintArg { , PrintArg })
   PrintArg        →  Expression | stringlit 
   Expression      →  Conjunction { || Conjunction }
@@ -38,13 +43,242 @@ from ast import SLUCInvalidTypeError as InvalidTypeError
 """
 
 
-class Parser:
+class Tree:
+    """
+    What a Parser builds by default, the node classes of sluc_ast. The parser
+    makes every node through its build, so arena.Builder can be given instead
+    to get the same program as an Arena.
+    """
+    Program = Program
+    FunctionDef = FunctionDef
+    Param = Param
+    Declarations = Declarations
+    Declaration = Declaration
+    Stmts = Stmts
+    IfStmt = IfStmt
+    WhileStmt = WhileStmt
+    ForStmt = ForStmt
+    ReturnStmt = ReturnStmt
+    AssignStmt = AssignStmt
+    PrintStmt = PrintStmt
+    BinaryExpr = BinaryExpr
+    UnaryOp = UnaryOp
+    FunctionCallExpr = FunctionCallExpr
+    IDExpr = IDExpr
+    IntLitExpr = IntLitExpr
+    FloatExpr = FloatExpr
+    BoolExpr = BoolExpr
+    StringExpr = StringExpr
+    # the text of an expression, a call's name is the text of what came before its (
+    text = str
+
+
+class Defined:
+    """
+    The functions a lazily parsed body can call: those defined before it and
+    imported or builtin ones, although the parser has seen more by the time
+    the body is parsed. Only needs to answer in.
+    """
+    __slots__ = ("functions", "order", "count")
+
+    def __init__(self, functions: Dict[str, str], order: Dict[str, int], count: int):
+        self.functions = functions  # every name the parser knows so far, it keeps adding to it
+        self.order = order  # function defined in the program -> how many were defined before it
+        self.count = count  # how many were defined before the body
+
+    def __contains__(self, id) -> bool:
+        return id in self.functions and self.order.get(id, -1) < self.count
+
+
+class Skimmed:
+    """
+    What a LazyFunctionDef needs to parse its body later: the tokens after
+    its { through the matching }, the names the body can see and whether
+    the program was checked or quickened before the body was parsed. The
+    tokens are kept without their lines, which are in an array of their own,
+    so that the parser can share one tuple between all the tokens that only
+    differ in their line.
+    """
+    __slots__ = ("tokens", "lines", "decls", "functions", "lookahead", "check", "quicken")
+
+    def __init__(self, tokens: list, lines: array, decls: dict, functions: Defined, lookahead: int):
+        self.tokens = tokens  # (kind, lexeme, value) of each token
+        self.lines = lines
+        self.decls = decls  # the parameters and the function's own name
+        self.functions = functions
+        self.lookahead = lookahead
+        self.check = False
+        self.quicken = False
+
+
+# the slots of FunctionDef, which LazyFunctionDef hides behind properties
+_DECLS, _STMTS = FunctionDef.decls, FunctionDef.stmts
+
+
+class LazyFunctionDef(FunctionDef):
+    """
+    A FunctionDef a lazy Parser only skimmed. Its body is parsed the first
+    time it is run or its decls or stmts are looked at, which turns it into
+    a plain FunctionDef. Until then it has no children, so walking the
+    program with children() doesn't reach the body, and the Skimmed is kept
+    where stmts will go.
+    """
+    __slots__ = ()
+
+    def __init__(self, t, id: str, params, skimmed: Skimmed, line: Optional[int] = None):
+        self.t = t
+        self.id = id
+        self.params = params
+        _DECLS.__set__(self, None)
+        _STMTS.__set__(self, skimmed)
+        self.line = line
+
+    @property
+    def decls(self):
+        return self.parse().decls
+
+    @property
+    def stmts(self):
+        return self.parse().stmts
+
+    def parse(self) -> FunctionDef:
+        skimmed = _STMTS.__get__(self)
+        tokens = [(kind, lexeme, line, value) for (kind, lexeme, value), line in zip(skimmed.tokens, skimmed.lines)]
+        tokens.append(("EOF", "EOF", skimmed.lines[-1], None))
+        parser = Parser(None, skimmed.lookahead, tokens)
+        decls = dict(skimmed.decls)
+        decl = parser.declarations(decls, skimmed.functions)
+        stmts = parser.stmts(decls, skimmed.functions)
+        if parser.currtok[0] != "RBRACE":
+            raise SLUCSyntaxError("ERROR: Unexpected token {0} on line {1}".format(
+                parser.currtok[1], parser.currtok[2]))
+        _DECLS.__set__(self, decl)
+        _STMTS.__set__(self, stmts)
+        self.__class__ = FunctionDef
+        try:
+            # the program measured itself without this body, so it runs with
+            # run_steps on its own if it is too deep for the recursive eval
+            if measure(self) > RECURSION_SAFE_HEIGHT:
+                self.__class__ = DeepFunctionDef
+            if skimmed.check:
+                self.check()
+            if skimmed.quicken:
+                self.quicken()
+        except Exception:
+            # stays unparsed, so the error comes up again the next time
+            self.__class__ = LazyFunctionDef
+            _DECLS.__set__(self, None)
+            _STMTS.__set__(self, skimmed)
+            raise
+        return self
+
+    def children(self):
+        return []
+
+    def check(self):
+        _STMTS.__get__(self).check = True
+
+    def quicken(self):
+        _STMTS.__get__(self).quicken = True
+
+    def eval(self, values, funcs):
+        return self.parse().eval(values, funcs)
+
+    def eval_steps(self, values, funcs):
+        return self.parse().eval_steps(values, funcs)
+
+
+class DeepFunctionDef(FunctionDef):
+    """
+    A lazily parsed function too deep for the recursive eval, which always
+    runs with run_steps
+    """
+    __slots__ = ()
+
+    def eval(self, values, funcs):
+        return run_steps(self.eval_steps(values, funcs))
 
-    def __init__(self, fn: str):
 
-        self.lex = Lexer(fn)
-        self.tg = self.lex.token_generator()
-        self.currtok = next(self.tg)
+class Parser:
+    # token kind -> (precedence, whether the operator can be chained)
+    # higher precedence binds tighter, all operators are left associative
+    binops = {"OR": (1, True),
+              "AND": (2, True),
+              "EQUALITY": (3, False), "NOT_EQUAL": (3, False),
+              "LESS_THAN": (4, False), "LESS_THAN_EQUAL": (4, False),
+              "GREATER_THAN": (4, False), "GREATER_THAN_EQUAL": (4, False),
+              "PLUS": (5, True), "MINUS": (5, True),
+              "MULT": (6, True), "DIVIDE": (6, True), "MOD": (6, True)}
+    # tokens a Statement can start with
+    stmt_start = {"ID", "{", "print", "return", ";", "if", "while", "for"}
+
+    # lookahead - how many tokens past currtok peek can see
+    # tokens - already lexed tokens to parse instead of lexing fn
+    # build - makes the nodes, Tree or an arena.Builder
+    # imports - called with the path and line of each import, returns the names and types of the
+    #           functions it brings in, see modules.Linker
+    # lazy - only skim function bodies, each is parsed the first time it runs, see LazyFunctionDef
+    # budget - limits for parsing a program nobody has looked at, every token consumed is a step
+    def __init__(self, fn: Optional[str], lookahead: int = 1, tokens: Optional[Iterable[tuple]] = None, build=Tree,
+                 imports: Optional[Callable[[str, int], Dict[str, str]]] = None, lazy: bool = False,
+                 budget: Optional[Budget] = None):
+        if lazy and build is not Tree:
+            raise ValueError("only trees can be parsed lazily")
+
+        if tokens is None:
+            self.lex = Lexer(fn)
+            self.tg = self.lex.token_generator()
+        else:
+            self.lex = None
+            self.tg = iter(tokens)
+        self.lookahead = lookahead
+        self.build = build
+        self.imports = imports
+        self.lazy = lazy
+        self.order = {}  # function defined in the program -> how many were defined before it
+        self.skimmed = {}  # (kind, lexeme, value) -> the one tuple skim keeps for all those tokens
+        self.buffer = deque()  # tokens peek has already pulled from the lexer
+        self.consumed = -1  # tokens advance has moved past, so loops can tell they got somewhere
+        self.budget = None
+        self.advance()
+        self.budget = budget
+
+    @classmethod
+    def from_source(cls, source, lookahead: int = 1, build=Tree, encoding: str = "utf-8",
+                    imports: Optional[Callable[[str, int], Dict[str, str]]] = None, lazy: bool = False,
+                    budget: Optional[Budget] = None) -> "Parser":
+        """
+        A Parser for a program held in a str, bytes, memoryview or stream
+        instead of a file, lexed as it is parsed
+        """
+        return cls(None, lookahead, Lexer.from_source(source, encoding).token_generator(), build, imports, lazy,
+                   budget)
+
+    def advance(self):
+        """
+        Moves currtok on to the next token
+        """
+        self.consumed += 1
+        if self.budget is not None:
+            self.budget.tick(self.currtok[2])
+        if self.buffer:
+            self.currtok = self.buffer.popleft()
+        else:
+            self.currtok = next(self.tg)
+
+    def peek(self, n: int = 1):
+        """
+        Returns the token n past currtok without consuming anything.
+        The lexer already classified it, so its kind is used as is.
+        """
+        if n < 1 or n > self.lookahead:
+            raise ValueError("can only peek 1 to {0} tokens ahead".format(self.lookahead))
+        while len(self.buffer) < n:
+            last = self.buffer[-1] if self.buffer else self.currtok
+            if last[0] == "EOF":
+                return last  # nothing comes after EOF
+            self.buffer.append(next(self.tg))
+        return self.buffer[n - 1]
 
     """
         Expr  →  Term { (+ | -) Term }
@@ -60,53 +294,118 @@ class Parser:
 
     def program(self):
         """
-            Program         →  { FunctionDef }
+            Program         →  { Import } { FunctionDef }
         """
-        functionDefDecls = {}
+        # builtins can be called like functions defined before everything else
+        functionDefDecls = {id: builtin.returns for id, builtin in BUILTINS.items()}
         functions = []
+        while self.currtok[:2] == ("import", "ID"):
+            self.importstmt(functionDefDecls)
         while self.currtok[0] != "EOF":
+            consumed = self.consumed
             if self.currtok[0] == "RBRACE":
-                self.currtok = next(self.tg)
+                self.advance()
+            if self.currtok[:2] == ("import", "ID"):
+                raise SLUCSyntaxError("ERROR: import after a function on line {0}, imports go first".format(
+                    self.currtok[2]))
             f = self.functionDef(functionDefDecls)
+            if self.consumed == consumed:
+                # functionDef gives up on a token it can't start a function with without
+                # moving past it, and this loop would go on asking it forever
+                raise SLUCSyntaxError("ERROR: Unexpected token {0} on line {1}".format(
+                    self.currtok[1], self.currtok[2]))
             functions.append(f)
         for i in range(len(functions)):
             if functions[i].id == "main":
                 functions.insert(0, functions.pop(i))
         functions = functions[:-1]
-        return Program(functions)
+        return self.build.Program(functions)
+
+    def importstmt(self, functionDefDecls):
+        """
+        Import          →  import stringlit ;
+        The functions the module exports can be called from here on.
+        """
+        line = self.currtok[2]
+        self.advance()
+        if self.currtok[1] != "STRING":
+            raise SLUCSyntaxError("ERROR: Missing module path on line {0}".format(line))
+        path = self.currtok[0][1:-1]
+        self.advance()
+        if self.currtok[0] != "SEMICOLON":
+            raise SLUCSyntaxError("ERROR: Missing semicolon on line {0}".format(line))
+        self.advance()
+        if self.imports is None:
+            raise SLUCSyntaxError("ERROR: Can't import {0} on line {1} without a linker".format(path, line))
+        functionDefDecls.update(self.imports(path, line))
 
     def functionDef(self, functionDefDecls):
         """
         FunctionDef     →  Type id ( Params ) { Declarations Statements }
         """
         decls = {}
+        line = self.currtok[2]
         try:
             t = self.type(decls, functionDefDecls)
         except SLUCInvalidTypeError:
-            return FunctionDef(None,None,None,None,None)
+            return self.build.FunctionDef(None,None,None,None,None)
         if self.currtok[1] == "ID":
             id = self.currtok[0]
+            if id in BUILTINS:
+                raise SLUCDuplicateReferenceError(
+                    "ERROR: {0} on line {1} is a builtin function".format(id, self.currtok[2]))
             decls[id] = t
-            self.currtok = next(self.tg)
+            self.advance()
         if self.currtok[1] == "(":
-            self.currtok = next(self.tg)
+            self.advance()
             parm = self.params(decls, functionDefDecls)
         else:
             raise SLUCSyntaxError("ERROR: Missing left parenthesis on line {0}".format(self.currtok[2]))
 
         if self.currtok[1] == ")":
-            self.currtok = next(self.tg)
+            self.advance()
         else:
             raise SLUCSyntaxError("ERROR: Missing right parenthesis on line {0}".format(self.currtok[2]))
 
-        if self.currtok[1] == "{":
-            self.currtok = next(self.tg)
+        if self.currtok[1] == "{" and self.lazy:
+            functions = Defined(functionDefDecls, self.order, len(self.order))
+            func = LazyFunctionDef(t, id, parm, Skimmed(*self.skim(), decls, functions, self.lookahead), line)
+        elif self.currtok[1] == "{":
+            self.advance()
             decl = self.declarations(decls, functionDefDecls)
             stmts = self.stmts(decls, functionDefDecls)
+            func = self.build.FunctionDef(t, id, parm, decl, stmts, line)
         else:
             raise SLUCSyntaxError("ERROR: Missing left brace on line {0}".format(self.currtok[2]))
+        if id not in functionDefDecls:
+            self.order[id] = len(self.order)
         functionDefDecls[id] = t
-        return FunctionDef(t, id, parm, decl, stmts)
+        return func
+
+    def skim(self):
+        """
+        The tokens of a function body from after its { through the } that
+        matches it without parsing them, as the tokens without their lines
+        and the lines, see Skimmed. Leaves currtok on that }, like parsing
+        the body does.
+        """
+        line = self.currtok[2]
+        tokens = []
+        lines = array("i")
+        depth = 1
+        while depth:
+            self.advance()
+            kind, lexeme, at, value = self.currtok
+            if kind == "EOF":
+                raise SLUCSyntaxError("ERROR: Missing right brace for the function on line {0}".format(line))
+            if kind == "LBRACE":
+                depth += 1
+            elif kind == "RBRACE":
+                depth -= 1
+            tok = (kind, lexeme, value)
+            tokens.append(self.skimmed.setdefault(tok, tok))
+            lines.append(at)
+        return tokens, lines
 
     def params(self, decls, functionDefDecls):
         """
@@ -116,17 +415,17 @@ class Parser:
         try:
             t = self.type(decls, functionDefDecls)
         except SLUCInvalidTypeError:
-            return Param(params)
+            return self.build.Param(params)
         if self.currtok[1] == "ID":
             id = self.currtok[0]
             if id in decls.keys():
                 raise SLUCDuplicateReferenceError(
                     "ERROR: {0} on line {1} is duplicately delcared.".format(id, self.currtok[2]))
             decls[id] = t
-            self.currtok = next(self.tg)
+            self.advance()
             params.append((t, id)) # used to be params.append((t, id))
             while self.currtok[1] == ",":
-                self.currtok = next(self.tg)
+                self.advance()
 
                 t = self.type(decls, functionDefDecls)
                 if self.currtok[1] == "ID":
@@ -135,9 +434,9 @@ class Parser:
                         raise SLUCDuplicateReferenceError(
                             "ERROR: {0} on line {1} is duplicately delcared.".format(id, self.currtok[2]))
                     decls[id] = t
-                    self.currtok = next(self.tg)
+                    self.advance()
                     params.append((t, id))
-        return Param(params)
+        return self.build.Param(params)
 
     def declarations(self, decls, functionDefDecls):
         """
@@ -148,7 +447,7 @@ class Parser:
             d = self.declaration(decls, functionDefDecls)
             decl_list.append(d)
 
-        return Declarations(decl_list)
+        return self.build.Declarations(decl_list)
 
     def declaration(self, decls, functionDefDecls):
         """
@@ -161,13 +460,13 @@ class Parser:
                 raise SLUCDuplicateReferenceError(
                     "ERROR: {0} on line {1} is duplicately delcared.".format(tmp[0], tmp[2]))
             decls[tmp[0]] = t
-            self.currtok = next(self.tg)
+            self.advance()
             if self.currtok[1] == ";":
-                self.currtok = next(self.tg)
+                self.advance()
             else:
                 raise SLUCSyntaxError("ERROR: Missing semicolon on line {0}".format(self.currtok[2]))
 
-            return Declaration(str(t), tmp[0])
+            return self.build.Declaration(str(t), tmp[0])
 
     def type(self, decls, functionDefDecls):
         """
@@ -175,115 +474,86 @@ class Parser:
         """
         if self.currtok[1] in {'int', 'bool', 'float'}:
             tmp = self.currtok[1]
-            self.currtok = next(self.tg)
+            self.advance()
             return tmp
         else:
             raise SLUCInvalidTypeError("ERROR: Invalid type on line number {0}.".format(self.currtok[2]))
 
-    def ifstmt(self, decls, functionDefDecls):
+    def condition(self, decls, functionDefDecls):
         """
-        IfStatement →  if ( Expression ) Statement [ else Statement ]
+        ( Expression ) of an IfStatement or WhileStatement
         """
-        if self.currtok[1] == "if":
-            self.currtok = next(self.tg)
-            if self.currtok[1] == "(":
-                self.currtok = next(self.tg)
-                exp = self.expression(decls, functionDefDecls)
-            else:
-                raise SLUCSyntaxError("ERROR: Missing left parenthesis on line {0}".format(self.currtok[2]))
-            if self.currtok[1] == ")":
-                self.currtok = next(self.tg)
-            else:
-                raise SLUCSyntaxError("ERROR: Missing right parenthesis on line {0}".format(self.currtok[2]))
-
-            s = self.stmt(decls, functionDefDecls)
-
-            if self.currtok[1] == "else":
-                self.currtok = next(self.tg)
-                if self.currtok[1] == "{":
-                    elseStmt = self.stmt(decls, functionDefDecls)
-
-                    return IfStmt(exp, s, elseStmt)
-            return IfStmt(exp, s)
+        if self.currtok[1] == "(":
+            self.advance()
+            exp = self.expression(decls, functionDefDecls)
+        else:
+            raise SLUCSyntaxError("ERROR: Missing left parenthesis on line {0}".format(self.currtok[2]))
+        if self.currtok[1] == ")":
+            self.advance()
+        else:
+            raise SLUCSyntaxError("ERROR: Missing right parenthesis on line {0}".format(self.currtok[2]))
+        return exp
 
     def returnstmt(self, decls, functionDefDecls):
         """
         ReturnStmt      →  return Expression ;
         """
+        line = self.currtok[2]
         if self.currtok[1] == "return":
-            self.currtok = next(self.tg)
+            self.advance()
             ret = self.expression(decls, functionDefDecls)
         if self.currtok[1] == ";":
-            self.currtok = next(self.tg)
-            return ReturnStmt(ret)
+            self.advance()
+            return self.build.ReturnStmt(ret, line)
         elif self.currtok[1] == "(":  # instead else raise exception
-            self.currtok = next(self.tg)
+            self.advance()
             params = []
             while self.currtok[1] != ")":
                 p = self.expression(decls, functionDefDecls)
                 params.append(p)
                 if self.currtok[1] == ",":
-                    self.currtok = next(self.tg)
-            self.currtok = next(self.tg)
-            funCall = FunctionCallExpr(str(ret), params)
+                    self.advance()
+            self.advance()
+            funCall = self.build.FunctionCallExpr(self.build.text(ret), params, line)
             if (self.currtok[1] == ";"):
-                self.currtok = next(self.tg)
-            return ReturnStmt(funCall)
+                self.advance()
+            return self.build.ReturnStmt(funCall, line)
         else:
             raise SLUCSyntaxError("ERROR: Missing semicolon on line {0}".format(self.currtok[2]))
 
-    def whilestmt(self, decls, functionDefDecls):
-        """
-        WhileStatement  →  while ( Expression ) Statement
-        """
-        if self.currtok[1] == "while":
-            self.currtok = next(self.tg)
-            if self.currtok[1] == "(":
-                self.currtok = next(self.tg)
-                exp = self.expression(decls, functionDefDecls)
-            else:
-                raise SLUCSyntaxError("ERROR: Missing left parenthesis on line {0}".format(self.currtok[2]))
-            if self.currtok[1] == ")":
-                self.currtok = next(self.tg)
-            else:
-                raise SLUCSyntaxError("ERROR: Missing right parenthesis on line {0}".format(self.currtok[2]))
-
-            s = self.stmt(decls, functionDefDecls)
-
-            return WhileStmt(exp, s)
-
     def assignment(self, decls, functionDefDecls):
         """
         Assignment →  id = Expression ;
         """
         if self.currtok[1] == "ID":
             id = self.currtok[0]
+            line = self.currtok[2]
             if id not in decls.keys():
-                if id not in functionDefDecls.keys():
+                if id not in functionDefDecls:
                     raise SLUCReferenceBeforeAssignment(
                         "ERROR: {0} is reference before assignment on line {1}".format(id, self.currtok[2]))
-            self.currtok = next(self.tg)
+            self.advance()
             if self.currtok[0] == "ASSIGNMENT":
-                self.currtok = next(self.tg)
+                self.advance()
                 expr = self.expression(decls, functionDefDecls)
             else:
                 raise SLUCSyntaxError("ERROR: Invalid assignment statement on line {0}".format(self.currtok[2]))
             if self.currtok[0] == "SEMICOLON":
-                self.currtok = next(self.tg)
-                return AssignStmt(str(id), expr)
+                self.advance()
+                return self.build.AssignStmt(str(id), expr, line)
             elif self.currtok[1] == "(": # instead else raise exception
-                self.currtok = next(self.tg)
+                self.advance()
                 params = []
                 while self.currtok[1] != ")":
                     p = self.expression(decls, functionDefDecls)
                     params.append(p)
                     if self.currtok[1] == ",":
-                        self.currtok = next(self.tg)
-                self.currtok = next(self.tg)
-                funCall = FunctionCallExpr(str(expr), params)
+                        self.advance()
+                self.advance()
+                funCall = self.build.FunctionCallExpr(self.build.text(expr), params, line)
                 if(self.currtok[1] == ";"):
-                    self.currtok = next(self.tg)
-                return AssignStmt(str(id), funCall)
+                    self.advance()
+                return self.build.AssignStmt(str(id), funCall, line)
 
         return self.printstmt(decls, functionDefDecls)
 
@@ -293,70 +563,165 @@ class Parser:
         """
         stmt_list = []
 
-        while self.currtok[1] in {"ID", "{", "print", "return", ";", "if", "while"}:
+        while self.currtok[1] in Parser.stmt_start:
             s = self.stmt(decls, functionDefDecls)
             stmt_list.append(s)
-        return Stmts(stmt_list)
-
-    def block(self, decls, functionDefDecls):
-        """
-        Block →  '{' Statements '}'
-        """
-        stmts_list = []
-        while self.currtok[0] != "RBRACE":
-            s = self.stmts(decls, functionDefDecls)
-            stmts_list.append(s)
-        self.currtok = next(self.tg)
-        return Stmts(stmts_list)
+        return self.build.Stmts(stmt_list)
 
     def stmt(self, decls, functionDefDecls):
         """
-        Statement → ; | Block | Assignment | IfStatement |
-                     WhileStatement |  PrintStmt | ReturnStmt
-        """
-        if self.currtok[0] == "SEMICOLON":
-            self.currtok = next(self.tg)
-
-        if self.currtok[0] == "LBRACE":
-            self.currtok = next(self.tg)
-            return self.block(decls, functionDefDecls)
-        if self.currtok[1] == "ID":
-            return self.assignment(decls, functionDefDecls)
-        if self.currtok[1] == "print":
-            return self.printstmt(decls, functionDefDecls)
-        if self.currtok[1] == "while":
-            return self.whilestmt(decls, functionDefDecls)
-        if self.currtok[1] == "return":
-            return self.returnstmt(decls, functionDefDecls)
-        if self.currtok[1] == "if":
-            return self.ifstmt(decls, functionDefDecls)
-
-        return self.printarg(decls, functionDefDecls)  # we thnk this is one of the lowest level function
+        Statement       →  ; | Block | Assignment | IfStatement |
+                           WhileStatement | ForStatement | PrintStmt | ReturnStmt
+        Block           →  '{' Statements '}'
+        IfStatement     →  if ( Expression ) Statement [ else Statement ]
+        WhileStatement  →  while ( Expression ) Statement
+        ForStatement    →  for ( id = Expression ; Expression ; id = Expression ) Statement
+        Statements nested inside blocks, ifs and loops are kept on an explicit
+        stack instead of recursing, so nesting depth is not limited by Python's
+        recursion limit.
+        """
+        # frames are ["block", statements, current Statements or None], ["if", condition, line],
+        # ["else", condition, statement, line], ["while", condition, line] and
+        # ["for", init, condition, update, line]
+        stack = []
+        while True:
+            s = None
+            if self.currtok[0] == "SEMICOLON":
+                self.advance()
+
+            if self.currtok[0] == "LBRACE":
+                self.advance()
+                stack.append(["block", [], None])
+            elif self.currtok[1] == "if":
+                line = self.currtok[2]
+                self.advance()
+                stack.append(["if", self.condition(decls, functionDefDecls), line])
+                continue
+            elif self.currtok[1] == "while":
+                line = self.currtok[2]
+                self.advance()
+                stack.append(["while", self.condition(decls, functionDefDecls), line])
+                continue
+            elif self.currtok[1] == "for":
+                line = self.currtok[2]
+                self.advance()
+                stack.append(["for"] + self.forheader(decls, functionDefDecls) + [line])
+                continue
+            elif self.currtok[1] == "ID":
+                s = self.assignment(decls, functionDefDecls)
+            elif self.currtok[1] == "print":
+                s = self.printstmt(decls, functionDefDecls)
+            elif self.currtok[1] == "return":
+                s = self.returnstmt(decls, functionDefDecls)
+            else:
+                s = self.printarg(decls, functionDefDecls)  # we thnk this is one of the lowest level function
+
+            # hand the finished statement to whatever is waiting for it
+            while True:
+                frame = stack[-1] if stack else None
+                if s is not None:
+                    if frame is None:
+                        return s
+                    if frame[0] == "while":
+                        stack.pop()
+                        s = self.build.WhileStmt(frame[1], s, frame[2])
+                        continue
+                    if frame[0] == "for":
+                        stack.pop()
+                        s = self.build.ForStmt(frame[1], frame[2], frame[3], s, frame[4])
+                        continue
+                    if frame[0] == "if":
+                        stack.pop()
+                        if self.currtok[1] == "else":
+                            self.advance()
+                            if self.currtok[1] == "{":
+                                stack.append(["else", frame[1], s, frame[2]])
+                                break
+                        s = self.build.IfStmt(frame[1], s, None, frame[2])
+                        continue
+                    if frame[0] == "else":
+                        stack.pop()
+                        s = self.build.IfStmt(frame[1], frame[2], s, frame[3])
+                        continue
+                    frame[2].append(s)
+                # frame is a block, keep reading its statements until the right brace
+                if frame[2] is not None:
+                    if self.currtok[1] in Parser.stmt_start:
+                        break
+                    frame[1].append(self.build.Stmts(frame[2]))
+                    frame[2] = None
+                if self.currtok[0] == "RBRACE":
+                    self.advance()
+                    stack.pop()
+                    s = self.build.Stmts(frame[1])
+                    continue
+                if self.currtok[1] not in Parser.stmt_start:
+                    raise SLUCSyntaxError("ERROR: Missing right brace on line {0}".format(self.currtok[2]))
+                frame[2] = []
+                break
+
+    def forheader(self, decls, functionDefDecls) -> list:
+        """
+        ( id = Expression ; Expression ; id = Expression ) of a for, returns
+        the first assignment, the condition and the second assignment
+        """
+        if self.currtok[1] != "(":
+            raise SLUCSyntaxError("ERROR: Missing left parenthesis on line {0}".format(self.currtok[2]))
+        self.advance()
+        init = self.forassignment(decls, functionDefDecls)
+        if self.currtok[0] != "SEMICOLON":
+            raise SLUCSyntaxError("ERROR: Missing semicolon on line {0}".format(self.currtok[2]))
+        self.advance()
+        cond = self.expression(decls, functionDefDecls)
+        if self.currtok[0] != "SEMICOLON":
+            raise SLUCSyntaxError("ERROR: Missing semicolon on line {0}".format(self.currtok[2]))
+        self.advance()
+        update = self.forassignment(decls, functionDefDecls)
+        if self.currtok[1] != ")":
+            raise SLUCSyntaxError("ERROR: Missing right parenthesis on line {0}".format(self.currtok[2]))
+        self.advance()
+        return [init, cond, update]
+
+    def forassignment(self, decls, functionDefDecls):
+        # id = Expression in a for, without a semicolon of its own
+        if self.currtok[1] != "ID":
+            raise SLUCSyntaxError("ERROR: Invalid assignment statement on line {0}".format(self.currtok[2]))
+        id = self.currtok[0]
+        line = self.currtok[2]
+        if id not in decls:
+            raise SLUCReferenceBeforeAssignment(
+                "ERROR: {0} is reference before assignment on line {1}".format(id, line))
+        self.advance()
+        if self.currtok[0] != "ASSIGNMENT":
+            raise SLUCSyntaxError("ERROR: Invalid assignment statement on line {0}".format(self.currtok[2]))
+        self.advance()
+        return self.build.AssignStmt(str(id), self.expression(decls, functionDefDecls), line)
 
     def printstmt(self, decls, functionDefDecls):
         """
         PrintStmt →  print(PrintArg { , PrintArg })
         """
         exprs = []
+        line = self.currtok[2]
         if self.currtok[1] == "print":
-            self.currtok = next(self.tg)
+            self.advance()
             if self.currtok[1] == "(":
-                self.currtok = next(self.tg)
+                self.advance()
                 parg = self.printarg(decls, functionDefDecls)
                 exprs.append(parg)
                 while self.currtok[1] == ",":
-                    self.currtok = next(self.tg)
+                    self.advance()
                     parg = self.printarg(decls, functionDefDecls)
                     exprs.append(parg)
             else:
                 raise SLUCSyntaxError("ERROR: Missing left parenthesis on line {0}".format(self.currtok[2]))
             if self.currtok[1] == ")":
-                self.currtok = next(self.tg)
+                self.advance()
             else:
                 raise SLUCSyntaxError("ERROR: Missing right parenthesis on line {0}".format(self.currtok[2]))
             if self.currtok[0] == "SEMICOLON":
-                self.currtok = next(self.tg)
-                return PrintStmt(exprs)
+                self.advance()
+                return self.build.PrintStmt(exprs, line)
             else:
                 raise SLUCSyntaxError("ERROR: Missing semicolon on line {0}".format(self.currtok[2] - 1))
 
@@ -369,168 +734,132 @@ class Parser:
 
         if self.currtok[1] == "STRING":
             tmp = self.currtok[0]
-            self.currtok = next(self.tg)
-            left = StringExpr(str(tmp))
-        elif self.currtok[0] in functionDefDecls:
+            self.advance()
+            left = self.build.StringExpr(str(tmp))
+        elif self.currtok[1] == "ID" and self.currtok[0] in functionDefDecls and self.peek()[1] == "(":
             id = self.currtok[0]
-            self.currtok = next(self.tg)
+            line = self.currtok[2]
+            self.advance()
             if self.currtok[1] == "(": # instead else raise exception
-                self.currtok = next(self.tg)
+                self.advance()
                 params = []
                 while self.currtok[1] != ")":
                     p = self.primary(decls, functionDefDecls)
                     params.append(p)
                     if self.currtok[1] == ",":
-                        self.currtok = next(self.tg)
-                funCall = FunctionCallExpr(id, params)
-                self.currtok = next(self.tg)
+                        self.advance()
+                funCall = self.build.FunctionCallExpr(id, params, line)
+                self.advance()
                 return funCall
         else:
             left = self.expression(decls, functionDefDecls)
 
         return left
 
-    def expression(self, decls, functionDefDecls):
-        """
-        Expression →  Conjunction { || Conjunction }
-        """
-        left = self.conjunction(decls, functionDefDecls)
-        while self.currtok[0] in {Lexer.tokensDict.get("||")}:
-            tmp = self.currtok
-            self.currtok = next(self.tg)  # advance to the next token
-            # because we matched a +
-            right = self.conjunction(decls, functionDefDecls)
-
-            left = BinaryExpr(str(tmp[1]), left, right)
-
-        return left
-
-    def conjunction(self, decls, functionDefDecls):
+    def expression(self, decls, functionDefDecls) -> Expr:
         """
+        Expression  →  Conjunction { || Conjunction }
         Conjunction →  Equality { && Equality }
-        """
-
-        left = self.equality(decls, functionDefDecls)
-        while self.currtok[0] in {Lexer.tokensDict.get("&&")}:
-            tmp = self.currtok
-            self.currtok = next(self.tg)  # advance to the next token
-            # because we matched a +
-            right = self.equality(decls, functionDefDecls)
-            left = BinaryExpr(str(tmp[1]), left, right)
-
-        return left
-
-    def equality(self, decls, functionDefDecls):
-        """
-        Equality →  Relation [ EquOp Relation ]
-        """
-        left = self.relation(decls, functionDefDecls)
-        if self.currtok[0] in {Lexer.tokensDict.get("=="), Lexer.tokensDict.get("!=")}:
-            tmp = self.currtok
-            self.currtok = next(self.tg)  # advance to the next token
-            # because we matched a +
-            right = self.relation(decls, functionDefDecls)
-            left = BinaryExpr(str(tmp[1]), left, right)
-
-        return left
-
-    def relation(self, decls, functionDefDecls):  # a < b
-        """
-        Relation  →  Addition [ RelOp Addition ]
-        """
-        left = self.addition(decls, functionDefDecls)
-
-        if self.currtok[0] in {Lexer.tokensDict.get(">"), Lexer.tokensDict.get("<"), Lexer.tokensDict.get(">="),
-                               Lexer.tokensDict.get("<=")}:
-            tmp = self.currtok
-            self.currtok = next(self.tg)  # advance to the next token
-            # because we matched a +
-            right = self.addition(decls, functionDefDecls)
-            left = BinaryExpr(str(tmp[1]), left, right)
-
-        return left
-
-    def addition(self, decls, functionDefDecls) -> Expr:
-        """
-        Addition →  Term { AddOp Term }
-        """
-
-        left = self.term(decls, functionDefDecls)
-        while str(self.currtok[0]) in {Lexer.tokensDict.get("+"), Lexer.tokensDict.get("-")}:
-            tmp = self.currtok
-            self.currtok = next(self.tg)  # advance to the next token
-            # because we matched a +
-            right = self.term(decls, functionDefDecls)
-            left = BinaryExpr(str(tmp[1]), left, right)
-
-        return left
-
-    def term(self, decls, functionDefDecls) -> Expr:
-        """
-        Term  → Fact { * Fact }
-        """
-        left = self.fact(decls, functionDefDecls)
-
-        while self.currtok[0] in {Lexer.tokensDict.get("*"), Lexer.tokensDict.get("/"), Lexer.tokensDict.get("%")}:
-            tmp = self.currtok
-            self.currtok = next(self.tg)
-            right = self.fact(decls, functionDefDecls)
-            left = BinaryExpr(str(tmp[1]), left, right)
-
-        return left
-
-    def fact(self, decls, functionDefDecls) -> Expr:
-        """
-        Fact  → [ UnaryOp ] Primary
-        """
-
-        if self.currtok[0] in {Lexer.tokensDict.get("-"), Lexer.tokensDict.get("!")}:
-            tmp = self.currtok[1]
-            self.currtok = next(self.tg)
+        Equality    →  Relation [ EquOp Relation ]
+        Relation    →  Addition [ RelOp Addition ]
+        Addition    →  Term { AddOp Term }
+        Term        →  Fact { MulOp Fact }
+        Precedence climbing over Parser.binops instead of one function per level.
+        Operands still waiting for their right side and open parentheses are kept
+        on an explicit stack, so deeply nested expressions don't recurse.
+        """
+        # frames are [min precedence, left, limit, (operator token, precedence, chains)]
+        # limit is set after an EquOp or RelOp since those don't chain
+        # ("(", unary sign) marks a parenthesized Primary
+        stack = [[1, None, None, None]]
+        while True:
+            # Fact  → [ UnaryOp ] Primary
+            sign = None
+            if self.currtok[0] in {"MINUS", "NOT"}:
+                sign = self.currtok[1]
+                self.advance()
+            if self.currtok[1] == "(":
+                self.advance()
+                stack.append(("(", sign))
+                stack.append([1, None, None, None])
+                continue
             tree = self.primary(decls, functionDefDecls)
-            return UnaryOp(tree, tmp)
-
-        return self.primary(decls, functionDefDecls)
+            if sign is not None:
+                tree = self.build.UnaryOp(tree, sign)
+
+            while True:
+                frame = stack[-1]
+                if type(frame) is tuple:
+                    if self.currtok[1] == ")":
+                        self.advance()
+                    else:
+                        # use the line number from your token object
+                        raise SLUCSyntaxError("ERROR: Missing right paren on line {0}".format(self.currtok[2]))
+                    stack.pop()
+                    if frame[1] is not None:
+                        tree = self.build.UnaryOp(tree, frame[1])
+                    continue
+                if frame[1] is None:
+                    frame[1] = tree
+                else:
+                    tmp, prec, chains = frame[3]
+                    frame[1] = self.build.BinaryExpr(str(tmp[1]), frame[1], tree)
+                    if not chains:
+                        frame[2] = prec
+                op = Parser.binops.get(self.currtok[0])
+                if op is not None:
+                    prec, chains = op
+                    if prec >= frame[0] and (frame[2] is None or prec < frame[2]):
+                        frame[3] = (self.currtok, prec, chains)
+                        self.advance()  # advance to the next token
+                        # everything on the right binds tighter since all of our operators are left associative
+                        stack.append([prec + 1, None, None, None])
+                        break
+                stack.pop()
+                tree = frame[1]
+                if not stack:
+                    return tree
 
     def primary(self, decls, functionDefDecls) -> Expr:
         """
         Primary  → id | intlit | floatlit | true | false | ( Expression )
         """
         if self.currtok[1] == "(":
-            self.currtok = next(self.tg)
+            self.advance()
             tree = self.expression(decls, functionDefDecls)
             if self.currtok[1] == ")":
-                self.currtok = next(self.tg)
+                self.advance()
                 return tree
             else:
                 # use the line number from your token object
                 raise SLUCSyntaxError("ERROR: Missing right paren on line {0}".format(self.currtok[2]))
 
-        if Lexer.is_numeric(self.currtok[0])[1] == "FLOAT":  # using ID in expression
+        # the lexer already worked out the kind and value of literals, so trust them
+        if self.currtok[1] == "FLOAT":
             tmp = self.currtok
-            self.currtok = next(self.tg)
-            return FloatExpr(str(tmp[0]))
-        # parse an ID
+            self.advance()
+            return self.build.FloatExpr(str(tmp[0]), tmp[3])
 
         if self.currtok[1] in {"true", "false"}:
             tmp = self.currtok
-            self.currtok = next(self.tg)
-            return BoolExpr(str(tmp[1]))
+            self.advance()
+            return self.build.BoolExpr(str(tmp[1]))
 
-        if Lexer.valid_ID(self.currtok[0])[1] == "ID":  # using ID in expression
+        # parse an ID
+        if self.currtok[1] == "ID":  # using ID in expression
             if self.currtok[0] not in decls.keys():
-                if self.currtok[0] not in functionDefDecls.keys():
+                if self.currtok[0] not in functionDefDecls:
                     raise SLUCReferenceBeforeAssignment(
                         "{0} reference before assignment on line {1}".format(self.currtok[0], self.currtok[2]))
             tmp = self.currtok
-            self.currtok = next(self.tg)
-            return IDExpr(str(tmp[0]))
-        # parse an integer literal
+            self.advance()
+            return self.build.IDExpr(str(tmp[0]))
 
-        if Lexer.is_numeric(self.currtok[0])[1] == "INTLIT":  # using ID in expression
+        # parse an integer literal
+        if self.currtok[1] == "INTLIT":
             tmp = self.currtok
-            self.currtok = next(self.tg)
-            return IntLitExpr(str(tmp[0]))
+            self.advance()
+            return self.build.IntLitExpr(str(tmp[0]), tmp[3])
 
         raise SLUCSyntaxError("ERROR: Unexpected token {0} on line {1}".format(self.currtok[1], self.currtok[2]))
 
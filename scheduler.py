@@ -0,0 +1,160 @@
+"""
+SLU-C scheduler
+Runs many programs side by side on one thread. Each run is a Program.coroutine
+that stops at every loop back-edge and function call, and the scheduler takes
+turns between the runs, giving each one a time slice before moving to the next.
+
+  scheduler = Scheduler()
+  a = scheduler.spawn(program)
+  b = scheduler.spawn(other, "fib", [20])
+  scheduler.run()               # or: await scheduler.run_async()
+  print(a.output, b.result)
+
+Turns go round in the order runs were spawned, so every run gets a slice
+once per round no matter how busy the others are. A slice can only end at a
+back-edge or call, so a run may go over its slice by one loop body.
+Print output of each run goes to its own output instead of stdout.
+"""
+import asyncio
+import sys
+import time
+from collections import deque
+from io import StringIO
+from typing import Optional, Sequence, Union
+
+from sluc_ast import Budget, Program
+
+
+class Run:
+    """
+    One program being run by a Scheduler
+    """
+
+    def __init__(self, name: str, steps):
+        self.name = name
+        self.steps = steps
+        self.stdout = StringIO()
+        self.done = False
+        self.result = None
+        self.error = None  # the exception the program stopped with, if any
+        self.slices = 0
+        self.seconds = 0.0  # time spent running, not waiting for a turn
+        self.waiting = []  # asyncio futures of wait()
+
+    @property
+    def output(self) -> str:
+        return self.stdout.getvalue()
+
+    def finish(self, result, error: Optional[Exception]):
+        self.done = True
+        self.result = result
+        self.error = error
+        self.steps = None
+        for future in self.waiting:
+            if not future.done():
+                if error is None:
+                    future.set_result(result)
+                else:
+                    future.set_exception(error)
+        self.waiting = []
+
+    def wait(self) -> "asyncio.Future":
+        """
+        A future for what the run returns, for use inside a running event loop
+        """
+        future = asyncio.get_running_loop().create_future()
+        if not self.done:
+            self.waiting.append(future)
+        elif self.error is None:
+            future.set_result(self.result)
+        else:
+            future.set_exception(self.error)
+        return future
+
+
+class Scheduler:
+    """
+    Round robin over the runs that haven't finished
+    """
+
+    def __init__(self, slice: float = 0.002):
+        self.slice = slice  # seconds each run gets per turn
+        self.ready = deque()
+        self.wakeup = None  # asyncio.Event for serve() while there's nothing to run
+
+    def spawn(self, program: Program, function: str = "main", args: Sequence[Union[int, float, bool]] = (),
+              budget: Optional[Budget] = None, name: Optional[str] = None) -> Run:
+        run = Run(name or function, program.coroutine(function, args, budget))
+        self.ready.append(run)
+        if self.wakeup is not None:
+            self.wakeup.set()
+        return run
+
+    def step(self) -> bool:
+        """
+        Gives the next run its slice, returns whether there are runs left
+        """
+        if not self.ready:
+            return False
+        run = self.ready.popleft()
+        stdout = sys.stdout
+        sys.stdout = run.stdout
+        started = time.perf_counter()
+        deadline = started + self.slice
+        try:
+            while True:
+                next(run.steps)
+                if time.perf_counter() >= deadline:
+                    break
+        except StopIteration as done:
+            run.finish(done.value, None)
+        except Exception as err:
+            # a failing program only stops its own run
+            run.finish(None, err)
+        finally:
+            sys.stdout = stdout
+            run.slices += 1
+            run.seconds += time.perf_counter() - started
+        if not run.done:
+            self.ready.append(run)
+        return bool(self.ready)
+
+    def run(self):
+        # until every run is done
+        while self.step():
+            pass
+
+    async def run_async(self):
+        # same as run but lets the event loop do its work between slices
+        while self.step():
+            await asyncio.sleep(0)
+
+    async def serve(self):
+        """
+        Keeps running whatever gets spawned until cancelled
+        """
+        self.wakeup = asyncio.Event()
+        try:
+            while True:
+                await self.run_async()
+                self.wakeup.clear()
+                if not self.ready:
+                    await self.wakeup.wait()
+        finally:
+            self.wakeup = None
+
+
+if __name__ == '__main__':
+    from parser import Parser
+    files = sys.argv[1:]  # scheduler.py file1 [file2 ...] runs the mains of all of them together
+    if not files:
+        print("usage: scheduler.py file [file ...]")
+        exit()
+    scheduler = Scheduler()
+    runs = [scheduler.spawn(Parser(fn).program(), name=fn) for fn in files]
+    scheduler.run()
+    for run in runs:
+        print("== {0} ({1} slices, {2:.1f} ms)".format(run.name, run.slices, run.seconds * 1000))
+        print(run.output, end="")
+        if run.error is not None:
+            print(run.error)
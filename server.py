@@ -0,0 +1,297 @@
+"""
+SLU-C interpreter server
+Keeps parsed programs warm in one long lived process so other services don't
+have to start Python and re-parse a program for every run.
+
+Clients connect to a Unix socket and send one JSON object per line:
+  {"op": "register", "name": "prog", "source": "int main() { ... }"}
+  {"op": "run", "name": "prog", "function": "main", "args": [],
+   "limits": {"steps": 1000000, "depth": 200, "seconds": 2.0}}
+  {"op": "unregister", "name": "prog"}
+  {"op": "metrics"}
+Each request gets one JSON line back with "ok" and either the result or an
+"error". Any "id" in a request is copied into its response, so a client can
+send several requests on one connection without waiting for each answer.
+
+Runs are held to the server's limits, LIMITS unless it was started with
+others. A request can set limits of its own in place of them but can't
+remove one. A run that goes over one answers with "limit" and "line"
+along with the error, so a stuck loop costs a worker a couple of seconds
+instead of forever. Sources longer than max_source characters aren't
+registered, and parsing one stops after parse_seconds the same way.
+"""
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from io import StringIO
+from typing import Dict, Optional
+
+from lexer import Lexer
+from sluc_ast import Budget, Program, SLUCInvalidTypeError, SLUCLimitError, runtime_error
+from parser import Parser, SLUCSyntaxError, SLUCReferenceBeforeAssignment, SLUCDuplicateReferenceError
+
+SLUC_ERRORS = (SLUCDuplicateReferenceError, SLUCReferenceBeforeAssignment, SLUCInvalidTypeError, SLUCSyntaxError)
+# characters a registered source may have and seconds its parse may take
+MAX_SOURCE = 1 << 20
+PARSE_SECONDS = 5.0
+# limits of every run, see Budget
+LIMITS = {"steps": 10 ** 7, "seconds": 2.0}
+
+
+class CapturedStdout:
+    """
+    Stand in for sys.stdout that sends print output of a worker thread to that
+    thread's own buffer, so concurrent runs don't mix their output.
+    Threads that aren't capturing write to the real stdout.
+    """
+
+    def __init__(self, stream):
+        self.stream = stream
+        self.local = threading.local()
+
+    def start(self):
+        self.local.buffer = StringIO()
+
+    def stop(self) -> str:
+        out = self.local.buffer.getvalue()
+        self.local.buffer = None
+        return out
+
+    def write(self, text):
+        buffer = getattr(self.local, "buffer", None)
+        if buffer is None:
+            return self.stream.write(text)
+        return buffer.write(text)
+
+    def flush(self):
+        self.stream.flush()
+
+
+class Latency:
+    """
+    Request latencies of one kind of request, the percentiles are over the most recent ones
+    """
+
+    def __init__(self, window: int = 1000):
+        self.count = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.recent = deque(maxlen=window)
+
+    def add(self, seconds: float, ok: bool):
+        self.count += 1
+        if not ok:
+            self.errors += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+        self.recent.append(seconds)
+
+    def report(self) -> Dict[str, float]:
+        recent = sorted(self.recent)
+
+        def percentile(p):
+            return recent[min(len(recent) - 1, int(p * len(recent)))] * 1000 if recent else 0.0
+
+        return {"count": self.count, "errors": self.errors,
+                "mean_ms": self.total / self.count * 1000 if self.count else 0.0,
+                "p50_ms": percentile(0.50), "p99_ms": percentile(0.99), "max_ms": self.max * 1000}
+
+
+class SLUCServer:
+    """
+    Holds the registered programs and runs them on a pool of worker threads
+    """
+
+    def __init__(self, path: str, workers: int = 4, limits: Optional[dict] = None, max_source: int = MAX_SOURCE,
+                 parse_seconds: float = PARSE_SECONDS):
+        self.path = path
+        self.limits = {**LIMITS, **(limits or {})}  # steps, depth and seconds, None for no limit
+        self.max_source = max_source
+        self.parse_seconds = parse_seconds
+        self.programs = {}  # name -> Program
+        self.pool = ThreadPoolExecutor(max_workers=workers)
+        # the lexer keeps its line number on the class, so only one lex at a time
+        self.lex_lock = threading.Lock()
+        self.latency = {}  # op -> Latency
+        self.stdout = None
+        self.server = None
+
+    async def start(self):
+        if not isinstance(sys.stdout, CapturedStdout):
+            sys.stdout = CapturedStdout(sys.stdout)
+        self.stdout = sys.stdout
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        self.server = await asyncio.start_unix_server(self.connection, path=self.path)
+
+    async def serve_forever(self):
+        await self.start()
+        async with self.server:
+            await self.server.serve_forever()
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+        self.pool.shutdown(wait=True)
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+
+    async def connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        write_lock = asyncio.Lock()
+        tasks = set()
+
+        async def answer(line: bytes):
+            response = await self.handle(line)
+            async with write_lock:
+                writer.write(json.dumps(response).encode("utf-8") + b"\n")
+                await writer.drain()
+
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                # every request gets its own task so a slow run doesn't hold up the next one
+                task = asyncio.ensure_future(answer(line))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.wait(tasks)
+        finally:
+            writer.close()
+
+    async def handle(self, line: bytes) -> dict:
+        started = time.perf_counter()
+        op = None
+        request_id = None
+        try:
+            request = json.loads(line)
+            request_id = request.get("id")
+            op = request.get("op")
+            if op == "register":
+                response = await self.register(request["name"], request["source"])
+            elif op == "run":
+                response = await self.run(request["name"], request.get("function", "main"), request.get("args", []),
+                                          request.get("limits"))
+            elif op == "unregister":
+                response = {"ok": self.programs.pop(request["name"], None) is not None}
+            elif op == "metrics":
+                response = {"ok": True, "programs": sorted(self.programs),
+                            "metrics": {name: lat.report() for name, lat in self.latency.items()}}
+            else:
+                response = {"ok": False, "error": "unknown op {0}".format(op)}
+        except SLUC_ERRORS as err:
+            response = {"ok": False, "error": str(err)}
+        except (ValueError, KeyError, TypeError, AttributeError) as err:
+            response = {"ok": False, "error": "bad request: {0}".format(err)}
+        if request_id is not None:
+            response["id"] = request_id
+        if op in {"register", "run"}:
+            self.latency.setdefault(op, Latency()).add(time.perf_counter() - started, response["ok"])
+        return response
+
+    async def register(self, name: str, source: str) -> dict:
+        if not isinstance(source, str):
+            raise TypeError("source is a {0}, not a str".format(type(source).__name__))
+        if len(source) > self.max_source:
+            return {"ok": False, "error": "source is {0} characters, at most {1} can be registered".format(
+                len(source), self.max_source)}
+        loop = asyncio.get_running_loop()
+        try:
+            program = await loop.run_in_executor(self.pool, self.parse, source)
+        except SLUCLimitError as err:
+            return {"ok": False, "error": str(err), "limit": err.limit, "line": err.line}
+        self.programs[name] = program
+        return {"ok": True, "functions": [func.id for func in program.funcs]}
+
+    def parse(self, source: str) -> Program:
+        # lexing takes as long as the source is, which register caps, so it can hold the
+        # lock. The parse runs on the tokens without it and can't hold up the next one
+        with self.lex_lock:
+            tokens = list(Lexer.from_source(source).token_generator())
+        program = Parser(None, tokens=tokens, budget=Budget(seconds=self.parse_seconds)).program()
+        program.quicken()  # done once here instead of on the first run
+        return program
+
+    async def run(self, name: str, function: str, args, limits: Optional[dict] = None) -> dict:
+        program = self.programs.get(name)
+        if program is None:
+            return {"ok": False, "error": "no program registered as {0}".format(name)}
+        budget = self.budget(limits)
+        loop = asyncio.get_running_loop()
+        result, output, error = await loop.run_in_executor(self.pool, self.execute, program, function, args, budget)
+        if isinstance(error, SLUCLimitError):
+            return {"ok": False, "error": str(error), "limit": error.limit, "line": error.line, "output": output}
+        if error is not None:
+            return {"ok": False, "error": error, "output": output}
+        return {"ok": True, "result": result, "output": output}
+
+    def budget(self, limits: Optional[dict]) -> Optional[Budget]:
+        # None in a request keeps the server's limit
+        limits = {**self.limits, **{limit: value for limit, value in (limits or {}).items() if value is not None}}
+        unknown = set(limits) - {"steps", "depth", "seconds"}
+        if unknown:
+            raise ValueError("unknown limits {0}".format(", ".join(sorted(unknown))))
+        if not any(value is not None for value in limits.values()):
+            return None
+        return Budget(**limits)
+
+    def execute(self, program: Program, function: str, args, budget: Optional[Budget] = None):
+        # runs on a worker thread, print output goes to this thread's buffer
+        self.stdout.start()
+        error = None
+        result = None
+        try:
+            result = program.call(function, args, budget)
+        except SLUCLimitError as err:
+            error = err
+        except SLUC_ERRORS as err:
+            error = str(err)
+        except Exception as err:
+            # whatever else the program raised, more than RUNTIME_ERRORS since a builtin
+            # registered by whoever runs the server may raise anything, is its own error and
+            # not a bad request, so it is answered with the output printed before it
+            error = runtime_error(err)
+        finally:
+            output = self.stdout.stop()
+        return result, output, error
+
+
+def request(path: str, message: dict) -> dict:
+    """
+    Sends one request to a running server and waits for its answer
+    """
+    import socket
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(path)
+        sock.sendall(json.dumps(message).encode("utf-8") + b"\n")
+        data = b""
+        while not data.endswith(b"\n"):
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            data += chunk
+    return json.loads(data)
+
+
+if __name__ == '__main__':
+    args = sys.argv[1:]  # server.py socket_path [workers [steps [seconds]]]
+    if len(args) not in {1, 2, 3, 4}:
+        print("usage: server.py socket_path [workers [steps [seconds]]]")
+        exit()
+    limits = dict(LIMITS)
+    if len(args) > 2:
+        limits["steps"] = int(args[2])
+    if len(args) > 3:
+        limits["seconds"] = float(args[3])
+    server = SLUCServer(args[0], int(args[1]) if len(args) > 1 else 4, limits)
+    try:
+        asyncio.run(server.serve_forever())
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,308 @@
+#!/usr/bin/env python3
+"""
+sluc - command line front end for SLU-C
+
+  sluc.py lex FILE       print the tokens of FILE
+  sluc.py parse FILE     print the program as parsed
+  sluc.py check FILE     type check FILE without running it
+  sluc.py run FILE       type check and run FILE
+
+run --max-steps, --max-depth and --timeout stop a program that loops or
+recurses for too long, reporting the line where it was stopped.
+run --inline copies small functions into their callers before running and
+says on stderr which calls were inlined and why the others weren't.
+run --cse saves expressions that are computed more than once in temporaries.
+run --tier starts out interpreting and compiles functions to Python once
+they have been called or looped in often enough, reporting each on stderr.
+run --arena parses into arena.Arena, arrays instead of node objects, and runs
+that, for programs too big to keep as a tree.
+run --lazy only skims each function body while parsing and parses it the
+first time it is called, for big programs that only run a few of their
+functions. Errors in a body, type errors too, then come up when it is first
+called instead of before running.
+run --coverage DIR counts how often each statement and branch runs and saves
+the counts to a new file in DIR, python sluc_coverage.py DIR adds up all the
+runs saved there and shows them per source line.
+run --trace prints every statement before it runs, every call and return and
+every assignment on stderr, see sluc_trace.py for hooks of your own.
+
+A FILE starting with imports is linked with the modules it imports, which
+are compiled once and kept in __slucache__ directories, see modules.py.
+
+lex and parse --format jsonl or binary write the tokens or the parsed
+program for other programs to read instead, see dump.py.
+
+--timings prints how long importing, lexing, parsing, type checking and
+running took on stderr. The lexer, parser and AST are only imported once a
+command needs them, so starting up stays cheap.
+--memory prints on stderr how much more memory each phase left allocated
+and the most that was allocated while it ran, as tracemalloc counts it,
+with the tokens lexed, the AST nodes parsed and the most calls that were
+going on at once. --memory-limit MB stops lexing, parsing or running once
+more than MB megabytes are allocated, says on which line, and prints the
+--memory report up to there.
+"""
+import sys
+import time
+
+START = time.perf_counter()
+MB = 2 ** 20
+
+
+class Timings:
+    """
+    Wall time of each phase in the order they ran. With memory, also the
+    bytes tracemalloc saw allocated at the end of each phase less those at
+    its start, the most allocated at once during it and what it made.
+    """
+
+    def __init__(self, memory: bool = False):
+        self.phases = []
+        self.memory = []
+        self.tracemalloc = None
+        if memory:
+            import tracemalloc
+            tracemalloc.start()
+            self.tracemalloc = tracemalloc
+            self.allocated = 0
+
+    def add(self, phase: str, started: float, made: str = "") -> float:
+        now = time.perf_counter()
+        self.phases.append((phase, now - started))
+        if self.tracemalloc is not None:
+            allocated, peak = self.tracemalloc.get_traced_memory()
+            self.tracemalloc.reset_peak()
+            self.memory.append((phase, allocated - self.allocated, peak, made))
+            self.allocated = allocated
+        return now
+
+    def report(self, out):
+        for phase, seconds in self.phases:
+            print("{0:<10}{1:9.2f} ms".format(phase, seconds * 1000), file=out)
+        print("{0:<10}{1:9.2f} ms".format("total", (time.perf_counter() - START) * 1000), file=out)
+
+    def report_memory(self, out):
+        print("{0:<10}{1:>12}{2:>12}".format("", "allocated", "peak"), file=out)
+        for phase, allocated, peak, made in self.memory:
+            print("{0:<10}{1:+9.2f} MB{2:9.2f} MB  {3}".format(phase, allocated / MB, peak / MB, made).rstrip(),
+                  file=out)
+
+
+def watched(tokens, budget):
+    # the tokens as they go by, stopping once more memory is allocated than budget allows
+    for n, tok in enumerate(tokens):
+        if not n % budget.CLOCK_EVERY:
+            budget.check_memory(tok[2])
+        yield tok
+
+
+def arguments(argv):
+    import argparse
+    ap = argparse.ArgumentParser(prog="sluc", description="SLU-C lexer, parser, type checker and interpreter")
+    ap.add_argument("--timings", action="store_true", help="report the time of each phase on stderr")
+    ap.add_argument("--memory", action="store_true", help="report the memory of each phase on stderr")
+    ap.add_argument("--memory-limit", type=float, metavar="MB",
+                    help="stop once more than this many megabytes are allocated")
+    sub = ap.add_subparsers(dest="command", required=True)
+    for name, text in [("lex", "print the tokens"), ("parse", "print the parsed program"),
+                       ("check", "type check without running"), ("run", "type check and run main")]:
+        cmd = sub.add_parser(name, help=text)
+        cmd.add_argument("file")
+        if name in ("lex", "parse"):
+            cmd.add_argument("--format", choices=("text", "jsonl", "binary"), default="text",
+                             help="jsonl or binary write a dump for other programs to read, see dump.py")
+        if name == "run":
+            cmd.add_argument("--no-check", action="store_true", help="skip the type check before running")
+            cmd.add_argument("--native", action="store_true", help="compile with the C backend and run that")
+            cmd.add_argument("--inline", action="store_true",
+                             help="inline small functions first and report each call on stderr")
+            cmd.add_argument("--cse", action="store_true",
+                             help="evaluate repeated expressions once and report the temporaries on stderr")
+            cmd.add_argument("--tier", action="store_true",
+                             help="compile hot functions to Python and report each one on stderr")
+            cmd.add_argument("--tier-at", type=int,
+                             help="calls and loop back-edges after which --tier compiles a function")
+            cmd.add_argument("--arena", action="store_true", help="parse into arrays instead of nodes and run those")
+            cmd.add_argument("--lazy", action="store_true",
+                             help="parse each function body only once it is first called")
+            cmd.add_argument("--coverage", metavar="DIR",
+                             help="count the statements and branches that run and save the counts in DIR")
+            cmd.add_argument("--trace", action="store_true",
+                             help="print each statement, call, return and assignment on stderr as it runs")
+            cmd.add_argument("--max-steps", type=int, help="stop after this many loop iterations and calls")
+            cmd.add_argument("--max-depth", type=int, help="stop when calls nest deeper than this")
+            cmd.add_argument("--timeout", type=float, help="stop after this many seconds")
+    args = ap.parse_args(argv)
+    if args.command == "run" and args.arena and (args.native or args.inline or args.cse or args.tier):
+        ap.error("--arena can't be used with --native, --inline, --cse or --tier")
+    if args.command == "run" and args.lazy and (args.native or args.arena or args.inline or args.cse):
+        ap.error("--lazy can't be used with --native, --arena, --inline or --cse")
+    if args.command == "run" and args.coverage is not None and (args.native or args.arena):
+        ap.error("--coverage can't be used with --native or --arena")
+    if args.command == "run" and args.trace and (args.native or args.arena or args.tier):
+        ap.error("--trace can't be used with --native, --arena or --tier")
+    return args
+
+
+def main(argv=None) -> int:
+    args = arguments(sys.argv[1:] if argv is None else argv)
+    timings = Timings(args.memory or args.memory_limit is not None)
+
+    t = START
+    from lexer import Lexer, SLUCSourceError
+    lex_errors = (SLUCSourceError,)
+    if args.command != "lex":
+        from parser import Parser, SLUCSyntaxError, SLUCReferenceBeforeAssignment, SLUCDuplicateReferenceError
+        from sluc_ast import Budget, RUNTIME_ERRORS, SLUCInvalidTypeError, SLUCLimitError, runtime_error, unparse
+        errors = (SLUCSyntaxError, SLUCReferenceBeforeAssignment, SLUCDuplicateReferenceError, SLUCInvalidTypeError,
+                  SLUCLimitError)
+    limit = None
+    if args.memory_limit is not None:
+        from sluc_ast import Budget, SLUCLimitError
+        # only checks memory, on the tokens going by while lexing and parsing
+        limit = Budget(memory=int(args.memory_limit * MB))
+        lex_errors += (SLUCLimitError,)
+    t = timings.add("import", t)
+
+    status = 0
+    try:
+        tokens = Lexer(args.file).token_generator()
+        tokens = list(tokens if limit is None else watched(tokens, limit))
+    except lex_errors as err:
+        print(err)
+        tokens = None
+        status = 1
+        timings.add("(stopped)", t)
+    else:
+        t = timings.add("lex", t, "{0} tokens".format(len(tokens)))
+
+    if tokens is None:
+        pass
+    elif args.command == "lex":
+        if args.format == "text":
+            for tok in tokens:
+                Lexer.my_print(tok)
+        else:
+            from dump import write_tokens
+            sys.stdout.flush()
+            write_tokens(tokens, sys.stdout.buffer, args.format)
+        timings.add("write", t)
+    else:
+        try:
+            imports = None
+            if tokens[0][:2] == ("import", "ID"):
+                from modules import Linker, SLUCImportError
+                errors += (SLUCImportError,)
+                imports = Linker().imports(args.file)
+            if limit is not None:
+                tokens = watched(tokens, limit)
+            # a dump is written from an arena, so there is no tree to make first
+            arena = args.command == "run" and args.arena or args.command == "parse" and args.format != "text"
+            if arena:
+                from arena import Builder, from_tree, to_tree
+                program = Parser(None, tokens=tokens, build=Builder(), imports=imports).program()
+            else:
+                lazy = args.command == "run" and args.lazy
+                program = Parser(None, tokens=tokens, imports=imports, lazy=lazy).program()
+            del tokens
+            made = ""
+            if timings.tracemalloc is not None:
+                from astsize import count
+                made = "{0} nodes".format(count(program))
+            t = timings.add("parse", t, made)
+            if imports is not None:
+                if arena:
+                    program = from_tree(imports.linker.link(to_tree(program), imports))
+                else:
+                    program = imports.linker.link(program, imports)
+                t = timings.add("link", t)
+            if args.command == "run" and args.inline:
+                from optimize import inline
+                for decision in inline(program):
+                    print(decision, file=sys.stderr)
+                t = timings.add("inline", t)
+            if args.command == "run" and args.cse:
+                from optimize import cse
+                for temporary in cse(program):
+                    print(temporary, file=sys.stderr)
+                t = timings.add("cse", t)
+            if args.command == "parse":
+                if args.format == "text":
+                    unparse(program, sys.stdout)
+                else:
+                    from dump import write_ast
+                    sys.stdout.flush()
+                    write_ast(program, sys.stdout.buffer, args.format)
+                t = timings.add("write", t)
+            elif args.command == "check" or not args.no_check:
+                # the checks are only written for trees, an arena is checked as one
+                (to_tree(program) if arena else program).check()
+                t = timings.add("typecheck", t)
+                if args.command == "check":
+                    print("{0}: ok".format(args.file))
+            if args.command == "run":
+                budget = None
+                if args.native:
+                    from codegen import run_native, SLUCCodegenError
+                    try:
+                        output, error, status = run_native(program)
+                    except SLUCCodegenError as err:
+                        output, error, status = str(err) + "\n", "", 1
+                    print(output, end="")
+                    # what slu_fail stopped the program with
+                    sys.stdout.flush()
+                    print(error, end="", file=sys.stderr)
+                else:
+                    memory = None if limit is None else limit.max_memory
+                    if (args.max_steps, args.max_depth, args.timeout, memory) != (None, None, None, None):
+                        budget = Budget(args.max_steps, args.max_depth, args.timeout, memory)
+                    elif timings.tracemalloc is not None:
+                        # no limits, only there to count the calls going on at once
+                        budget = Budget()
+                    counters = None
+                    if args.coverage is not None:
+                        import os
+                        from sluc_coverage import CoverageData, instrument
+                        counters = instrument(program, os.path.abspath(args.file))
+                    if args.trace:
+                        from sluc_trace import Printer
+                        Printer(sys.stderr).hooks().attach(program)
+                    try:
+                        if args.tier:
+                            from tiering import Tiers, TIER_UP_AT
+                            tiers = Tiers(program, TIER_UP_AT if args.tier_at is None else args.tier_at)
+                            try:
+                                program.eval(budget=budget, tiers=tiers)
+                            finally:
+                                sys.stdout.flush()
+                                for event in tiers.log:
+                                    print(event, file=sys.stderr)
+                        else:
+                            program.eval(budget=budget)
+                    finally:
+                        # what ran before an error counts too
+                        if counters is not None:
+                            data = CoverageData()
+                            data.add(counters)
+                            data.save(args.coverage)
+                t = timings.add("eval", t, "" if budget is None else "at most {0} frames live".format(budget.deepest))
+        except errors as err:
+            print(err)
+            status = 1
+            timings.add("(stopped)", t)
+        except RUNTIME_ERRORS as err:
+            # what the program did wrong while running, one line like the errors above
+            print(runtime_error(err))
+            status = 1
+            timings.add("(stopped)", t)
+
+    sys.stdout.flush()
+    if args.timings:
+        timings.report(sys.stderr)
+    if args.memory or status and limit is not None:
+        timings.report_memory(sys.stderr)
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,2073 @@
+"""
+SLU-C Abstract Syntax Trees
+An abstract syntax tree (AST) is a data structure that represents
+the concrete (text) syntax of a program
+"""
+import io
+import math
+import operator
+import time
+from types import MappingProxyType
+from typing import Sequence, Union, Optional, Tuple
+# Use a class hierarchy to represent types.
+
+
+"""
+Program → { Import } { FunctionDef }
+ Import → import stringlit ;
+ FunctionDef → Type id ( Params ) { Declarations Statements }
+ Params → Type id { , Type id } | ε
+ Declarations → { Declaration }
+ Declaration → Type Identifier ;
+ Type → int | bool | float
+ Statements → { Statement }
+ Statement → ; | Block | Assignment | IfStatement | WhileStatement
+ | ForStatement | PrintStmt | ReturnStmt
+ ReturnStmt → return Expression ;
+ Block → { Statements }
+ Assignment → id = Expression ;
+ IfStatement → if ( Expression ) Statement [ else Statement ]
+ WhileStatement → while ( Expression ) Statement
+ ForStatement → for ( id = Expression ; Expression ; id = Expression ) Statement
+ PrintStmt → print( PrintArg { , PrintArg })
+ PrintArg → Expression | stringlit
+ Expression → Conjunction { || Conjunction }
+ Conjunction → Equality { && Equality }
+ Equality → Relation [ EquOp Relation ]
+ Relation → Addition [ RelOp Addition ]
+ Addition → Term { AddOp Term }
+ Term → Factor { MulOp Factor }
+ Factor → [ UnaryOp ] Primary
+ UnaryOp → - | !
+ Primary → id | intlit | floatlit | true | false | ( Expression )
+ RelOp → < | <= | > | >=
+ AddOp → + | -
+ MulOp → * | / | %
+ EquOp → == | !=
+// Test #1 Euler project proble
+"""
+
+
+# SLU-C type names and the Python types of their values, shared by every node
+TYPES = {"int": int, "float": float, "bool": bool}
+TYPENAMES = {int: "int", float: "float", bool: "bool"}
+
+# what BinaryExpr does for each operator when it isn't specialized
+BINARY_OPS = {"+": operator.add, "-": operator.sub, "*": operator.mul, "/": operator.truediv, "%": operator.mod,
+              "<": operator.lt, "<=": operator.le, ">": operator.gt, ">=": operator.ge,
+              "==": operator.eq, "!=": operator.ne,
+              "&&": lambda x, y: x and y, "||": lambda x, y: x or y}
+
+
+def checktypes(op: str, left, right) -> type:
+    """
+    Type of a BinaryExpr with operator op given the types of both sides,
+    raises SLUCInvalidTypeError if op can't take them
+    """
+    if op in {"&&", "||"}:
+        if left == bool and right == bool:
+            return bool
+        else:
+            raise SLUCInvalidTypeError("ERROR: Type Error")
+    if op in {"<=", "<", ">", ">=", "!=", "=="}:
+        if left == bool and (right == float or right == int):
+            raise SLUCInvalidTypeError("ERROR: Type Error")
+        elif right == bool and (left == float or left == int):
+            raise SLUCInvalidTypeError("ERROR: Type Error")
+        else:
+            return bool
+
+    if op in {"+", "*", "-", "%", "/"}:
+
+        if left == bool or right == bool:
+            raise SLUCInvalidTypeError("ERROR: Type Error")
+        if left == float or right == float:
+            return float
+        # if op == "/" and (self.left.eval(env) % self.right.eval(env) != 0):
+        #     return float
+        return int
+
+
+# programs nested deeper than this are run with run_steps instead of recursive
+# eval so they don't hit Python's recursion limit
+RECURSION_SAFE_HEIGHT = 200
+
+
+def run_steps(steps):
+    """
+    Runs one of the *_steps generators on an explicit stack. Whenever a generator
+    yields another generator that one is run first and its result is sent back,
+    so the Python stack stays flat no matter how deep the tree is.
+    """
+    stack = [steps]
+    value = None
+    while stack:
+        try:
+            child = stack[-1].send(value)
+        except StopIteration as done:
+            stack.pop()
+            value = done.value
+        else:
+            stack.append(child)
+            value = None
+    return value
+
+
+# what the *_steps generators of a pausing run yield at loop back-edges and calls
+PAUSE = object()
+
+
+def run_paused(steps):
+    """
+    run_steps as a generator that stops each time the program yields PAUSE.
+    next() runs the program up to its next loop back-edge or call and the
+    StopIteration at the end carries what it returned.
+    """
+    stack = [steps]
+    value = None
+    while stack:
+        try:
+            child = stack[-1].send(value)
+        except StopIteration as done:
+            stack.pop()
+            value = done.value
+        else:
+            value = None
+            if child is PAUSE:
+                yield
+            else:
+                stack.append(child)
+    return value
+
+
+def unparse(node, out, indent: str = "    "):
+    """
+    Writes node to the text stream out as SLU-C source. Each node hands back
+    the pieces it is made of, text and (child, margin) pairs, and they are
+    written off a stack instead of being joined up, so this takes time linear
+    in what it writes and doesn't recurse however deep the program is.
+    """
+    stack = [(node, "")]
+    while stack:
+        piece = stack.pop()
+        if type(piece) is str:
+            out.write(piece)
+        else:
+            child, margin = piece
+            stack.extend(reversed(child.pieces(margin, indent)))
+
+
+def text(node) -> str:
+    # what unparse writes for node, as a string
+    out = io.StringIO()
+    unparse(node, out)
+    return out.getvalue()
+
+
+def body_pieces(stmt, margin: str, indent: str, braces: bool = False) -> list:
+    # pieces of the body of an if, else or while, from just after its ) to
+    # its closing brace, or through the end of its only statement if it has no braces
+    if isinstance(stmt, Stmts):
+        return [" {\n"] + stmt.inside(margin + indent) + [margin, "}"]
+    if braces:
+        return [" {\n", (stmt, margin + indent), margin, "}"]
+    return ["\n", (stmt, margin + indent)]
+
+
+class Budget:
+    """
+    Limits for running a program nobody has looked at: how many steps it may
+    take, how deep its calls may go, how many seconds it may run and how many
+    bytes may be allocated. A step is one trip around a while loop or one
+    function call, those are the only places the limits are checked so the
+    checks stay cheap. Hitting a limit raises SLUCLimitError with the line of
+    the loop or call. Allocations are counted by tracemalloc, which is started
+    for a memory limit if nothing else started it, and count everything this
+    process allocated, not only what the run did.
+    """
+    # reading the clock or the memory costs more than the rest of a check, so only every this many steps
+    CLOCK_EVERY = 1024
+
+    def __init__(self, steps: Optional[int] = None, depth: Optional[int] = None, seconds: Optional[float] = None,
+                 memory: Optional[int] = None):
+        self.max_steps = steps
+        self.max_depth = depth
+        self.max_seconds = seconds
+        self.max_memory = memory
+        self.start()
+
+    def start(self):
+        self.steps = 0
+        self.depth = 0
+        self.deepest = 0  # most calls that were going on at once
+        self.steps_left = float("inf") if self.max_steps is None else self.max_steps
+        self.depth_left = float("inf") if self.max_depth is None else self.max_depth
+        self.deadline = float("inf") if self.max_seconds is None else time.perf_counter() + self.max_seconds
+        if self.max_memory is not None:
+            # imported here so the programs that don't need it don't load it
+            import tracemalloc
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+
+    def tick(self, line):
+        # one loop back-edge or function entry
+        self.steps += 1
+        self.steps_left -= 1
+        if self.steps_left < 0:
+            raise SLUCLimitError("steps", self.max_steps, line)
+        if not self.steps % Budget.CLOCK_EVERY:
+            if time.perf_counter() > self.deadline:
+                raise SLUCLimitError("seconds", self.max_seconds, line)
+            if self.max_memory is not None:
+                self.check_memory(line)
+
+    def check_memory(self, line):
+        # for the places that aren't steps, lexing and parsing
+        import tracemalloc
+        if tracemalloc.get_traced_memory()[0] > self.max_memory:
+            raise SLUCLimitError("memory", self.max_memory, line)
+
+    def enter(self, line):
+        self.tick(line)
+        self.depth += 1
+        self.depth_left -= 1
+        if self.depth_left < 0:
+            self.depth -= 1
+            self.depth_left += 1
+            raise SLUCLimitError("depth", self.max_depth, line)
+        if self.depth > self.deepest:
+            self.deepest = self.depth
+
+    def leave(self):
+        self.depth -= 1
+        self.depth_left += 1
+
+
+class RunFuncs(list):
+    """
+    The function list handed to eval for a run with a Budget, one that pauses
+    or a tiered one (see tiering.Tiers). It already goes everywhere eval does,
+    so loops and calls find the settings on it without eval growing another
+    argument, and plain runs pay a couple of getattrs per loop.
+    """
+
+    def __init__(self, funcs, budget: Optional[Budget] = None, pause: bool = False, tiers=None):
+        list.__init__(self, funcs)
+        self.budget = budget
+        self.pause = pause
+        self.tiers = tiers
+
+
+def measure(node) -> int:
+    """
+    Works out the nesting depth of every node under node, walking with a list
+    instead of recursion. Subtrees that are shallow enough and don't call a
+    function or loop are marked shallow so the *_steps methods can use the
+    recursive eval for them. Calls and loops are where a pausing run stops, so
+    they always go through the *_steps methods.
+    """
+    stack = [(node, False)]
+    while stack:
+        n, visited = stack.pop()
+        if not visited:
+            stack.append((n, True))
+            stack.extend((child, False) for child in n.children())
+            continue
+        kids = n.children()
+        n.depth = 1 + max((child.depth for child in kids), default=0)
+        n.shallow = (n.depth <= RECURSION_SAFE_HEIGHT and not isinstance(n, (FunctionCallExpr, FunctionDef, WhileStmt))
+                     and all(child.shallow for child in kids))
+    return node.depth
+
+
+def quicken_stmts(stmts, typeEnv):
+    # quicken recurses, so in deep functions only the statements that are
+    # shallow enough get quickened (depth comes from measure)
+    stack = [stmts]
+    while stack:
+        stmt = stack.pop()
+        if stmt.depth <= RECURSION_SAFE_HEIGHT:
+            stmt.quicken(typeEnv)
+        else:
+            stack.extend(child for child in stmt.children() if isinstance(child, Stmt))
+
+
+class Expr:
+    """
+    Base class for expressions
+    """
+    # depth and shallow are filled in by measure
+    __slots__ = ("depth", "shallow")
+
+    def children(self):
+        return []
+
+    # the *_steps methods are the versions of eval, typeof and __str__ for run_steps,
+    # leaves don't have anything to recurse into so they can just call the normal ones
+    def eval_steps(self, env, funcs, checked=False):
+        return self.eval(env, funcs)
+        yield
+
+    def typeof_steps(self, env):
+        return self.typeof(env)
+        yield
+
+    def __str__(self):
+        return text(self)
+
+    def pieces(self, margin: str, indent: str) -> list:
+        # leaves are their own text
+        return [str(self)]
+
+
+class FunctionDef:
+    __slots__ = ("t", "id", "params", "decls", "stmts", "line", "depth", "shallow")
+
+    def __init__(self, t, id: Expr, params, decls, stmts, line: Optional[int] = None):
+        # provide type hints for all of the parameters
+        # Decls should be a dictionary
+        # Key: id
+        # Value: Type
+        self.t = t
+        self.id = id
+        self.params = params
+        self.decls = decls
+        self.stmts = stmts
+        self.line = line
+
+    def typecheck(self, env_value, envtype, funcs):
+        # tyecheck each statement
+
+        self.stmts.typecheck(env_value,envtype, funcs)
+
+    def typecheck_steps(self, env_value, envtype, funcs):
+        yield self.stmts.typecheck_steps(env_value, envtype, funcs)
+
+    def check(self):
+        """
+        Type checks the whole body without running it, using only the declared
+        types. Unlike typecheck this also looks inside ifs and whiles.
+        """
+        typeEnv = {**self.params.buildDict(), **self.decls.buildDict()}
+        stack = [self.stmts]
+        try:
+            while stack:
+                node = stack.pop()
+                if isinstance(node, AssignStmt):
+                    right = run_steps(node.expr.typeof_steps(typeEnv))
+                    if right is not None:
+                        node.checktype(right, typeEnv)
+                elif isinstance(node, (IfStmt, WhileStmt, ReturnStmt)):
+                    run_steps(node.expr.typeof_steps(typeEnv))
+                elif isinstance(node, PrintStmt):
+                    for arg in node.printarg:
+                        run_steps(arg.typeof_steps(typeEnv))
+                stack.extend(child for child in node.children() if isinstance(child, Stmt))
+        except KeyError as err:
+            raise SLUCInvalidTypeError("ERROR: {0} is not a variable in {1}".format(err.args[0], self.id))
+
+    def children(self):
+        return [self.stmts]
+
+    def quicken(self):
+        # the declared types of params and locals are all we know before running,
+        # so the specialized nodes are picked from those
+        quicken_stmts(self.stmts, {**self.params.buildDict(), **self.decls.buildDict()})
+
+    def __str__(self):
+        return text(self)
+
+    def pieces(self, margin: str, indent: str) -> list:
+        inner = margin + indent
+        out = [margin, "{0} {1}({2}) {{\n".format(self.t, self.id, self.params)]
+        out.extend(inner + str(decl) + "\n" for decl in self.decls.decls)
+        out.extend(self.stmts.inside(inner))
+        out.append(margin + "}\n")
+        return out
+
+    def eval(self,values ,funcs) -> Union[int, float, bool]:
+        # an environment maps identifiers to values
+        # parameters or local variables
+        # to evaluate a function you evaluate all of the statements
+        # within the environment
+        declsDict = self.decls.buildDict()
+        paramsDict = self.params.buildDict()
+        typeEnv = {**paramsDict,**declsDict} # building a different enviornment 
+        env = {} # create the environment for a new function
+        retVal = None # return value starts as None
+        env = {self.params.buildList()[i]: values[i] for i in range(len(self.params.buildList()))}
+        # puts all the params in an new function. for main it just starts as empty
+        if self.decls:
+            self.decls.eval(env) # eval ends up putting all the declarations in the enviornment
+        if self.params:
+            self.params.eval(env) # same with params
+        if self.stmts:
+            retVal = self.stmts.eval(env, funcs) # if there is a return value we save it. We eval the other statment regardless
+            self.typecheck(env, typeEnv, funcs) # type check everything
+            return retVal # return the return value.
+
+    def eval_steps(self, values, funcs):
+        # same as eval but for run_steps
+        typeEnv = {**self.params.buildDict(), **self.decls.buildDict()}
+        retVal = None
+        env = {self.params.buildList()[i]: values[i] for i in range(len(self.params.buildList()))}
+        if self.decls:
+            self.decls.eval(env)
+        if self.params:
+            self.params.eval(env)
+        if self.stmts:
+            retVal = yield self.stmts.eval_steps(env, funcs)
+            yield self.typecheck_steps(env, typeEnv, funcs)
+            return retVal
+
+
+
+
+
+
+class Program:
+
+    def __init__(self, funcs: Sequence[FunctionDef]):
+        self.funcs = funcs
+        self.quickened = False
+        self.deep = None
+
+    def __str__(self):
+        return text(self)
+
+    def pieces(self, margin: str, indent: str) -> list:
+        # the parser puts main first, but functions have to be defined before
+        # they are called, so main goes back to the end
+        funcs = list(self.funcs)
+        if funcs and funcs[0].id == "main":
+            funcs.append(funcs.pop(0))
+        out = []
+        for func in funcs:
+            if out:
+                out.append("\n")
+            out.append((func, margin))
+        return out
+
+    def children(self):
+        return list(self.funcs)
+
+    def isdeep(self) -> bool:
+        # too deep for the recursive eval, only needs to be worked out once
+        if self.deep is None:
+            self.deep = measure(self) > RECURSION_SAFE_HEIGHT
+        return self.deep
+
+    def quicken(self):
+        # rewrite generic nodes into type specialized ones, only needs to happen once
+        if not self.quickened:
+            self.isdeep()
+            for func in self.funcs:
+                func.quicken()
+            self.quickened = True
+
+    def eval(self, quicken: bool = True, budget: Optional[Budget] = None, tiers=None):
+        if quicken:
+            self.quicken()
+        # we know from how we built our parser that the first function is always main so we just eval that to start
+        # regardless of where it appears in our file
+        self.run(self.funcs[0], [], budget, tiers)
+
+    def run(self, func, args, budget: Optional[Budget] = None, tiers=None):
+        funcs = self.funcs
+        if budget is not None:
+            budget.start()
+            budget.enter(func.line)
+            funcs = RunFuncs(funcs, budget)
+        if self.isdeep():
+            return run_steps(func.eval_steps(list(args), funcs))
+        if tiers is not None:
+            # calls go to the tiers' stand-ins, which switch to compiled code once a function is hot
+            funcs = RunFuncs(tiers.functions, budget, tiers=tiers)
+            func = tiers.function(func)
+        return func.eval(list(args), funcs)
+
+    def coroutine(self, id: str = "main", args: Sequence[Union[int, float, bool]] = (),
+                  budget: Optional[Budget] = None):
+        """
+        Like call but returns a generator that runs the function a bit at a
+        time. Every next() goes on to the next loop back-edge or call, and the
+        value the function returned comes back in the final StopIteration.
+        """
+        self.quicken()
+        func = self.function(id, args)
+        if budget is not None:
+            budget.start()
+            budget.enter(func.line)
+        return run_paused(func.eval_steps(list(args), RunFuncs(self.funcs, budget, True)))
+
+    def check(self):
+        # type check every function without running anything
+        for func in self.funcs:
+            func.check()
+
+    def call(self, id: str, args: Sequence[Union[int, float, bool]] = (), budget: Optional[Budget] = None,
+             tiers=None):
+        """
+        Runs the function called id with args and returns what it returns,
+        so programs can be used for more than just their main
+        """
+        self.quicken()
+        return self.run(self.function(id, args), args, budget, tiers)
+
+    def function(self, id: str, args) -> FunctionDef:
+        # the function called id, if args are the right number of arguments for it
+        for func in self.funcs:
+            if func.id == id:
+                if len(args) != len(func.params.params):
+                    raise SLUCInvalidTypeError("ERROR: {0} takes {1} arguments but got {2}".format(
+                        id, len(func.params.params), len(args)))
+                return func
+        raise SLUCInvalidTypeError("ERROR: there is no function called {0}".format(id))
+
+class Primary(Expr):
+    __slots__ = ()
+
+
+class Param:
+    __slots__ = ("params",)
+
+    def __init__(self, params: Sequence[str]):
+        self.params = params
+
+    def __str__(self):
+        return ", ".join(typ + " " + id for typ, id in self.params)
+
+       
+       
+    # build dict and build list are utility functions because we originally designed our
+    # params in parser as a list of tuples but that really was difficult to work with
+    # as an environment so we can build a dict or a list when we need to.    
+    def buildDict(self):
+        env = {}
+        for type,id in self.params:
+            env[id] = type
+
+        return env
+
+    def buildList(self):
+        idlst = []
+        for type, id in self.params:
+            idlst.append(id)
+        return idlst
+
+    def eval(self, env):
+        for param in self.params:
+            if param[1] not in env.keys():
+                env[param[1]] = None # params are always none the param[1] is because the param[0] is the id and [1] is the value
+                                     # if there are any past parameters that gets hanled in function def
+
+
+class Declaration:
+    __slots__ = ("typ", "id")
+
+    def __init__(self, typ: str, id: Expr):
+        self.typ = typ
+        self.id = id
+
+    def __str__(self):
+        return "{0} {1};".format(self.typ, self.id)
+
+    def buildDict(self):
+        return self.typ, self.id
+    def eval(self, env):
+        env[self.id] = None
+
+
+class Declarations(Declaration):
+    __slots__ = ("decls",)
+
+    def __init__(self, decls: [Declaration]):
+        self.decls = decls
+
+    def __str__(self):
+        return "\n".join(str(decl) for decl in self.decls)
+
+
+
+    def buildDict(self):
+        env = {}
+        for decl in self.decls:
+            type, id = decl.buildDict()
+            env[id] = type
+        return env
+
+    def eval(self, env):
+        for dec in self.decls:
+            dec.eval(env) # puts the decls in the environment but they haven't been assigned yet so they are none
+
+
+class Stmt:
+    # def __init__(self, stmt):
+    __slots__ = ("depth", "shallow")
+
+    def __str__(self):
+        return text(self)
+
+    def children(self):
+        return []
+
+
+class Stmts(Stmt):
+    """
+    Statements → { Statement }
+    """
+    __slots__ = ("stmts",)
+
+    def __init__(self, stmts: [Stmt]):
+        self.stmts = stmts
+
+    def pieces(self, margin: str, indent: str) -> list:
+        # a Stmts among statements is a block
+        return [margin, "{\n"] + self.inside(margin + indent) + [margin, "}\n"]
+
+    def inside(self, margin: str) -> list:
+        """
+        Pieces of the statements between the braces. The parser makes a block
+        a Stmts holding one Stmts, so that comes out as one pair of braces.
+        """
+        stmts = self.stmts
+        if len(stmts) == 1 and isinstance(stmts[0], Stmts):
+            stmts = stmts[0].stmts
+        out = []
+        for stmt in stmts:
+            if isinstance(stmt, Stmt):
+                out.append((stmt, margin))
+            else:
+                # an expression on its own as a statement
+                out.extend([margin, (stmt, margin), ";\n"])
+        return out
+
+    def children(self):
+        return list(self.stmts)
+    
+    #type checking all the statement in our statements using a loop(iterate through all the statement)
+    def typecheck(self, env_value,envtype ,funcs):
+        for stmt in self.stmts:
+            stmt.typecheck(env_value,envtype, funcs)
+   
+    #evaluating all the statement in our statements using a loop(iterate through all the statement)
+    def eval(self, env, funcs):
+        for stmt in self.stmts:
+            # if it is a return statement we return the evaluation
+            if type(stmt) == ReturnStmt:
+                return stmt.eval(env, funcs)
+            stmt.eval(env, funcs)
+
+    def typecheck_steps(self, env_value, envtype, funcs):
+        if self.shallow:
+            return self.typecheck(env_value, envtype, funcs)
+        for stmt in self.stmts:
+            yield stmt.typecheck_steps(env_value, envtype, funcs)
+
+    def eval_steps(self, env, funcs):
+        if self.shallow:
+            return self.eval(env, funcs)
+        for stmt in self.stmts:
+            if type(stmt) == ReturnStmt:
+                return (yield stmt.eval_steps(env, funcs))
+            yield stmt.eval_steps(env, funcs)
+
+    def quicken(self, envtype):
+        for stmt in self.stmts:
+            stmt.quicken(envtype)
+
+
+class Block:
+    """
+    Block → { Statements }
+    """
+    
+    def __init__(self, block: Sequence[Stmts]):
+        self.block = Stmts
+    
+    def __str__(self):
+        acc = ""
+        for stmts in self.block:
+            acc = acc + str(stmts) + '\n'
+        return acc
+    # Making sure that we typecheck all the statements in our block
+    def typecheck(self, env_value,envtype ,funcs):
+        for stmts in self.block:
+            stmts.typecheck(env_value,envtype ,funcs)
+
+
+class IfStmt(Stmt):
+    """
+    IfStatement → if ( Expression ) Statement [ else Statement ]
+    """
+    __slots__ = ("expr", "stmt", "elseStmt", "line")
+    
+   # use Optional for cases with else statement
+    def __init__(self, expr: Expr, stmt: Stmt, elseStmt: Optional[Stmt] = None, line: Optional[int] = None):
+        self.expr = expr
+        self.stmt = stmt
+        self.elseStmt = elseStmt
+        self.line = line
+
+    def pieces(self, margin: str, indent: str) -> list:
+        out = [margin, "if (", (self.expr, margin), ")"] + body_pieces(self.stmt, margin, indent)
+        braced = isinstance(self.stmt, Stmts)
+        if self.elseStmt is None:
+            return out + ["\n"] if braced else out
+        # the parser only takes an else with braces
+        out.extend([" else"] if braced else [margin, "else"])
+        return out + body_pieces(self.elseStmt, margin, indent, True) + ["\n"]
+
+    def children(self):
+        if self.elseStmt is None:
+            return [self.expr, self.stmt]
+        return [self.expr, self.stmt, self.elseStmt]
+    #typechecking the expression in our if
+    def typecheck(self, env_value, envtype,funcs):
+        #TODO envtype might be wrong
+        self.expr.typeof(envtype)
+    #evaluating, true we return the statement inside our if
+    def eval(self, env, funcs):
+        if self.expr.eval(env, funcs):
+            return self.stmt.eval(env, funcs)
+        #if there is else we return the statement in our else.(if our if is true we never get here since 
+        #we have aready callled the statement in if
+        elif self.elseStmt is not None:
+            return self.elseStmt.eval(env, funcs)
+
+    def typecheck_steps(self, env_value, envtype, funcs):
+        if self.shallow:
+            return self.typecheck(env_value, envtype, funcs)
+        yield self.expr.typeof_steps(envtype)
+
+    def eval_steps(self, env, funcs):
+        if self.shallow:
+            return self.eval(env, funcs)
+        if (yield self.expr.eval_steps(env, funcs)):
+            return (yield self.stmt.eval_steps(env, funcs))
+        elif self.elseStmt is not None:
+            return (yield self.elseStmt.eval_steps(env, funcs))
+
+    def quicken(self, envtype):
+        self.expr = self.expr.quicken(envtype)[0]
+        self.stmt.quicken(envtype)
+        if self.elseStmt is not None:
+            self.elseStmt.quicken(envtype)
+
+
+class ReturnStmt(Stmt):
+    """
+    ReturnStmt → return Expression ;
+    """
+    __slots__ = ("expr", "line")
+
+    def __init__(self, expr: Expr, line: Optional[int] = None):
+        self.expr = expr
+        self.line = line
+
+    def pieces(self, margin: str, indent: str) -> list:
+        return [margin, "return ", (self.expr, margin), ";\n"]
+
+    def children(self):
+        return [self.expr]
+    #type checking the return statement
+    def typecheck(self, env_value,envtype, funcs):
+        self.expr.typeof(envtype)
+    # returning the value of the expression
+    def eval(self, env, funcs):
+        return self.expr.eval(env, funcs)
+
+    def typecheck_steps(self, env_value, envtype, funcs):
+        if self.shallow:
+            return self.typecheck(env_value, envtype, funcs)
+        yield self.expr.typeof_steps(envtype)
+
+    def eval_steps(self, env, funcs):
+        if self.shallow:
+            return self.eval(env, funcs)
+        return (yield self.expr.eval_steps(env, funcs))
+
+    def quicken(self, envtype):
+        self.expr = self.expr.quicken(envtype)[0]
+
+
+class WhileStmt(Stmt):
+    """
+     WhileStatement → while ( Expression ) Statement
+    """   
+    __slots__ = ("expr", "stmt", "line")
+
+    def __init__(self, expr: Expr, stmt: Stmts, line: Optional[int] = None):
+        self.expr = expr
+        self.stmt = stmt
+        self.line = line
+
+    def pieces(self, margin: str, indent: str) -> list:
+        out = [margin, "while (", (self.expr, margin), ")"] + body_pieces(self.stmt, margin, indent)
+        return out + ["\n"] if isinstance(self.stmt, Stmts) else out
+
+    def children(self):
+        return [self.expr, self.stmt]
+    #type checking the expression
+    def typecheck(self, env_value ,envtype, funcs):
+        self.expr.typeof(envtype)
+    #while the expression is true we run the statement in the while
+    def eval(self, env, funcs):
+        budget = getattr(funcs, "budget", None)
+        tiers = getattr(funcs, "tiers", None)
+        if budget is None and tiers is None:
+            while self.expr.eval(env, funcs):
+                self.stmt.eval(env, funcs)
+            return
+        while self.expr.eval(env, funcs):
+            self.stmt.eval(env, funcs)
+            if budget is not None:
+                budget.tick(self.line)
+            if tiers is not None:
+                compiled = tiers.backedge(self)
+                if compiled is not None:
+                    # the function got compiled, the rest of the loop runs in that
+                    return compiled(env, funcs)
+
+    def typecheck_steps(self, env_value, envtype, funcs):
+        if self.shallow:
+            return self.typecheck(env_value, envtype, funcs)
+        yield self.expr.typeof_steps(envtype)
+
+    def eval_steps(self, env, funcs):
+        budget = getattr(funcs, "budget", None)
+        pause = getattr(funcs, "pause", False)
+        while (yield self.expr.eval_steps(env, funcs)):
+            yield self.stmt.eval_steps(env, funcs)
+            if budget is not None:
+                budget.tick(self.line)
+            if pause:
+                yield PAUSE
+
+    def quicken(self, envtype):
+        self.expr = self.expr.quicken(envtype)[0]
+        self.stmt.quicken(envtype)
+
+
+# the comparisons a counted for can stop at, and whether it counts up to them
+COUNT_UP = {"<": True, "<=": True, ">": False, ">=": False}
+
+
+class ForStmt(WhileStmt):
+    """
+    ForStatement → for ( id = Expression ; Expression ; id = Expression ) Statement
+    Runs like init; while (expr) { stmt update }, so it is a WhileStmt to
+    everything that only looks at the condition and the body. A counted loop,
+    for (i = a; i < b; i = i + k) with <, <=, > or >= and + or -, where b and
+    k are literals or variables that nothing in the loop assigns, neither is
+    i and the body doesn't assign i, runs as a Python range when i, b and k
+    are ints and k goes towards b. i ends up as it would have, anything else
+    runs the general way.
+    """
+    __slots__ = ("init", "update", "counter")
+
+    def __init__(self, init: "AssignStmt", expr: Expr, update: "AssignStmt", stmt: Stmt,
+                 line: Optional[int] = None):
+        WhileStmt.__init__(self, expr, stmt, line)
+        self.init = init
+        self.update = update
+        self.counter = None  # what counted works out, once
+
+    def pieces(self, margin: str, indent: str) -> list:
+        out = [margin, "for (", self.init.id, " = ", (self.init.expr, margin), "; ", (self.expr, margin), "; ",
+               self.update.id, " = ", (self.update.expr, margin), ")"] + body_pieces(self.stmt, margin, indent)
+        return out + ["\n"] if isinstance(self.stmt, Stmts) else out
+
+    def children(self):
+        return [self.init, self.expr, self.update, self.stmt]
+
+    def counted(self):
+        """
+        (i, b, k, comparison, + or -) if the loop is counted, the nodes of b
+        and k are IntLitExprs or IDExprs. An empty tuple if it isn't.
+        """
+        if self.counter is None:
+            self.counter = ()
+            var = self.init.id
+            cond = self.expr
+            step = self.update.expr
+            # an update with hooks (see sluc_trace) has to run for them to see it
+            if type(self.update) is not AssignStmt:
+                return self.counter
+            if not (isinstance(cond, BinaryExpr) and cond.operator in COUNT_UP and type(cond.left) is IDExpr
+                    and cond.left.boo == var and self.update.id == var and isinstance(step, BinaryExpr)
+                    and step.operator in ("+", "-") and type(step.left) is IDExpr and step.left.boo == var):
+                return self.counter
+            fixed = {var}
+            for node in (cond.right, step.right):
+                if type(node) is IDExpr and node.boo != var:
+                    fixed.add(node.boo)
+                elif type(node) is not IntLitExpr:
+                    return self.counter
+            stack = [self.stmt]
+            while stack:
+                node = stack.pop()
+                if isinstance(node, AssignStmt) and node.id in fixed:
+                    return self.counter
+                stack.extend(node.children())
+            self.counter = (var, cond.right, step.right, cond.operator, step.operator)
+        return self.counter
+
+    def steps(self, env, funcs) -> Optional[range]:
+        # the values i takes if the loop can run as a range from here on, None if it can't
+        counter = self.counted()
+        if not counter:
+            return None
+        var, bound, step, op, sign = counter
+        start = env[var]
+        stop = bound.eval(env, funcs)
+        k = step.eval(env, funcs)
+        if type(start) is not int or type(stop) is not int or type(k) is not int:
+            return None
+        if sign == "-":
+            k = -k
+        if (k > 0) != COUNT_UP[op] or k == 0:
+            return None
+        if op == "<=":
+            stop += 1
+        elif op == ">=":
+            stop -= 1
+        return range(start, stop, k)
+
+    def eval(self, env, funcs):
+        self.init.eval(env, funcs)
+        return self.loop(env, funcs)
+
+    def loop(self, env, funcs):
+        # everything after init, which is also where compiled code takes over a loop
+        budget = getattr(funcs, "budget", None)
+        tiers = getattr(funcs, "tiers", None)
+        values = self.steps(env, funcs)
+        if values is None:
+            while self.expr.eval(env, funcs):
+                self.stmt.eval(env, funcs)
+                self.update.eval(env, funcs)
+                if budget is not None:
+                    budget.tick(self.line)
+                if tiers is not None:
+                    compiled = tiers.backedge(self)
+                    if compiled is not None:
+                        return compiled(env, funcs)
+            return
+        var = self.init.id
+        stmt = self.stmt
+        if budget is None and tiers is None:
+            for i in values:
+                env[var] = i
+                stmt.eval(env, funcs)
+        else:
+            for i in values:
+                env[var] = i
+                stmt.eval(env, funcs)
+                # where the update would have left it
+                env[var] = i + values.step
+                if budget is not None:
+                    budget.tick(self.line)
+                if tiers is not None:
+                    compiled = tiers.backedge(self)
+                    if compiled is not None:
+                        return compiled(env, funcs)
+        env[var] = values.start + len(values) * values.step
+
+    def eval_steps(self, env, funcs):
+        budget = getattr(funcs, "budget", None)
+        pause = getattr(funcs, "pause", False)
+        yield self.init.eval_steps(env, funcs)
+        values = self.steps(env, funcs)
+        if values is None:
+            while (yield self.expr.eval_steps(env, funcs)):
+                yield self.stmt.eval_steps(env, funcs)
+                yield self.update.eval_steps(env, funcs)
+                if budget is not None:
+                    budget.tick(self.line)
+                if pause:
+                    yield PAUSE
+            return
+        var = self.init.id
+        for i in values:
+            env[var] = i
+            yield self.stmt.eval_steps(env, funcs)
+            env[var] = i + values.step
+            if budget is not None:
+                budget.tick(self.line)
+            if pause:
+                yield PAUSE
+        env[var] = values.start + len(values) * values.step
+
+    def quicken(self, envtype):
+        self.init.quicken(envtype)
+        WhileStmt.quicken(self, envtype)
+        self.update.quicken(envtype)
+        # the nodes it looked at may have been replaced
+        self.counter = None
+
+
+class AssignStmt(Stmt):
+    """
+    Assignment → id = Expression ;
+    """
+    __slots__ = ("id", "expr", "line")
+
+    def __init__(self, id: str, expr: Expr, line: Optional[int] = None):
+        self.id = id
+        self.expr = expr
+        self.line = line
+
+    def pieces(self, margin: str, indent: str) -> list:
+        return [margin, self.id, " = ", (self.expr, margin), ";\n"]
+
+    def children(self):
+        return [self.expr]
+
+    def typecheck(self, env_value, envtype, funcs):
+        self.checkvalue(self.expr.eval(env_value, funcs), envtype)
+
+    def typecheck_steps(self, env_value, envtype, funcs):
+        if self.shallow:
+            return self.typecheck(env_value, envtype, funcs)
+        self.checkvalue((yield self.expr.eval_steps(env_value, funcs)), envtype)
+
+    def checkvalue(self, value, envtype):
+        # getting the class type of right
+        self.checktype(type(value), envtype)
+
+    def checktype(self, right_type, envtype):
+        #using TYPENAMES to have the type in string form( making it easy to evaluate the type of id and expression
+        if right_type in TYPENAMES:
+            right_type = TYPENAMES[right_type]
+        # getting the left type using our environment type
+        left_type = envtype[self.id]
+        # if sides are not from same type
+        if left_type != right_type:
+            # and if one side is a bool, then raise an error.
+            if left_type == "bool" or right_type == "bool":
+                raise SLUCInvalidTypeError("Error: Invalid Type")
+
+    # eval the expression and put in environment for that specific id
+    def eval(self, env, funcs):
+        env[self.id] = self.expr.eval(env, funcs)
+
+    def eval_steps(self, env, funcs):
+        if self.shallow:
+            return self.eval(env, funcs)
+        env[self.id] = yield self.expr.eval_steps(env, funcs)
+
+    def quicken(self, envtype):
+        self.expr = self.expr.quicken(envtype)[0]
+
+
+class PrintStmt(Stmt):
+    """
+    PrintStmt → print( PrintArg { , PrintArg })
+    """
+    __slots__ = ("printarg", "line")
+
+    def __init__(self, printarg: Expr, line: Optional[int] = None):
+        self.printarg = printarg
+        self.line = line
+
+    def pieces(self, margin: str, indent: str) -> list:
+        out = [margin, "print("]
+        for arg in self.printarg:
+            out.extend([(arg, margin), ", "])
+        out[-1] = ");\n"
+        return out
+
+    def children(self):
+        return list(self.printarg)
+    # type checking all the print arguments 
+    def typecheck(self, env_value,envtype, funcs):
+        for arg in self.printarg:
+            arg.typeof(envtype)
+    # printing all the arguments
+    def eval(self, env, funcs):
+        for printargs in self.printarg:
+            #if printing a string, we get rid of '""' to make the outpul look clean
+            if (type(printargs.eval(env, funcs)) == str):
+                print(printargs.eval(env, funcs)[1:-1], end="\n")
+            else:
+                print(printargs.eval(env, funcs), end="\n")
+
+    def typecheck_steps(self, env_value, envtype, funcs):
+        if self.shallow:
+            return self.typecheck(env_value, envtype, funcs)
+        for arg in self.printarg:
+            yield arg.typeof_steps(envtype)
+
+    def eval_steps(self, env, funcs):
+        if self.shallow:
+            return self.eval(env, funcs)
+        for printargs in self.printarg:
+            # evaluated a second time for printing just like in eval
+            if (type((yield printargs.eval_steps(env, funcs))) == str):
+                print((yield printargs.eval_steps(env, funcs))[1:-1], end="\n")
+            else:
+                print((yield printargs.eval_steps(env, funcs)), end="\n")
+
+    def quicken(self, envtype):
+        self.printarg = [arg.quicken(envtype)[0] for arg in self.printarg]
+
+
+class CountStmt(Stmt):
+    """
+    Adds one to its slot of counts each time it runs. The parser never makes
+    these, sluc_coverage.instrument puts them in front of the statements and
+    branches it counts. It has no text and nothing to type check.
+    """
+    __slots__ = ("counts", "slot")
+
+    def __init__(self, counts: list, slot: int):
+        self.counts = counts
+        self.slot = slot
+        # a leaf, so measure would say the same
+        self.depth = 1
+        self.shallow = True
+
+    def pieces(self, margin: str, indent: str) -> list:
+        return []
+
+    def typecheck(self, env_value, envtype, funcs):
+        pass
+
+    def eval(self, env, funcs):
+        self.counts[self.slot] += 1
+
+    def typecheck_steps(self, env_value, envtype, funcs):
+        return
+        yield
+
+    def eval_steps(self, env, funcs):
+        self.counts[self.slot] += 1
+        return
+        yield
+
+    def quicken(self, envtype):
+        pass
+
+
+class HookStmt(Stmt):
+    """
+    Calls its hooks with the statement after it, that statement's line and a
+    read-only view of the environment each time it runs. The parser never
+    makes these, sluc_trace.Hooks puts them in front of the statements that
+    have statement hooks. It has no text and nothing to type check.
+    """
+    __slots__ = ("hooks", "stmt")
+
+    def __init__(self, hooks: list, stmt: Stmt):
+        self.hooks = hooks
+        self.stmt = stmt
+        # a leaf, so measure would say the same
+        self.depth = 1
+        self.shallow = True
+
+    def pieces(self, margin: str, indent: str) -> list:
+        return []
+
+    def typecheck(self, env_value, envtype, funcs):
+        pass
+
+    def eval(self, env, funcs):
+        view = MappingProxyType(env)
+        for hook in self.hooks:
+            hook(self.stmt, self.stmt.line, view)
+
+    def typecheck_steps(self, env_value, envtype, funcs):
+        return
+        yield
+
+    def eval_steps(self, env, funcs):
+        self.eval(env, funcs)
+        return
+        yield
+
+    def quicken(self, envtype):
+        pass
+
+
+class HookedAssignStmt(AssignStmt):
+    """
+    An AssignStmt that calls its hooks with the assignment it stands in for,
+    its line and a read-only view of the environment once the variable is
+    set. sluc_trace.Hooks puts it in place of assignments with hooks.
+    """
+    __slots__ = ("hooks", "stmt")
+
+    def __init__(self, stmt: AssignStmt, hooks: list):
+        AssignStmt.__init__(self, stmt.id, stmt.expr, stmt.line)
+        self.hooks = hooks
+        self.stmt = stmt
+
+    def eval(self, env, funcs):
+        env[self.id] = self.expr.eval(env, funcs)
+        view = MappingProxyType(env)
+        for hook in self.hooks:
+            hook(self.stmt, self.line, view)
+
+    def eval_steps(self, env, funcs):
+        if self.shallow:
+            return self.eval(env, funcs)
+        env[self.id] = yield self.expr.eval_steps(env, funcs)
+        view = MappingProxyType(env)
+        for hook in self.hooks:
+            hook(self.stmt, self.line, view)
+
+
+class HookedBody(Stmts):
+    """
+    The body of a function with call or return hooks, put in place of its
+    Stmts by sluc_trace.Hooks. Call hooks get the FunctionDef, its line and
+    the environment once the parameters are in it, return hooks the return
+    that ended the body, or the FunctionDef if the body ran off its end,
+    its line, the environment and the value returned.
+    """
+    __slots__ = ("func", "calls", "returns")
+
+    def __init__(self, func: FunctionDef, stmts: list, calls: list, returns: list):
+        Stmts.__init__(self, stmts)
+        self.func = func
+        self.calls = calls
+        self.returns = returns
+
+    def eval(self, env, funcs):
+        view = MappingProxyType(env)
+        for hook in self.calls:
+            hook(self.func, self.func.line, view)
+        node, value = self.func, None
+        for stmt in self.stmts:
+            if type(stmt) == ReturnStmt:
+                node, value = stmt, stmt.eval(env, funcs)
+                break
+            stmt.eval(env, funcs)
+        for hook in self.returns:
+            hook(node, node.line, view, value)
+        return value
+
+    def eval_steps(self, env, funcs):
+        if self.shallow:
+            return self.eval(env, funcs)
+        view = MappingProxyType(env)
+        for hook in self.calls:
+            hook(self.func, self.func.line, view)
+        node, value = self.func, None
+        for stmt in self.stmts:
+            if type(stmt) == ReturnStmt:
+                node, value = stmt, (yield stmt.eval_steps(env, funcs))
+                break
+            yield stmt.eval_steps(env, funcs)
+        for hook in self.returns:
+            hook(node, node.line, view, value)
+        return value
+
+
+class BinaryExpr(Expr):
+    __slots__ = ("left", "right", "operator")
+
+    def __init__(self, operator: str, left: Expr, right: Expr):
+        self.left = left
+        self.right = right
+        self.operator = operator
+
+    def pieces(self, margin: str, indent: str) -> list:
+        return ["(", (self.left, margin), " " + self.operator + " ", (self.right, margin), ")"]
+
+    def children(self):
+        return [self.left, self.right]
+
+    def eval(self, env, funcs):
+        t = self.typeof(env)
+        # && and || only look at the right side when they have to
+        if self.operator == "&&":
+            return self.left.eval(env, funcs) and self.right.eval(env, funcs)
+        if self.operator == "||":
+            return self.left.eval(env, funcs) or self.right.eval(env, funcs)
+        return BINARY_OPS[self.operator](self.left.eval(env, funcs), self.right.eval(env, funcs))
+
+    def eval_steps(self, env, funcs, checked=False):
+        if self.shallow:
+            return self.eval(env, funcs)
+        # typeof already checks the whole subtree, so the operands don't check again
+        if not checked:
+            t = yield self.typeof_steps(env)
+        left = yield self.left.eval_steps(env, funcs, True)
+        if self.operator == "&&":
+            return left and (yield self.right.eval_steps(env, funcs, True))
+        if self.operator == "||":
+            return left or (yield self.right.eval_steps(env, funcs, True))
+        right = yield self.right.eval_steps(env, funcs, True)
+        return BINARY_OPS[self.operator](left, right)
+
+    def fallback(self, env, left, right):
+        # generic path for when a specialized node sees operands it was not built for,
+        # the operands are already evaluated so they are not evaluated twice
+        t = self.typeof(env)
+        return BINARY_OPS[self.operator](left, right)
+
+    def quicken(self, envtype) -> Tuple[Expr, Optional[type]]:
+        left, lt = self.left.quicken(envtype)
+        right, rt = self.right.quicken(envtype)
+        self.left = left
+        self.right = right
+        if lt is None or rt is None:
+            return self, None
+        if self.operator in {"&&", "||"}:
+            if lt == bool and rt == bool:
+                node = QUICK_LOGIC[self.operator](self.operator, left, right)
+                # the variables on the right side and their declared types, see LogicExpr
+                stack, skipped = [right], []
+                while stack:
+                    n = stack.pop()
+                    if type(n) is IDExpr:
+                        skipped.append((n, TYPES.get(envtype.get(n.boo))))
+                    stack.extend(n.children())
+                node.skipped = tuple(skipped)
+                node.depth = self.depth
+                node.shallow = self.shallow
+                return node, bool
+            return self, None
+        if lt not in {int, float} or rt not in {int, float}:
+            if self.operator in {"==", "!="} and lt == rt == bool:
+                return self, bool
+            return self, None
+        if lt == int and rt == int:
+            node = QUICK_INT[self.operator](self.operator, left, right)
+            t = int
+        else:
+            node = QUICK_FLOAT[self.operator](self.operator, left, right)
+            t = float
+        node.depth = self.depth
+        node.shallow = self.shallow
+        if self.operator in {"<=", "<", ">", ">=", "!=", "=="}:
+            return node, bool
+        if self.operator == "/":
+            return node, float
+        return node, t
+
+    def typeof(self, env) -> type:
+        return self.checktypes(self.left.typeof(env), self.right.typeof(env))
+
+    def typeof_steps(self, env):
+        left = yield self.left.typeof_steps(env)
+        right = yield self.right.typeof_steps(env)
+        return self.checktypes(left, right)
+
+    def checktypes(self, left, right) -> type:
+        # type of this expression given the types of both sides
+        return checktypes(self.operator, left, right)
+
+
+class Builtin:
+    """
+    A function written in Python that SLU-C programs call like one of their
+    own. returns and each of params is "int", "float", "bool" or "num", num
+    being an int or a float, where returning num means a float if any
+    argument is a float and an int otherwise. Arguments are checked against
+    params: an int can go where a float is declared, as in an assignment,
+    but a float can't go where an int is and a bool only goes where a bool
+    is. A call evaluates the arguments and hands them to function, there is
+    no FunctionDef, environment or Budget step behind it.
+    """
+    __slots__ = ("name", "function", "returns", "params", "accepts")
+
+    def __init__(self, name: str, function, returns: str, params: Sequence[str]):
+        for t in [returns] + list(params):
+            if t not in BUILTIN_TYPES:
+                raise ValueError("{0} is not one of {1}".format(t, ", ".join(BUILTIN_TYPES)))
+        self.name = name
+        self.function = function
+        self.returns = returns
+        self.params = tuple(params)
+        self.accepts = tuple(BUILTIN_ACCEPTS[t] for t in params)  # the types each argument can have
+
+    def check(self, types):
+        # what an argument of each of types can't be passed
+        if len(types) != len(self.params):
+            raise SLUCInvalidTypeError("ERROR: {0} takes {1} arguments but was given {2}".format(
+                self.name, len(self.params), len(types)))
+        for t, accepts in zip(types, self.accepts):
+            if t is not None and t not in accepts:
+                raise SLUCInvalidTypeError("ERROR: Invalid Type")
+
+    def typeof(self, types) -> Optional[type]:
+        # the type a call with arguments of types gives, None for those not known yet
+        self.check(types)
+        if self.returns != "num":
+            return TYPES[self.returns]
+        if float in types:
+            return float
+        return None if None in types else int
+
+    def call(self, values):
+        if len(values) != len(self.params):
+            self.check([type(value) for value in values])
+        for value, accepts in zip(values, self.accepts):
+            if type(value) not in accepts:
+                raise SLUCInvalidTypeError("ERROR: Invalid Type")
+        return self.function(*values)
+
+
+class Builtins(dict):
+    """
+    The builtins by name. FunctionCallExpr looks a call up here before the
+    program's functions, and the parser won't let a function of the program
+    take a builtin's name. A program embedding SLU-C adds its own before
+    parsing what calls them:
+
+      BUILTINS.register("hypot", math.hypot, "float", ["num", "num"])
+    """
+
+    def register(self, name: str, function, returns: str, params: Sequence[str]) -> Builtin:
+        if not name.isidentifier():
+            raise ValueError("{0!r} can't be called from SLU-C".format(name))
+        self[name] = builtin = Builtin(name, function, returns, params)
+        return builtin
+
+
+BUILTIN_TYPES = ("int", "float", "bool", "num")
+# the types a value handed to a builtin parameter of each type can have
+BUILTIN_ACCEPTS = {"int": (int,), "float": (float, int), "bool": (bool,), "num": (float, int)}
+
+BUILTINS = Builtins()
+BUILTINS.register("abs", abs, "num", ["num"])
+BUILTINS.register("min", min, "num", ["num", "num"])
+BUILTINS.register("max", max, "num", ["num", "num"])
+BUILTINS.register("pow", math.pow, "float", ["num", "num"])
+BUILTINS.register("sqrt", math.sqrt, "float", ["num"])
+BUILTINS.register("floor", math.floor, "int", ["float"])
+BUILTINS.register("div", operator.floordiv, "int", ["int", "int"])
+# the ones above as they came, for backends that have their own versions of them
+STANDARD_BUILTINS = dict(BUILTINS)
+
+
+class FunctionCallExpr(Expr):
+    __slots__ = ("id", "args", "line")
+
+    def __init__(self, id, arguments: Sequence[Expr], line: Optional[int] = None):  # Sequence[Expr]
+        self.id = id
+        self.args = arguments
+        self.line = line
+
+    def pieces(self, margin: str, indent: str) -> list:
+        out = [self.id + "("]
+        for arg in self.args:
+            # a call printed only takes primaries, which -(x) isn't
+            if isinstance(arg, UnaryOp):
+                out.extend(["(", (arg, margin), ")", ", "])
+                continue
+            out.extend([(arg, margin), ", "])
+        if self.args:
+            out.pop()
+        out.append(")")
+        return out
+
+    def children(self):
+        return list(self.args)
+
+    def eval(self, env, funcs):
+        # f(2*a, z, 99, g(x))
+        # lookup FunctionDef using id
+        # call eval on the function def passings the values
+        evaledArgs = []
+        for arg in self.args:
+            evaledArgs.append(arg.eval(env, funcs))
+        return self.call(evaledArgs, funcs)
+
+    def call(self, values, funcs):
+        # the call once its arguments are evaluated, compiled code (see tiering) comes in here
+        builtin = BUILTINS.get(self.id)
+        if builtin is not None:
+            return builtin.call(values)
+        budget = getattr(funcs, "budget", None)
+        for func in funcs:
+            if func.id == self.id:
+                if budget is None:
+                    return func.eval(values, funcs)
+                budget.enter(self.line)
+                try:
+                    return func.eval(values, funcs)
+                finally:
+                    budget.leave()
+
+    def eval_steps(self, env, funcs, checked=False):
+        if self.shallow:
+            return self.eval(env, funcs)
+        evaledArgs = []
+        for arg in self.args:
+            evaledArgs.append((yield arg.eval_steps(env, funcs)))
+        builtin = BUILTINS.get(self.id)
+        if builtin is not None:
+            return builtin.call(evaledArgs)
+        if getattr(funcs, "pause", False):
+            yield PAUSE
+        budget = getattr(funcs, "budget", None)
+        for func in funcs:
+            if func.id == self.id:
+                if budget is None:
+                    return (yield func.eval_steps(evaledArgs, funcs))
+                budget.enter(self.line)
+                try:
+                    return (yield func.eval_steps(evaledArgs, funcs))
+                finally:
+                    budget.leave()
+
+    def typeof(self, env) -> type:
+        # only builtins say what they return
+        builtin = BUILTINS.get(self.id)
+        if builtin is not None:
+            return builtin.typeof([arg.typeof(env) for arg in self.args])
+
+    def typeof_steps(self, env):
+        builtin = BUILTINS.get(self.id)
+        if builtin is None:
+            return None
+        types = []
+        for arg in self.args:
+            types.append((yield arg.typeof_steps(env)))
+        return builtin.typeof(types)
+
+    def quicken(self, envtype):
+        self.args = [arg.quicken(envtype)[0] for arg in self.args]
+        builtin = BUILTINS.get(self.id)
+        if builtin is not None and len(self.args) == len(builtin.params):
+            node = BuiltinCallExpr(self, builtin)
+            node.depth = self.depth
+            node.shallow = self.shallow
+            return node, None
+        return self, None
+
+
+class BuiltinCallExpr(FunctionCallExpr):
+    """
+    A call to a builtin as quicken leaves it, with the Builtin already looked
+    up so running it is evaluating the arguments and calling the Python
+    function.
+    """
+    __slots__ = ("builtin",)
+
+    def __init__(self, call: FunctionCallExpr, builtin: Builtin):
+        FunctionCallExpr.__init__(self, call.id, call.args, call.line)
+        self.builtin = builtin
+
+    def eval(self, env, funcs):
+        return self.builtin.call([arg.eval(env, funcs) for arg in self.args])
+
+    def call(self, values, funcs):
+        return self.builtin.call(values)
+
+    def eval_steps(self, env, funcs, checked=False):
+        if self.shallow:
+            return self.eval(env, funcs)
+        values = []
+        for arg in self.args:
+            values.append((yield arg.eval_steps(env, funcs)))
+        return self.builtin.call(values)
+
+    def quicken(self, envtype):
+        self.args = [arg.quicken(envtype)[0] for arg in self.args]
+        return self, None
+
+
+class InlinedCallExpr(FunctionCallExpr):
+    """
+    A call with a copy of the called function's body put in its place by
+    optimize.inline. The copy's parameters and locals are renamed so they can
+    live in the caller's environment, which saves looking the function up and
+    building an environment on every call. It runs like the call did:
+    arguments first, then the body, then the type check FunctionDef.eval does
+    after it. Loops inside the copy still count against a Budget but the call
+    itself is no longer a step.
+    """
+    __slots__ = ("params", "decls", "stmts", "envtype")
+
+    def __init__(self, call: FunctionCallExpr, params: Sequence[str], decls: Sequence[str], stmts, envtype):
+        FunctionCallExpr.__init__(self, call.id, call.args, call.line)
+        self.params = params  # renamed parameters in order
+        self.decls = decls  # renamed locals
+        self.stmts = stmts
+        self.envtype = envtype  # declared types of the renamed variables
+
+    def children(self):
+        return list(self.args) + [self.stmts]
+
+    def bind(self, values, env):
+        # what FunctionDef.eval puts in a new environment
+        for id, value in zip(self.params, values):
+            env[id] = value
+        for id in self.decls:
+            env[id] = None
+
+    def eval(self, env, funcs):
+        self.bind([arg.eval(env, funcs) for arg in self.args], env)
+        retVal = self.stmts.eval(env, funcs)
+        self.stmts.typecheck(env, self.envtype, funcs)
+        return retVal
+
+    def eval_steps(self, env, funcs, checked=False):
+        values = []
+        for arg in self.args:
+            values.append((yield arg.eval_steps(env, funcs)))
+        self.bind(values, env)
+        retVal = yield self.stmts.eval_steps(env, funcs)
+        yield self.stmts.typecheck_steps(env, self.envtype, funcs)
+        return retVal
+
+    def quicken(self, envtype):
+        self.args = [arg.quicken(envtype)[0] for arg in self.args]
+        quicken_stmts(self.stmts, self.envtype)
+        return self, None
+
+
+class UnaryOp(Expr):
+    __slots__ = ("tree", "sign")
+
+    def __init__(self, tree: Expr, sign: str):
+        self.tree = tree
+        self.sign = sign
+
+    def pieces(self, margin: str, indent: str) -> list:
+        return [self.sign + "(", (self.tree, margin), ")"]
+
+    def children(self):
+        return [self.tree]
+
+    def typeof(self, env):
+        self.tree.typeof(env)
+
+    def typeof_steps(self, env):
+        yield self.tree.typeof_steps(env)
+
+    def eval_steps(self, env, funcs, checked=False):
+        if self.shallow:
+            return self.eval(env, funcs)
+        if self.sign == "!":
+            return not (yield self.tree.eval_steps(env, funcs, checked))
+        else:
+            return - (yield self.tree.eval_steps(env, funcs, checked))
+
+    def eval(self, env, funcs):
+        if self.sign == "!":
+            return not self.tree.eval(env, funcs)
+        else:
+            return - self.tree.eval(env, funcs)
+
+    def quicken(self, envtype):
+        self.tree, t = self.tree.quicken(envtype)
+        if self.sign == "!":
+            # typeof gives None for !x, which && and || don't take, so what takes
+            # it can't be specialized as if it were a bool
+            return self, None
+        return self, (t if t in {int, float} else None)
+
+
+class IntLitExpr(Expr):
+    __slots__ = ("boo", "value")
+
+    # value - the parsed literal if the lexer already worked it out
+    def __init__(self, boo: str, value: Optional[int] = None):
+        self.boo = boo
+        self.value = int(boo) if value is None else value
+
+    def __str__(self):
+        return str(self.boo)
+
+    def eval(self, env, funcs):
+        return self.value
+
+    def typeof(self, env) -> type:
+        return int
+
+    def quicken(self, envtype):
+        return self, self.typeof(envtype)
+
+
+class FloatExpr(Expr):
+    __slots__ = ("boo", "value")
+
+    # value - the parsed literal if the lexer already worked it out
+    def __init__(self, boo: str, value: Optional[float] = None):
+        self.boo = boo
+        self.value = float(boo) if value is None else value
+
+    def __str__(self):
+        return str(self.boo)
+
+    def eval(self, env, funcs):
+        return self.value
+
+    def typeof(self, env) -> type:
+        return float
+
+    def quicken(self, envtype):
+        return self, self.typeof(envtype)
+
+
+class BoolExpr(Expr):
+    __slots__ = ("boo",)
+
+    def __init__(self, boo: str):
+        self.boo = boo
+
+    def __str__(self):
+        return str(self.boo)
+
+    def eval(self, env, funcs):
+        if self.boo == "true":
+            return True
+        else:
+            return False
+
+    def typeof(self, env) -> type:
+        return bool
+
+    def quicken(self, envtype):
+        return self, self.typeof(envtype)
+
+
+class StringExpr(Expr):
+    __slots__ = ("boo",)
+
+    def __init__(self, boo: str):
+        self.boo = boo
+
+    def __str__(self):
+        return str(self.boo)
+
+    def eval(self, env, funcs):
+        return str(self.boo)
+
+    def typeof(self, env) -> type:
+        return str
+
+    def quicken(self, envtype):
+        return self, self.typeof(envtype)
+
+
+class IDExpr(Expr):
+    __slots__ = ("boo",)
+
+    def __init__(self, boo: str):
+        self.boo = boo
+
+    def __str__(self):
+        return str(self.boo)
+
+    def eval(self, env, funcs):
+        return env[self.boo]
+
+    def typeof(self, env) -> type:
+        if env[self.boo] in TYPES:
+            return TYPES[env[self.boo]]
+        else:
+            return type(env[self.boo])
+
+    def quicken(self, envtype):
+        return self, TYPES.get(envtype.get(self.boo))
+
+
+class SaveExpr(Expr):
+    """
+    An expression whose value is also kept in the temporary variable temp so
+    later copies of the same expression can read it instead, see optimize.cse
+    """
+    __slots__ = ("temp", "expr")
+
+    def __init__(self, temp: str, expr: Expr):
+        self.temp = temp
+        self.expr = expr
+
+    def pieces(self, margin: str, indent: str) -> list:
+        return ["(" + self.temp + " = ", (self.expr, margin), ")"]
+
+    def children(self):
+        return [self.expr]
+
+    def eval(self, env, funcs):
+        value = env[self.temp] = self.expr.eval(env, funcs)
+        return value
+
+    def eval_steps(self, env, funcs, checked=False):
+        if self.shallow:
+            return self.eval(env, funcs)
+        value = env[self.temp] = yield self.expr.eval_steps(env, funcs, checked)
+        return value
+
+    def typeof(self, env):
+        return self.expr.typeof(env)
+
+    def typeof_steps(self, env):
+        return (yield self.expr.typeof_steps(env))
+
+    def quicken(self, envtype):
+        self.expr, t = self.expr.quicken(envtype)
+        return self, t
+
+
+class TempExpr(IDExpr):
+    """
+    Reads the temporary a SaveExpr filled in. Its type is the type the saved
+    expression had, so a BinaryExpr checking its operands before evaluating
+    them sees the same types it did before the expression was saved.
+    """
+    __slots__ = ("t",)
+
+    def __init__(self, boo: str, t: type):
+        self.boo = boo
+        self.t = t
+
+    def typeof(self, env) -> type:
+        return self.t
+
+
+class IntBinaryExpr(BinaryExpr):
+    """
+    BinaryExpr whose operands were both declared int. The guard makes sure they
+    still are, otherwise it takes the generic path.
+    """
+    __slots__ = ()
+
+    def eval(self, env, funcs):
+        left = self.left.eval(env, funcs)
+        right = self.right.eval(env, funcs)
+        if type(left) is int and type(right) is int:
+            return self.op(left, right)
+        return self.fallback(env, left, right)
+
+
+class FloatBinaryExpr(BinaryExpr):
+    """
+    BinaryExpr on numbers where at least one side was declared float.
+    """
+    __slots__ = ()
+
+    def eval(self, env, funcs):
+        left = self.left.eval(env, funcs)
+        right = self.right.eval(env, funcs)
+        lt = type(left)
+        rt = type(right)
+        if (lt is float or lt is int) and (rt is float or rt is int):
+            return self.op(left, right)
+        return self.fallback(env, left, right)
+
+
+class IntAdd(IntBinaryExpr):
+    __slots__ = ()
+    op = operator.add
+
+
+class IntSub(IntBinaryExpr):
+    __slots__ = ()
+    op = operator.sub
+
+
+class IntMul(IntBinaryExpr):
+    __slots__ = ()
+    op = operator.mul
+
+
+class IntDiv(IntBinaryExpr):
+    __slots__ = ()
+    op = operator.truediv
+
+
+class IntMod(IntBinaryExpr):
+    __slots__ = ()
+    op = operator.mod
+
+
+class IntLessThan(IntBinaryExpr):
+    __slots__ = ()
+    op = operator.lt
+
+
+class IntLessEqual(IntBinaryExpr):
+    __slots__ = ()
+    op = operator.le
+
+
+class IntGreaterThan(IntBinaryExpr):
+    __slots__ = ()
+    op = operator.gt
+
+
+class IntGreaterEqual(IntBinaryExpr):
+    __slots__ = ()
+    op = operator.ge
+
+
+class IntEqual(IntBinaryExpr):
+    __slots__ = ()
+    op = operator.eq
+
+
+class IntNotEqual(IntBinaryExpr):
+    __slots__ = ()
+    op = operator.ne
+
+
+class FloatAdd(FloatBinaryExpr):
+    __slots__ = ()
+    op = operator.add
+
+
+class FloatSub(FloatBinaryExpr):
+    __slots__ = ()
+    op = operator.sub
+
+
+class FloatMul(FloatBinaryExpr):
+    __slots__ = ()
+    op = operator.mul
+
+
+class FloatDiv(FloatBinaryExpr):
+    __slots__ = ()
+    op = operator.truediv
+
+
+class FloatMod(FloatBinaryExpr):
+    __slots__ = ()
+    op = operator.mod
+
+
+class FloatLessThan(FloatBinaryExpr):
+    __slots__ = ()
+    op = operator.lt
+
+
+class FloatLessEqual(FloatBinaryExpr):
+    __slots__ = ()
+    op = operator.le
+
+
+class FloatGreaterThan(FloatBinaryExpr):
+    __slots__ = ()
+    op = operator.gt
+
+
+class FloatGreaterEqual(FloatBinaryExpr):
+    __slots__ = ()
+    op = operator.ge
+
+
+class FloatEqual(FloatBinaryExpr):
+    __slots__ = ()
+    op = operator.eq
+
+
+class FloatNotEqual(FloatBinaryExpr):
+    __slots__ = ()
+    op = operator.ne
+
+
+class LogicExpr(BinaryExpr):
+    """
+    && or || on two bools. BinaryExpr.eval types both sides even when it
+    only evaluates the left one, which comes out as anything but bool only
+    if a variable there holds something other than it was declared as, say
+    what a call returned. skipped is each variable on the right side with
+    its declared type, so checking that is all a skipped side costs.
+    """
+    __slots__ = ("skipped",)
+
+    def typed(self, env) -> bool:
+        # whether the right side holds what it was declared to
+        for node, t in self.skipped:
+            if type(env[node.boo]) is not t:
+                return False
+        return True
+
+
+class AndExpr(LogicExpr):
+    """
+    && on two bools, the right side is only evaluated if the left one is true
+    """
+    __slots__ = ()
+
+    def eval(self, env, funcs):
+        left = self.left.eval(env, funcs)
+        if left is False:
+            if self.typed(env):
+                return False
+        elif left is True:
+            right = self.right.eval(env, funcs)
+            if right is True or right is False:
+                return right
+        self.typeof(env)
+        # a true left side already evaluated the right one above
+        if left is True:
+            return right
+        return left and self.right.eval(env, funcs)
+
+
+class OrExpr(LogicExpr):
+    """
+    || on two bools, the right side is only evaluated if the left one is false
+    """
+    __slots__ = ()
+
+    def eval(self, env, funcs):
+        left = self.left.eval(env, funcs)
+        if left is True:
+            if self.typed(env):
+                return True
+        elif left is False:
+            right = self.right.eval(env, funcs)
+            if right is True or right is False:
+                return right
+        self.typeof(env)
+        # a false left side already evaluated the right one above
+        if left is False:
+            return right
+        return left or self.right.eval(env, funcs)
+
+
+# operator -> specialized node used by BinaryExpr.quicken
+QUICK_INT = {"+": IntAdd, "-": IntSub, "*": IntMul, "/": IntDiv, "%": IntMod,
+             "<": IntLessThan, "<=": IntLessEqual, ">": IntGreaterThan, ">=": IntGreaterEqual,
+             "==": IntEqual, "!=": IntNotEqual}
+QUICK_FLOAT = {"+": FloatAdd, "-": FloatSub, "*": FloatMul, "/": FloatDiv, "%": FloatMod,
+               "<": FloatLessThan, "<=": FloatLessEqual, ">": FloatGreaterThan, ">=": FloatGreaterEqual,
+               "==": FloatEqual, "!=": FloatNotEqual}
+QUICK_LOGIC = {"&&": AndExpr, "||": OrExpr}
+
+
+class SLUCInvalidTypeError(Exception):
+    def __init__(self, message: str):
+        Exception.__init__(self)
+        self.message = message
+
+    def __str__(self):
+        return self.message
+
+
+class SLUCLimitError(Exception):
+    """
+    A run went over one of the limits of its Budget. limit is "steps",
+    "depth", "seconds" or "memory", value is what that limit was set to and
+    line is the SLU-C line of the loop or call where it was noticed.
+    """
+    def __init__(self, limit: str, value, line: Optional[int]):
+        Exception.__init__(self)
+        self.limit = limit
+        self.value = value
+        self.line = line
+        self.message = "ERROR: {0} limit of {1} exceeded on line {2}".format(limit, value, line)
+
+    def __str__(self):
+        return self.message
+
+
+# what Python raises when a running program computes something it can't: arithmetic on a
+# variable that was never assigned, division by zero, a builtin given an argument outside its
+# domain or recursion deeper than Python's stack. These are errors of the program like the
+# SLUC ones, the command line and the server both report them as runtime_error words them
+RUNTIME_ERRORS = (ArithmeticError, LookupError, TypeError, ValueError, RecursionError)
+
+
+def runtime_error(err: BaseException) -> str:
+    return "{0}: {1}".format(type(err).__name__, err)
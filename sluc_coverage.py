@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+SLU-C statement and branch coverage
+instrument puts a CountStmt in front of every statement, at the start of
+both branches of every if (an if without an else gets an else that only
+counts) and at the start of every loop body. Each CountStmt adds one to its
+own slot of a list that is allocated before the program runs, so a covered
+run costs one small statement per statement instead of a trace call per
+line:
+
+  counters = instrument(program, "prog.sluc")
+  program.eval()
+  data = CoverageData()
+  data.add(counters)
+  data.save("coverage")
+
+save writes a new file every time, so any number of runs and processes can
+save into the same directory at once. Running this module on directories or
+files of them adds everything up and reports it per source line:
+
+  python sluc_coverage.py coverage
+
+A slot is known by the line of its statement, what it counts and which of
+the statements on that line counting that it is, so the counts of separate
+runs, and of the copies optimize.inline makes of a function, add up to the
+same slots. Expressions standing alone as statements aren't counted.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+from typing import Optional
+
+from sluc_ast import *
+
+# what a slot counts: runs of a statement, of the then or else branch of an if, or of a loop body
+STMT, THEN, ELSE, LOOP = "stmt", "then", "else", "loop"
+BRANCHES = (THEN, ELSE, LOOP)
+
+# what the files save writes end in
+DATA_SUFFIX = ".slucov"
+
+
+class Counters:
+    """
+    The slots of one instrumented program. counts[i] is how many times the
+    CountStmt for keys[i] has run, keys[i] is (line, what, nth on that line).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.keys = []
+        self.counts = []
+
+    def count(self, line: int, kind: str, seen: dict) -> CountStmt:
+        # a CountStmt with a new slot, seen numbers the slots on each line of one function
+        n = seen.get((line, kind), 0)
+        seen[line, kind] = n + 1
+        self.keys.append((line, kind, n))
+        self.counts.append(0)
+        return CountStmt(self.counts, len(self.counts) - 1)
+
+
+def branch(stmt: Optional[Stmt], count: CountStmt) -> Stmts:
+    # the body of an if, else or while with count run first
+    if isinstance(stmt, Stmts):
+        stmt.stmts.insert(0, count)
+        return stmt
+    return Stmts([count] if stmt is None else [count, stmt])
+
+
+def instrument(program: Program, path: str) -> Counters:
+    """
+    Puts the CountStmts into program, which has to happen before it is run
+    and after optimize has rewritten it. path is the source file the counts
+    are saved under.
+    """
+    counters = Counters(path)
+    # each function, and each inlined copy of one, numbers its own slots so copies match
+    scopes = [func.stmts for func in program.funcs]
+    while scopes:
+        seen = {}
+        stack = [scopes.pop()]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, InlinedCallExpr):
+                scopes.append(node.stmts)
+                stack.extend(reversed(node.args))
+                continue
+            if isinstance(node, Stmts):
+                stmts = []
+                for stmt in node.stmts:
+                    if (isinstance(stmt, Stmt) and not isinstance(stmt, (Stmts, CountStmt))
+                            and stmt.line is not None):
+                        stmts.append(counters.count(stmt.line, STMT, seen))
+                    stmts.append(stmt)
+                node.stmts = stmts
+            elif isinstance(node, IfStmt) and node.line is not None:
+                node.stmt = branch(node.stmt, counters.count(node.line, THEN, seen))
+                node.elseStmt = branch(node.elseStmt, counters.count(node.line, ELSE, seen))
+            elif isinstance(node, WhileStmt) and node.line is not None:
+                node.stmt = branch(node.stmt, counters.count(node.line, LOOP, seen))
+            stack.extend(reversed(node.children()))
+    # there are new nodes, so the depths have to be measured again
+    program.deep = None
+    return counters
+
+
+class CoverageData:
+    """
+    Counts added up over any number of runs, files[path][(line, what, nth)]
+    """
+
+    def __init__(self):
+        self.files = {}  # path -> (line, what, nth) -> count
+
+    def add(self, counters: Counters):
+        counts = self.files.setdefault(counters.path, {})
+        for key, count in zip(counters.keys, counters.counts):
+            counts[key] = counts.get(key, 0) + count
+
+    def merge(self, other: "CoverageData"):
+        for path, other_counts in other.files.items():
+            counts = self.files.setdefault(path, {})
+            for key, count in other_counts.items():
+                counts[key] = counts.get(key, 0) + count
+
+    def save(self, directory: str) -> str:
+        """
+        Writes the counts to a file of their own in directory and returns its
+        name. The file only shows up once it is complete, so whoever reads the
+        directory never sees half of one.
+        """
+        os.makedirs(directory, exist_ok=True)
+        fd, temp = tempfile.mkstemp(prefix=".sluc-{0}-".format(os.getpid()), dir=directory)
+        with os.fdopen(fd, "w") as out:
+            json.dump({path: [[line, kind, n, count] for (line, kind, n), count in sorted(counts.items())]
+                       for path, counts in self.files.items()}, out)
+        head, tail = os.path.split(temp)
+        name = os.path.join(head, tail[1:] + DATA_SUFFIX)
+        os.replace(temp, name)
+        return name
+
+    @classmethod
+    def load(cls, *paths: str) -> "CoverageData":
+        # everything in the files save wrote, paths can also be the directories they are in
+        data = cls()
+        for path in paths:
+            if os.path.isdir(path):
+                names = sorted(os.path.join(path, name) for name in os.listdir(path) if name.endswith(DATA_SUFFIX))
+            else:
+                names = [path]
+            for name in names:
+                with open(name) as f:
+                    for source, slots in json.load(f).items():
+                        counts = data.files.setdefault(source, {})
+                        for line, kind, n, count in slots:
+                            counts[line, kind, n] = counts.get((line, kind, n), 0) + count
+        return data
+
+    def report(self, out):
+        """
+        Writes each source file with how often each line ran in front of it,
+        like gcov: - for lines without statements, ##### for lines none of
+        whose statements ran and a * after the count when only some did. The
+        branches of each if and while follow their line.
+        """
+        for path in sorted(self.files):
+            counts = self.files[path]
+            stmts = [count for (line, kind, n), count in counts.items() if kind == STMT]
+            branches = [count for (line, kind, n), count in counts.items() if kind in BRANCHES]
+            print("{0}: {1} of {2} statements run, {3} of {4} branches taken".format(
+                path, sum(1 for count in stmts if count), len(stmts),
+                sum(1 for count in branches if count), len(branches)), file=out)
+            lines = {}
+            for key in sorted(counts):
+                lines.setdefault(key[0], []).append(key)
+            try:
+                with open(path) as f:
+                    source = f.read().splitlines()
+            except OSError:
+                source = [""] * max(lines, default=0)
+            for number in range(1, max(len(source), max(lines, default=0)) + 1):
+                keys = lines.get(number, [])
+                ran = [counts[key] for key in keys if key[1] == STMT]
+                if not ran:
+                    shown = "-"
+                elif not any(ran):
+                    shown = "#####"
+                else:
+                    shown = str(max(ran)) + ("*" if not all(ran) else "")
+                text = source[number - 1] if number <= len(source) else ""
+                print("{0:>9}:{1:>5}:{2}".format(shown, number, text), file=out)
+                for key in sorted((key for key in keys if key[1] in BRANCHES),
+                                  key=lambda key: (key[2], BRANCHES.index(key[1]))):
+                        print("branch {0} {1} taken {2}".format(key[2], key[1], counts[key]), file=out)
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(prog="sluc_coverage",
+                                 description="add up the coverage of SLU-C runs and report it per source line")
+    ap.add_argument("paths", nargs="+", help="files written by sluc.py run --coverage, or their directories")
+    args = ap.parse_args(argv)
+    CoverageData.load(*args.paths).report(sys.stdout)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
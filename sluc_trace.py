@@ -0,0 +1,186 @@
+"""
+SLU-C tracing and breakpoint hooks
+Hooks are Python callables an observer attaches to a Program to watch it
+run: statement hooks before each statement, call hooks once a function has
+its parameters, return hooks when it returns and assignment hooks after
+each assignment. Each is called with the node, its source line and a
+read-only view of the environment of the function it is in, return hooks
+also with the value returned:
+
+  def show(node, line, env):
+      print(line, dict(env))
+
+  hooks = Hooks()
+  hooks.add(STATEMENT, show)
+  hooks.add(STATEMENT, stop, lines={12})    # a breakpoint on line 12
+  hooks.attach(program)
+  program.eval()
+  hooks.detach()
+
+attach puts nodes calling the hooks into the program where there are hooks
+for them, like sluc_coverage.instrument puts in its counters, and detach
+takes them out again. A program without hooks is the tree the parser made,
+so it runs exactly as fast as it did before there were hooks, and statement
+and assignment hooks limited to some lines add nothing on the others.
+
+Hooks added or removed while attached count from the next time each block
+starts. Optimize a program before attaching hooks to it, an inlined call
+isn't a call any more. Code compiled by tiering and the C backend doesn't
+call hooks.
+"""
+from typing import Callable, Optional
+
+from sluc_ast import *
+
+# what a hook can be called on
+STATEMENT, CALL, RETURN, ASSIGNMENT = "statement", "call", "return", "assignment"
+EVENTS = (STATEMENT, CALL, RETURN, ASSIGNMENT)
+
+
+class Hooks:
+    """
+    The hooks for each event and the program they are attached to, if any
+    """
+
+    def __init__(self):
+        self.hooks = {event: [] for event in EVENTS}  # event -> [(hook, lines or None for all of them)]
+        self.program = None
+        self.undo = []  # (node, attribute, what it was before attach), in the order attach changed them
+
+    def add(self, event: str, hook: Callable, lines: Optional[set] = None):
+        """
+        Calls hook on every event, or for statements and assignments only on
+        those on one of lines
+        """
+        if event not in self.hooks:
+            raise ValueError("no event {0}, only {1}".format(event, ", ".join(EVENTS)))
+        if lines is not None and event not in (STATEMENT, ASSIGNMENT):
+            raise ValueError("only statement and assignment hooks can be limited to lines")
+        self.hooks[event].append((hook, None if lines is None else set(lines)))
+        self.refresh()
+
+    def remove(self, event: str, hook: Callable):
+        self.hooks[event] = [(h, lines) for h, lines in self.hooks[event] if h is not hook]
+        self.refresh()
+
+    def refresh(self):
+        # an attached program gets the nodes for the hooks there are now
+        program = self.program
+        if program is not None:
+            self.detach()
+            self.attach(program)
+
+    def at(self, event: str, line: Optional[int]) -> list:
+        # the hooks for event on line
+        return [hook for hook, lines in self.hooks[event] if lines is None or line in lines]
+
+    def set(self, node, attribute: str, value):
+        # changes node so that detach can change it back
+        self.undo.append((node, attribute, getattr(node, attribute)))
+        setattr(node, attribute, value)
+
+    def assignment(self, stmt):
+        # stmt, or a HookedAssignStmt for it if it is an assignment with hooks
+        if type(stmt) is AssignStmt:
+            hooks = self.at(ASSIGNMENT, stmt.line)
+            if hooks:
+                return HookedAssignStmt(stmt, hooks)
+        return stmt
+
+    def hooked(self, stmt) -> bool:
+        # whether stmt gets a HookStmt or becomes a HookedAssignStmt
+        if (not isinstance(stmt, Stmt) or isinstance(stmt, (Stmts, CountStmt, HookStmt))
+                or getattr(stmt, "line", None) is None):
+            return False
+        if self.at(STATEMENT, stmt.line):
+            return True
+        return type(stmt) is AssignStmt and bool(self.at(ASSIGNMENT, stmt.line))
+
+    def attach(self, program: Program):
+        if self.program is not None:
+            self.detach()
+        # quickened first, quickening later would swap nodes out from under the hooks
+        program.quicken()
+        self.program = program
+        calls = [hook for hook, lines in self.hooks[CALL]]
+        returns = [hook for hook, lines in self.hooks[RETURN]]
+        stack = []
+        for func in program.funcs:
+            if calls or returns:
+                self.set(func, "stmts", HookedBody(func, func.stmts.stmts, calls, returns))
+            stack.append(func.stmts)
+        while stack:
+            node = stack.pop()
+            if isinstance(node, Stmts):
+                stmts = []
+                for stmt in node.stmts:
+                    if self.hooked(stmt):
+                        hooks = self.at(STATEMENT, stmt.line)
+                        if hooks:
+                            stmts.append(HookStmt(hooks, stmt))
+                    stmts.append(self.assignment(stmt))
+                self.set(node, "stmts", stmts)
+            elif isinstance(node, (IfStmt, WhileStmt)):
+                # a body that is one statement becomes a block, which then gets the hooks
+                for attribute in ("stmt", "elseStmt") if isinstance(node, IfStmt) else ("stmt",):
+                    body = getattr(node, attribute)
+                    if self.hooked(body):
+                        self.set(node, attribute, Stmts([body]))
+                if isinstance(node, ForStmt):
+                    for attribute in ("init", "update"):
+                        stmt = getattr(node, attribute)
+                        self.set(node, attribute, self.assignment(stmt))
+                    # whether it can count without running the update may have changed
+                    self.set(node, "counter", None)
+            stack.extend(node.children())
+        # there are new nodes, so the depths have to be measured again
+        program.deep = None
+        program.isdeep()
+
+    def detach(self):
+        for node, attribute, value in reversed(self.undo):
+            setattr(node, attribute, value)
+        self.undo = []
+        if self.program is not None:
+            self.program.deep = None
+            self.program = None
+
+
+class Printer:
+    """
+    Hooks that write every statement before it runs, every call and return
+    and every assignment with the line it is on to out, for sluc.py run
+    --trace. Statements show their first line of source, calls their
+    arguments and assignments the value assigned, indented by how many
+    calls are going on.
+    """
+
+    def __init__(self, out):
+        self.out = out
+        self.depth = 0
+
+    def hooks(self) -> Hooks:
+        hooks = Hooks()
+        hooks.add(STATEMENT, self.statement)
+        hooks.add(CALL, self.call)
+        hooks.add(RETURN, self.returned)
+        hooks.add(ASSIGNMENT, self.assignment)
+        return hooks
+
+    def write(self, line: Optional[int], what: str):
+        print("{0:>5}  {1}{2}".format("" if line is None else line, "  " * self.depth, what), file=self.out)
+
+    def statement(self, node, line, env):
+        self.write(line, text(node).strip().split("\n")[0].rstrip(" {"))
+
+    def call(self, func, line, env):
+        args = ", ".join("{0}={1}".format(id, env[id]) for id in func.params.buildList())
+        self.write(line, "call {0}({1})".format(func.id, args))
+        self.depth += 1
+
+    def returned(self, node, line, env, value):
+        self.depth -= 1
+        self.write(line, "return {0}".format(value))
+
+    def assignment(self, node, line, env):
+        self.write(line, "  {0} = {1}".format(node.id, env[node.id]))
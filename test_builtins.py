@@ -0,0 +1,33 @@
+import pytest
+
+from sluc_ast import BUILTINS, SLUCInvalidTypeError
+
+
+@pytest.mark.parametrize("name, args", [
+    ("div", (7.5, 2)),
+    ("div", (7, 2.0)),
+    ("div", (True, 2)),
+    ("floor", (False,)),
+    ("abs", (True,)),
+])
+def test_argument_of_the_wrong_type_is_refused(name, args):
+    with pytest.raises(SLUCInvalidTypeError):
+        BUILTINS[name].call(list(args))
+    with pytest.raises(SLUCInvalidTypeError):
+        BUILTINS[name].check([type(arg) for arg in args])
+
+
+@pytest.mark.parametrize("name, args, result", [
+    ("div", (7, 2), 3),
+    ("floor", (2.5,), 2),
+    ("floor", (3,), 3),
+    ("abs", (-2.5,), 2.5),
+    ("max", (1, 2.5), 2.5),
+])
+def test_argument_of_a_declared_type_is_taken(name, args, result):
+    assert BUILTINS[name].call(list(args)) == result
+
+
+def test_int_of_a_float_parameter_widens():
+    assert BUILTINS["floor"].typeof([int]) is int
+    assert BUILTINS["sqrt"].typeof([int]) is float
@@ -0,0 +1,59 @@
+import shutil
+
+import pytest
+
+from codegen import CGenerator, SLUCCodegenError, differential, run_native
+from parser import Parser
+
+needs_cc = pytest.mark.skipif(shutil.which("cc") is None, reason="no C compiler")
+
+
+def generate(source: str) -> str:
+    return CGenerator(Parser.from_source(source).program()).generate()
+
+
+@pytest.mark.parametrize("body", [
+    "int x; int y; print(x); y = x + 1; print(y);",
+    "bool b; print(b);",
+    "int x; bool c; c = true; if (c) { x = 1; } print(x);",
+    "int x; int i; i = 0; while (i < 1) { x = 1; i = i + 1; } print(x);",
+    "int x; int y; return 0; x = 1; y = x;",
+])
+def test_local_read_before_assignment_is_rejected(body):
+    with pytest.raises(SLUCCodegenError, match="may be read before it is assigned"):
+        generate("int main() { " + body + " }")
+
+
+@pytest.mark.parametrize("body", [
+    "int x; x = 1; print(x);",
+    "int x; bool c; c = true; if (c) { x = 1; } else { x = 2; } print(x);",
+    "int x; int i; for (i = 0; i < 2; i = i + 1) { x = i; } print(i);",
+])
+def test_local_assigned_first_compiles(body):
+    generate("int main() { " + body + " }")
+
+
+def test_parameters_count_as_assigned():
+    generate("int f(int a) { return a + 1; } int main() { int x; x = f(1); print(x); }")
+
+
+@needs_cc
+def test_unassigned_local_is_not_run_natively():
+    program = Parser.from_source("int main() { int x; print(x); }").program()
+    with pytest.raises(SLUCCodegenError):
+        differential(program)
+
+
+@needs_cc
+@pytest.mark.parametrize("decls, stmts, error", [
+    ("int x; int y;", "x = 0; y = 7 % x;", "ZeroDivisionError: integer modulo by zero\n"),
+    ("int x; float g;", "x = 0; g = 7 / x;", "ZeroDivisionError: division by zero\n"),
+    ("float f; float g;", "f = 0.0; g = 1.0 / f;", "ZeroDivisionError: float division by zero\n"),
+    ("int x; int y;", "x = 0; y = div(7, x);", "ZeroDivisionError: integer division or modulo by zero\n"),
+])
+def test_native_error_is_the_interpreters(decls, stmts, error):
+    program = Parser.from_source("int main() { " + decls + " print(1); " + stmts + " }").program()
+    out, err, code = run_native(program)
+    assert (out, err) == ("1\n", error)
+    assert code != 0
+    assert differential(program) == (True, "1\n" + error, "1\n" + error)
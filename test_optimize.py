@@ -0,0 +1,50 @@
+import shutil
+
+import pytest
+
+import sluc
+from optimize import cse
+from parser import Parser
+
+NEGATED = """int main() {
+    float f;
+    float g;
+    f = 2.5;
+    g = -(f) + 1;
+    print(g);
+    g = (-(f) + 1) * 2.0;
+    print(g);
+}
+"""
+
+
+def declared(program) -> dict:
+    return {decl.id: decl.typ for decl in program.funcs[0].decls.decls}
+
+
+def test_temporary_of_negated_float_is_float():
+    program = Parser.from_source(NEGATED).program()
+    temporaries = cse(program)
+    assert [t.temp for t in temporaries] == ["_cse1"]
+    assert declared(program)["_cse1"] == "float"
+
+
+def test_negated_int_stays_int():
+    program = Parser.from_source("int main() { int i; int j; i = 2; j = -(i) * 3; j = -(i) * 3 + 1; }").program()
+    cse(program)
+    assert declared(program)["_cse1"] == "int"
+
+
+def test_not_is_no_candidate():
+    # typeof has no type for a !, so nothing over it is kept in a temporary
+    program = Parser.from_source(
+        "int main() { bool a; bool b; a = true; b = !(a) == true; b = !(a) == true; }").program()
+    assert cse(program) == []
+
+
+@pytest.mark.skipif(shutil.which("cc") is None, reason="no C compiler")
+def test_negated_float_under_cse_native(tmp_path, capsys):
+    path = tmp_path / "negated.sluc"
+    path.write_text(NEGATED)
+    assert sluc.main(["run", "--cse", "--native", str(path)]) == 0
+    assert capsys.readouterr().out == "-1.5\n-3.0\n"
@@ -0,0 +1,96 @@
+import asyncio
+import contextlib
+import json
+import sys
+
+import pytest
+
+from server import LIMITS, CapturedStdout, SLUCServer
+
+FOREVER = "int main() { int i; i = 0; while (true) { i = i + 1; } }"
+
+
+@pytest.fixture
+def server():
+    server = SLUCServer(None, 1)
+    yield server
+    server.pool.shutdown(wait=True)
+
+
+def request(server: SLUCServer, **message) -> dict:
+    # what the server answers message with, without going through its socket
+    with contextlib.redirect_stdout(CapturedStdout(sys.stdout)) as captured:
+        server.stdout = captured
+        return asyncio.run(server.handle(json.dumps(message).encode("utf-8")))
+
+
+def register(server: SLUCServer, source: str, name: str = "prog") -> dict:
+    return request(server, op="register", name=name, source=source)
+
+
+def test_runs_and_captures_output(server):
+    assert register(server, "int main() { int x; x = 3; print(x); }")["ok"]
+    assert request(server, op="run", name="prog") == {"ok": True, "result": None, "output": "3\n"}
+
+
+def test_runs_are_limited_by_default(server):
+    assert server.limits == LIMITS
+    server.limits["seconds"] = 0.2
+    register(server, FOREVER)
+    response = request(server, op="run", name="prog")
+    assert not response["ok"]
+    assert response["limit"] == "seconds"
+
+
+def test_request_limits_replace_the_default(server):
+    register(server, FOREVER)
+    response = request(server, op="run", name="prog", limits={"steps": 100})
+    assert (response["ok"], response["limit"], response["line"]) == (False, "steps", 1)
+
+
+def test_request_cant_remove_a_limit(server):
+    server.limits = {"steps": 100}
+    register(server, FOREVER)
+    response = request(server, op="run", name="prog", limits={"steps": None})
+    assert response["limit"] == "steps"
+
+
+def test_unknown_limit_is_a_bad_request(server):
+    register(server, FOREVER)
+    response = request(server, op="run", name="prog", limits={"loops": 1})
+    assert response == {"ok": False, "error": "bad request: unknown limits loops"}
+
+
+def test_token_the_parser_cant_start_a_function_with(server):
+    assert register(server, "int main() { - }") == {"ok": False, "error": "ERROR: Unexpected token - on line 1"}
+
+
+def test_source_over_max_source_is_refused(server):
+    server.max_source = 10
+    response = register(server, "int main() { }")
+    assert not response["ok"]
+    assert "at most 10" in response["error"]
+    assert request(server, op="metrics")["programs"] == []
+
+
+def test_parse_stops_at_parse_seconds(server):
+    server.parse_seconds = 0.0
+    source = "int main() { int x; " + "x = 1; " * 1000 + "}"
+    response = register(server, source)
+    assert (response["ok"], response["limit"]) == (False, "seconds")
+
+
+def test_run_of_unknown_program(server):
+    assert request(server, op="run", name="nope") == {"ok": False, "error": "no program registered as nope"}
+
+
+def test_failing_builtin(server):
+    register(server, "int main() { float f; f = 0.0 - 1.0; print(1); print(sqrt(f)); }")
+    response = request(server, op="run", name="prog")
+    assert response == {"ok": False, "error": "ValueError: math domain error", "output": "1\n"}
+
+
+def test_float_is_no_int_argument(server):
+    register(server, "int main() { int x; x = 7.5; print(div(x, 2)); }")
+    response = request(server, op="run", name="prog")
+    assert (response["ok"], response["error"]) == (False, "ERROR: Invalid Type")
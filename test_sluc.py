@@ -0,0 +1,43 @@
+import pytest
+
+import sluc
+
+UNASSIGNED = "int main() { int x; int y; print(1); y = x + 1; }"
+
+
+def run(tmp_path, capsys, source: str, *options) -> tuple:
+    path = tmp_path / "prog.sluc"
+    path.write_text(source)
+    status = sluc.main(["run", *options, str(path)])
+    out = capsys.readouterr().out
+    return status, out
+
+
+@pytest.mark.parametrize("options", [(), ("--trace",), ("--tier",), ("--arena",), ("--cse",), ("--max-steps", "10")])
+def test_runtime_error_is_one_line(tmp_path, capsys, options):
+    status, out = run(tmp_path, capsys, UNASSIGNED, *options)
+    assert status == 1
+    assert out == "1\nTypeError: unsupported operand type(s) for +: 'NoneType' and 'int'\n"
+
+
+def test_limit_error_is_one_line(tmp_path, capsys):
+    status, out = run(tmp_path, capsys, "int main() { int i; i = 0; while (true) { i = i + 1; } }",
+                      "--max-steps", "5")
+    assert status == 1
+    assert out == "ERROR: steps limit of 5 exceeded on line 1\n"
+
+
+def test_program_that_runs_fine(tmp_path, capsys):
+    assert run(tmp_path, capsys, "int main() { int x; x = 2; print(x * 3); }") == (0, "6\n")
+
+
+@pytest.mark.parametrize("options", [(), ("--tier", "--tier-at", "0"), ("--arena",)])
+def test_float_held_by_an_int_is_no_div_argument(tmp_path, capsys, options):
+    status, out = run(tmp_path, capsys, "int main() { int x; x = 7.5; print(div(x, 2)); }", *options)
+    assert status == 1
+    assert out.splitlines()[-1] == "ERROR: Invalid Type"
+
+
+def test_failing_builtin_is_one_line(tmp_path, capsys):
+    status, out = run(tmp_path, capsys, "int main() { float f; f = 0.0 - 1.0; print(1); print(sqrt(f)); }")
+    assert (status, out) == (1, "1\nValueError: math domain error\n")
@@ -0,0 +1,77 @@
+import pytest
+
+from parser import Parser
+from sluc_ast import AndExpr, OrExpr, SLUCInvalidTypeError
+
+LOGIC = """int main() {
+    bool a;
+    a = {0};
+    print(a {1} a);
+}
+"""
+
+
+class Counted:
+    # a right side typed bool that evaluates to value, counting how often it is evaluated
+    def __init__(self, value):
+        self.value = value
+        self.evals = 0
+
+    def eval(self, env, funcs):
+        self.evals += 1
+        return self.value
+
+    def typeof(self, env):
+        return bool
+
+
+def quickened(left: str, op: str, node: type):
+    # the quickened node for a {op} a once a is left
+    program = Parser.from_source(LOGIC.replace("{0}", left).replace("{1}", op)).program()
+    program.quicken()
+    expr = program.funcs[0].stmts.stmts[1].printarg[0]
+    assert type(expr) is node
+    return expr
+
+
+@pytest.mark.parametrize("left, op, node", [("true", "&&", AndExpr), ("false", "||", OrExpr)])
+def test_fallback_evaluates_the_right_side_once(left, op, node):
+    expr = quickened(left, op, node)
+    expr.right = right = Counted(1)
+    assert expr.eval({"a": left == "true"}, {}) == 1
+    assert right.evals == 1
+
+
+@pytest.mark.parametrize("left, op, node", [("true", "&&", AndExpr), ("false", "||", OrExpr)])
+def test_bool_right_side_is_evaluated_once(left, op, node):
+    expr = quickened(left, op, node)
+    expr.right = right = Counted(True)
+    assert expr.eval({"a": left == "true"}, {}) is True
+    assert right.evals == 1
+
+
+@pytest.mark.parametrize("left, op, node", [("false", "&&", AndExpr), ("true", "||", OrExpr)])
+def test_skipped_right_side_is_not_evaluated(left, op, node):
+    expr = quickened(left, op, node)
+    expr.right = right = Counted(True)
+    expr.skipped = ()
+    assert expr.eval({"a": left == "true"}, {}) is (left == "true")
+    assert right.evals == 0
+
+
+def test_right_side_holding_the_wrong_type_is_a_type_error():
+    # g is declared bool but returns an int, which the fallback types
+    program = Parser.from_source("""bool g() {
+    return 1;
+}
+int main() {
+    bool a;
+    bool b;
+    bool c;
+    a = true;
+    b = g();
+    c = a && b;
+}
+""").program()
+    with pytest.raises(SLUCInvalidTypeError):
+        program.eval()
@@ -0,0 +1,473 @@
+"""
+SLU-C tiered execution
+Functions start out interpreted. Every call and every loop back-edge counts
+towards its function, and once a function has counted TIER_UP_AT of them it
+is compiled to Python source, which runs without going through a method call
+per node, and the compiled version takes over:
+
+  tiers = Tiers(program)
+  program.eval(tiers=tiers)
+  for event in tiers.log:
+      print(event)
+
+Calls find the compiled function because a tiered run hands eval a list of
+TieredFunction stand-ins instead of the FunctionDefs. A loop that is still
+running interpreted when its function is compiled goes on in the compiled
+version of that loop at its next back-edge. Both work because compiled code
+uses the same env dict the interpreter does.
+
+The compiled code does everything the nodes it came from do, in the same
+order: the type checks of BinaryExpr, the guards of the quickened nodes,
+printing each argument twice, a return only ending its own Stmts and the
+type check after the body. Calls evaluate their arguments compiled and then
+go through FunctionCallExpr.call, builtins are called directly once their
+arguments pass a type guard. Inlined calls and nodes it doesn't know are
+left to the nodes' own eval. Programs deep enough to run with
+run_steps, and coroutines, stay interpreted.
+"""
+import math
+import time
+from typing import Optional
+
+from sluc_ast import *
+from parser import LazyFunctionDef
+
+# calls plus loop back-edges after which a function is compiled
+TIER_UP_AT = 1000
+# deepest function body that is compiled, Python's parser only takes so many
+# nested parentheses and every level of the tree adds a few
+TIER_MAX_DEPTH = 40
+
+# Python operator for each SLU-C operator the compiled code writes out
+PY_OPS = {"+": "+", "-": "-", "*": "*", "/": "/", "%": "%", "<": "<", "<=": "<=", ">": ">", ">=": ">=",
+          "==": "==", "!=": "!=", "&&": "and", "||": "or"}
+# test the compiled code makes of an argument's type for each Builtin.accepts
+BUILTIN_GUARDS = {(bool,): "is bool", (int,): "is int", (float, int): "in NUMBERS"}
+
+
+def typeof_value(value) -> type:
+    # IDExpr.typeof for a value
+    return TYPES[value] if value in TYPES else type(value)
+
+
+def constant(expr) -> bool:
+    # whether expr is made of number and bool literals only, so it can't be a string
+    if type(expr) in (IntLitExpr, FloatExpr, BoolExpr):
+        return True
+    return isinstance(expr, (BinaryExpr, UnaryOp)) and all(constant(child) for child in expr.children())
+
+
+def save(env, temp: str, value):
+    # SaveExpr.eval once the expression has been evaluated
+    env[temp] = value
+    return value
+
+
+class TierUp:
+    """
+    What happened when a function got hot: reason is None if it was
+    compiled, otherwise why it stays interpreted
+    """
+
+    def __init__(self, func: str, calls: int, backedges: int, seconds: float, reason: Optional[str] = None):
+        self.func = func
+        self.calls = calls
+        self.backedges = backedges
+        self.seconds = seconds
+        self.reason = reason
+
+    @property
+    def compiled(self) -> bool:
+        return self.reason is None
+
+    def __str__(self):
+        counts = "{0} calls and {1} loop back-edges".format(self.calls, self.backedges)
+        if self.compiled:
+            return "{0}: compiled after {1} in {2:.2f} ms".format(self.func, counts, self.seconds * 1000)
+        return "{0}: kept interpreted after {1} ({2})".format(self.func, counts, self.reason)
+
+
+class TieredFunction:
+    """
+    Stands in for a FunctionDef in the function list of a tiered run. eval
+    counts calls until the function is hot, then it calls the compiled
+    version, or the FunctionDef's own eval if it could not be compiled.
+    """
+    __slots__ = ("func", "id", "line", "tiers", "calls", "backedges", "run", "loops", "source")
+
+    def __init__(self, func: FunctionDef, tiers: "Tiers"):
+        self.func = func
+        self.id = func.id
+        self.line = func.line
+        self.tiers = tiers
+        self.calls = 0
+        self.backedges = 0
+        self.run = None  # what eval calls once the function is hot
+        self.loops = {}  # WhileStmt -> compiled rest of that loop
+        self.source = None  # the Python source it was compiled to
+
+    def eval(self, values, funcs):
+        if self.run is None:
+            self.calls += 1
+            if self.calls + self.backedges < self.tiers.threshold:
+                return self.func.eval(values, funcs)
+            self.tiers.tier_up(self)
+        return self.run(values, funcs)
+
+    def eval_steps(self, values, funcs):
+        # deep programs aren't tiered, but a stand-in can still be run like a FunctionDef
+        return self.func.eval_steps(values, funcs)
+
+
+class Tiers:
+    """
+    The tiering state of one program, kept across runs so a function that
+    was compiled stays compiled
+    """
+
+    def __init__(self, program: Program, threshold: int = TIER_UP_AT):
+        self.threshold = threshold
+        self.functions = [TieredFunction(func, self) for func in program.funcs]
+        self.stand_in = {id(tiered.func): tiered for tiered in self.functions}
+        self.owner = {}  # WhileStmt -> TieredFunction of the function it is in
+        self.unscanned = list(self.functions)  # those whose loops aren't in owner yet
+        self.scan()
+        self.log = []  # TierUp for every function that got hot, in order
+
+    def scan(self):
+        # puts the loops of the functions parsed by now in owner, a lazily
+        # parsed function is only scanned once it has run
+        unscanned = []
+        for tiered in self.unscanned:
+            if isinstance(tiered.func, LazyFunctionDef):
+                unscanned.append(tiered)
+                continue
+            stack = [tiered.func.stmts]
+            while stack:
+                node = stack.pop()
+                if isinstance(node, WhileStmt):
+                    self.owner[node] = tiered
+                stack.extend(node.children())
+        self.unscanned = unscanned
+
+    def function(self, func: FunctionDef) -> TieredFunction:
+        return self.stand_in[id(func)]
+
+    def backedge(self, loop: WhileStmt):
+        """
+        Counts one back-edge of an interpreted loop. Returns the compiled rest
+        of the loop once its function is compiled, otherwise None.
+        """
+        tiered = self.owner.get(loop)
+        if tiered is None:
+            self.scan()
+            tiered = self.owner[loop]
+        if tiered.run is None:
+            tiered.backedges += 1
+            if tiered.calls + tiered.backedges < self.threshold:
+                return None
+            self.tier_up(tiered)
+        return tiered.loops.get(loop)
+
+    def tier_up(self, tiered: TieredFunction):
+        start = time.perf_counter()
+        reason = None
+        func = tiered.func
+        if isinstance(func, LazyFunctionDef):
+            # hot before it ever ran, at a low threshold
+            func.parse()
+        if measure(func) > TIER_MAX_DEPTH:
+            reason = "nested {0} deep".format(func.depth)
+        else:
+            try:
+                tiered.source, tiered.run, tiered.loops = PyGenerator(func).compile()
+            except (SyntaxError, RecursionError, MemoryError) as err:
+                reason = "{0}: {1}".format(type(err).__name__, err)
+        if reason is not None:
+            tiered.run = func.eval
+            tiered.loops = {}
+        self.log.append(TierUp(func.id, tiered.calls, tiered.backedges, time.perf_counter() - start, reason))
+
+
+class PyGenerator:
+    """
+    Turns one FunctionDef into Python source: a function taking the
+    arguments and the function list like FunctionDef.eval, and one function
+    per loop taking env and the function list that runs the rest of
+    that loop. Nodes the generated code needs at run time are passed in as
+    n0, n1, ... and the declared types of the variables as types.
+    """
+
+    def __init__(self, func: FunctionDef):
+        self.func = func
+        self.lines = []
+        self.nodes = []  # n<i> in the generated code is nodes[i]
+        self.names = {}  # id of node -> its n<i>
+        self.temps = 0
+        self.types = {**func.params.buildDict(), **func.decls.buildDict()}
+
+    def compile(self):
+        """
+        Returns the Python source, the function that runs the whole
+        FunctionDef and a dict of WhileStmt to the function that runs the
+        rest of it
+        """
+        loops = []
+        self.function()
+        stack = [self.func.stmts]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, WhileStmt):
+                loops.append(node)
+                self.lines.append("")
+                self.lines.append("def loop{0}(env, funcs):".format(len(loops) - 1))
+                self.emit(1, "budget = getattr(funcs, 'budget', None)")
+                self.loop(node, 1)
+            stack.extend(node.children())
+        source = "\n".join(self.lines) + "\n"
+        namespace = {"checktypes": checktypes, "typeof_value": typeof_value, "save": save,
+                     "NUMBERS": (float, int), "types": self.types,
+                     "SLUCInvalidTypeError": SLUCInvalidTypeError}
+        namespace.update(("n{0}".format(i), node) for i, node in enumerate(self.nodes))
+        exec(compile(source, "<tier {0}>".format(self.func.id), "exec"), namespace)
+        return source, namespace["function"], {loop: namespace["loop{0}".format(i)] for i, loop in enumerate(loops)}
+
+    def emit(self, depth: int, line: str):
+        self.lines.append("    " * depth + line)
+
+    def node(self, node) -> str:
+        # name of node, or of anything else the generated code uses, in the generated code
+        name = self.names.get(id(node))
+        if name is None:
+            name = self.names[id(node)] = "n{0}".format(len(self.nodes))
+            self.nodes.append(node)
+        return name
+
+    def temp(self) -> int:
+        self.temps += 1
+        return self.temps
+
+    def function(self):
+        # FunctionDef.eval: parameters from values, then locals set to None
+        func = self.func
+        self.lines.append("def function(values, funcs):")
+        self.emit(1, "budget = getattr(funcs, 'budget', None)")
+        params = ", ".join("{0!r}: values[{1}]".format(id, i) for i, (t, id) in enumerate(func.params.params))
+        self.emit(1, "env = {" + params + "}")
+        for decl in func.decls.decls:
+            self.emit(1, "env[{0!r}] = None".format(decl.id))
+        self.emit(1, "retVal = None")
+        self.stmts(func.stmts, 1, top=True)
+        self.typecheck(func.stmts, 1)
+        self.emit(1, "return retVal")
+
+    def block(self, stmt, depth: int):
+        # the body of an if, else or while, which can't be empty in Python
+        start = len(self.lines)
+        self.stmt(stmt, depth)
+        if len(self.lines) == start:
+            self.emit(depth, "pass")
+
+    def stmts(self, stmts: Stmts, depth: int, top: bool = False):
+        """
+        Statements  →  { Statement }
+        The first return directly in a Stmts ends it, so nothing after that
+        is written out. It only gives the function its value in the body.
+        """
+        for stmt in stmts.stmts:
+            if type(stmt) == ReturnStmt:
+                value = self.expr(stmt.expr)
+                self.emit(depth, "retVal = " + value if top else value)
+                return
+            self.stmt(stmt, depth)
+
+    def stmt(self, stmt, depth: int):
+        if isinstance(stmt, Stmts):
+            self.stmts(stmt, depth)
+        elif isinstance(stmt, AssignStmt):
+            self.emit(depth, "env[{0!r}] = {1}".format(stmt.id, self.expr(stmt.expr)))
+        elif isinstance(stmt, IfStmt):
+            self.emit(depth, "if {0}:".format(self.expr(stmt.expr)))
+            self.block(stmt.stmt, depth + 1)
+            if stmt.elseStmt is not None:
+                self.emit(depth, "else:")
+                self.block(stmt.elseStmt, depth + 1)
+        elif isinstance(stmt, ForStmt):
+            self.stmt(stmt.init, depth)
+            self.loop(stmt, depth)
+        elif isinstance(stmt, WhileStmt):
+            self.loop(stmt, depth)
+        elif isinstance(stmt, PrintStmt):
+            # PrintStmt.eval evaluates each argument once to see if it is a string and again to print it
+            for arg in stmt.printarg:
+                value = self.expr(arg)
+                # literals are known to be a string or not, and Python warns about (-2)[1:-1]
+                if type(arg) is StringExpr:
+                    self.emit(depth, "print({0}[1:-1])".format(value))
+                    continue
+                if constant(arg):
+                    self.emit(depth, "print({0})".format(value))
+                    continue
+                self.emit(depth, "if type({0}) == str:".format(value))
+                self.emit(depth + 1, "print({0}[1:-1])".format(self.expr(arg)))
+                self.emit(depth, "else:")
+                self.emit(depth + 1, "print({0})".format(self.expr(arg)))
+        elif isinstance(stmt, ReturnStmt):
+            # not directly in a Stmts, so it is evaluated and that's all
+            self.emit(depth, self.expr(stmt.expr))
+        elif isinstance(stmt, CountStmt):
+            # the counts list goes in the namespace like the nodes do
+            self.emit(depth, "{0}[{1}] += 1".format(self.node(stmt.counts), stmt.slot))
+        elif isinstance(stmt, Expr):
+            self.emit(depth, self.expr(stmt))
+        else:
+            self.emit(depth, "{0}.eval(env, funcs)".format(self.node(stmt)))
+
+    def loop(self, stmt: WhileStmt, depth: int):
+        """
+        A while, or a for after its init. A counted for asks its node for the
+        range and runs as a Python for over it if it gets one, otherwise both
+        run as a Python while.
+        """
+        general = depth
+        if isinstance(stmt, ForStmt) and stmt.counted():
+            values = "c{0}".format(self.temp())
+            var = stmt.init.id
+            self.emit(depth, "{0} = {1}.steps(env, funcs)".format(values, self.node(stmt)))
+            self.emit(depth, "if {0} is not None:".format(values))
+            self.emit(depth + 1, "for {0}v in {0}:".format(values))
+            self.emit(depth + 2, "env[{0!r}] = {1}v".format(var, values))
+            self.stmt(stmt.stmt, depth + 2)
+            self.emit(depth + 2, "if budget is not None:")
+            self.emit(depth + 3, "budget.tick({0!r})".format(stmt.line))
+            self.emit(depth + 1, "env[{0!r}] = {1}.start + len({1}) * {1}.step".format(var, values))
+            self.emit(depth, "else:")
+            general = depth + 1
+        self.emit(general, "while {0}:".format(self.expr(stmt.expr)))
+        self.stmt(stmt.stmt, general + 1)
+        if isinstance(stmt, ForStmt):
+            self.stmt(stmt.update, general + 1)
+        self.emit(general + 1, "if budget is not None:")
+        self.emit(general + 2, "budget.tick({0!r})".format(stmt.line))
+
+    def typecheck(self, stmts: Stmts, depth: int):
+        """
+        What FunctionDef.typecheck does after the body: every assignment, also
+        the ones after a return, is evaluated again and checked against its
+        variable's declared type. The other statements only type their
+        expressions with the declared types, which gives the same answer
+        every time, so they are checked now and only written out if they fail.
+        """
+        todo = [iter(stmts.stmts)]
+        while todo:
+            stmt = next(todo[-1], None)
+            if stmt is None:
+                todo.pop()
+            elif isinstance(stmt, Stmts):
+                todo.append(iter(stmt.stmts))
+            elif isinstance(stmt, AssignStmt) and stmt.id in self.types:
+                # AssignStmt.checktype only minds bools going where they weren't declared or the other way round
+                test = "is not" if self.types[stmt.id] == "bool" else "is"
+                self.emit(depth, "if type({0}) {1} bool:".format(self.expr(stmt.expr), test))
+                self.emit(depth + 1, "raise SLUCInvalidTypeError('Error: Invalid Type')")
+            elif isinstance(stmt, AssignStmt):
+                self.emit(depth, "{0}.checkvalue({1}, types)".format(self.node(stmt), self.expr(stmt.expr)))
+            else:
+                try:
+                    stmt.typecheck(None, dict(self.types), None)
+                    continue
+                except Exception:
+                    pass
+                self.emit(depth, "{0}.typecheck(env, types, funcs)".format(self.node(stmt)))
+
+    def expr(self, expr, checked: bool = False) -> str:
+        """
+        A Python expression doing what expr.eval does. checked is whether a
+        BinaryExpr above has already type checked this one.
+        """
+        t = type(expr)
+        if t is BinaryExpr:
+            # the whole subtree is type checked before anything in it is evaluated
+            value = "({0} {1} {2})".format(self.expr(expr.left, True), PY_OPS[expr.operator],
+                                          self.expr(expr.right, True))
+            if checked:
+                return value
+            return "({0}, {1})[1]".format(self.typeof(expr), value)
+        if isinstance(expr, (IntBinaryExpr, FloatBinaryExpr)):
+            n = self.temp()
+            test = " is int" if isinstance(expr, IntBinaryExpr) else " in NUMBERS"
+            lguard, left = self.operand(expr.left, checked, "l{0}".format(n), test)
+            rguard, right = self.operand(expr.right, checked, "r{0}".format(n), test)
+            guard = " & ".join(g for g in (lguard, rguard) if g is not None) or "True"
+            return "({0} {1} {2} if {3} else {4}.fallback(env, {0}, {2}))".format(
+                left, PY_OPS[expr.operator], right, guard, self.node(expr))
+        if isinstance(expr, (AndExpr, OrExpr)):
+            n = self.temp()
+            # the value of the left side that decides the answer on its own
+            stop = isinstance(expr, OrExpr)
+            if checked:
+                return "({0} if (l{1} := {2}) is {0} else (l{1} {3} {4}))".format(
+                    stop, n, self.expr(expr.left, True), PY_OPS[expr.operator], self.expr(expr.right, True))
+            # what LogicExpr.eval does: the side it skips has to hold what it was declared to
+            # and the side it evaluates has to come out a bool, otherwise typeof decides
+            typed = "".join(" and type(env[{0!r}]) is {1}".format(node.boo, getattr(t, "__name__", None))
+                            for node, t in expr.skipped)
+            return ("({0} if (l{1} := {2}) is {0}{3} else r{1} if l{1} is {4} and ((r{1} := {5}) is True or r{1} is "
+                    "False) else ({6}, l{1} {7} {5})[1])").format(
+                stop, n, self.expr(expr.left, checked), typed, not stop, self.expr(expr.right, checked),
+                self.typeof(expr), PY_OPS[expr.operator])
+        if isinstance(expr, UnaryOp):
+            return "({0}{1})".format("not " if expr.sign == "!" else "-", self.expr(expr.tree, checked))
+        if isinstance(expr, SaveExpr):
+            return "save(env, {0!r}, {1})".format(expr.temp, self.expr(expr.expr, checked))
+        if t is BuiltinCallExpr or t is FunctionCallExpr and expr.id in BUILTINS:
+            # straight to the Python function when the arguments pass what Builtin.call checks,
+            # otherwise Builtin.call says what is wrong with them
+            builtin = expr.builtin if t is BuiltinCallExpr else BUILTINS[expr.id]
+            n = self.temp()
+            names = ["a{0}_{1}".format(n, i) for i in range(len(expr.args))]
+            if len(expr.args) != len(builtin.params):
+                return "{0}.call([{1}])".format(self.node(builtin), ", ".join(self.expr(arg) for arg in expr.args))
+            guard = " & ".join("(type({0} := {1}) {2})".format(name, self.expr(arg), BUILTIN_GUARDS[accepts])
+                               for name, arg, accepts in zip(names, expr.args, builtin.accepts)) or "True"
+            return "({0}({1}) if {2} else {3}.call([{1}]))".format(
+                self.node(builtin.function), ", ".join(names), guard, self.node(builtin))
+        if t is FunctionCallExpr:
+            return "{0}.call([{1}], funcs)".format(self.node(expr), ", ".join(self.expr(arg) for arg in expr.args))
+        if isinstance(expr, IDExpr):
+            return "env[{0!r}]".format(expr.boo)
+        if t is IntLitExpr:
+            return "({0!r})".format(expr.value)
+        if t is FloatExpr and math.isfinite(expr.value):
+            return "({0!r})".format(expr.value)
+        if t is BoolExpr:
+            return repr(expr.boo == "true")
+        if t is StringExpr:
+            return repr(str(expr.boo))
+        # calls and anything else run the way they always do
+        return "{0}.eval(env, funcs)".format(self.node(expr))
+
+    def operand(self, expr, checked: bool, name: str, test: str):
+        """
+        One side of a quickened node: the guard for it, or None if it is a
+        literal that always passes, and what the operation uses
+        """
+        if type(expr) is IntLitExpr or type(expr) is FloatExpr and test == " in NUMBERS" and math.isfinite(expr.value):
+            return None, self.expr(expr)
+        return "(type({0} := {1}){2})".format(name, self.expr(expr, checked), test), name
+
+    def typeof(self, expr) -> str:
+        # a Python expression doing what expr.typeof(env) does
+        if isinstance(expr, BinaryExpr):
+            return "checktypes({0!r}, {1}, {2})".format(expr.operator, self.typeof(expr.left), self.typeof(expr.right))
+        if isinstance(expr, UnaryOp):
+            return "({0}, None)[1]".format(self.typeof(expr.tree))
+        if isinstance(expr, FunctionCallExpr):
+            return "None"
+        if isinstance(expr, SaveExpr):
+            return self.typeof(expr.expr)
+        if type(expr) is IDExpr:
+            return "typeof_value(env[{0!r}])".format(expr.boo)
+        if type(expr) in (IntLitExpr, FloatExpr, BoolExpr, StringExpr):
+            return type(expr.eval(None, None)).__name__
+        return "{0}.typeof(env)".format(self.node(expr))